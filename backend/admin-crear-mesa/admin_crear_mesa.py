@@ -1,110 +1,179 @@
-import boto3
-import json
 import uuid
-from boto3.dynamodb.conditions import Key, Attr
 
-dynamodb = boto3.resource('dynamodb')
+from booktable import aws, combinaciones, metricas, propietarios
+from booktable.http import respuesta, leer_body, campos_vacios, error_campos_vacios, MENSAJE_JSON_INVALIDO
 
+METODOS = 'OPTIONS,POST'
+
+# Tope de mesas por solicitud (el inventario vive en un solo item de RESTAURANTES)
+MAX_MESAS_POR_SOLICITUD = 500
+
+restaurantes_table = aws.tabla('RESTAURANTES')
+mesas_table = aws.tabla('MESAS')
+
+
+@metricas.instrumentar
 def admin_crear_mesa(event, context):
+    # Analizar el cuerpo de la solicitud
+    body = leer_body(event)
+    if body is None:
+        return respuesta(400, MENSAJE_JSON_INVALIDO, METODOS)
+
+    # Se acepta una sola mesa ('capacidad') o una lista ('mesas') de {capacidad, etiqueta?, cantidad?, unir?}.
+    # 'uniones' (pares de ID_Mesa) declara qué mesas ya creadas se pueden juntar, con o sin mesas nuevas.
+    en_lote = 'mesas' in body
+    solo_uniones = not en_lote and 'capacidad' not in body and 'uniones' in body
+    campo_mesas = 'mesas' if en_lote else 'uniones' if solo_uniones else 'capacidad'
+    campos_requeridos = ['localidad', 'categoria', 'nombre_restaurant', campo_mesas, 'id_usuario']
+    faltantes = campos_vacios(body, campos_requeridos)
+    if faltantes:
+        return error_campos_vacios(faltantes, METODOS)
+
+    uniones_pedidas = body.get('uniones') or []
+    if not isinstance(uniones_pedidas, list) or not all(isinstance(par, list) and len(par) == 2 for par in uniones_pedidas):
+        return respuesta(400, "Error: 'uniones' debe ser una lista de pares de IDs de mesas.", METODOS)
 
-    try:
-        # Analizar el cuerpo de la solicitud
-        body = json.loads(event.get('body', '{}'))
-    except json.JSONDecodeError:
-        return {
-            'statusCode': 400,
-            'body': json.dumps("Error: Cuerpo de la solicitud no es un JSON válido."),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST'
-            }
-        }
-    campos_requeridos = ['localidad', 'categoria', 'nombre_restaurant', 'capacidad', 'id_usuario']
-    # Verificar si todos los campos están presentes y no vacíos
-    campos_vacios = [campo for campo in campos_requeridos if not body.get(campo)]
-
-    if campos_vacios:
-        return {
-            'statusCode': 400,
-            'body': json.dumps(f"Error: Todos los campos son requeridos. Los siguientes campos estan vacios o ausentes: {', '.join(campos_vacios)}"),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST'
-            }
-        }
-        
     # Parámetros recibidos del usuario
     localidad = body['localidad']
     categoria = body['categoria']
     nombre_restaurant = body['nombre_restaurant']
-    capacidad = int(body['capacidad'])
     id_usuario = body['id_usuario']
-    
-    # Inicialización de las tablas
-    mesas_table = dynamodb.Table('MESAS')
-    restaurantes_table = dynamodb.Table('RESTAURANTES')
-    
-    # Paso 1: Verificar si el restaurante existe en la tabla RESTAURANTES
+
+    if en_lote:
+        if not isinstance(body['mesas'], list):
+            return respuesta(400, "Error: 'mesas' debe ser una lista.", METODOS)
+        resultados = [validar_pedido(pedido) for pedido in body['mesas']]
+    elif solo_uniones:
+        resultados = []
+    else:
+        resultados = [validar_pedido({'capacidad': body['capacidad']})]
+
+    nuevas = [mesa for resultado in resultados for mesa in resultado.pop('mesas', [])]
+    if not nuevas and not solo_uniones:
+        return respuesta(400, {'error': 'No hay mesas válidas para agregar.', 'resultados': resultados}, METODOS)
+    if len(nuevas) > MAX_MESAS_POR_SOLICITUD:
+        return respuesta(400, f"Error: Se pueden agregar hasta {MAX_MESAS_POR_SOLICITUD} mesas por solicitud.", METODOS)
+
+    clave_compuesta = f"{localidad}#{categoria}#{nombre_restaurant}"
+    clave_restaurante = propietarios.clave_restaurante(localidad, categoria, nombre_restaurant)
+
+    # Pares de mesas unibles: los de 'uniones' y, en los pedidos con 'unir', cada mesa nueva con la siguiente
+    pares = [tuple(par) for par in uniones_pedidas]
+    for resultado in resultados:
+        if resultado.get('unir'):
+            pares += zip(resultado['ids'], resultado['ids'][1:])
+
+    # Paso 1: Verificar que el restaurante exista y sea de este usuario (cacheado en el contenedor)
     try:
-        response_restaurante = restaurantes_table.query(
-            KeyConditionExpression =Key('Localidad').eq(localidad) & Key('Categoria#Nombre_restaurant').eq(f"{categoria}#{nombre_restaurant}"),
-            FilterExpression=Attr('ID_Usuario').eq(id_usuario))
-
-        if not response_restaurante['Items']:
-            return {
-                'statusCode': 404,
-                'body': json.dumps(f"Error: El restaurante '{nombre_restaurant}' con categoria '{categoria}' no existe en la localidad '{localidad}' para este usuario."),
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                    'Access-Control-Allow-Methods': 'OPTIONS,POST'
-                }
-            }
+        if not propietarios.es_propietario(localidad, categoria, nombre_restaurant, id_usuario):
+            return respuesta(404, f"Error: El restaurante '{nombre_restaurant}' con categoria '{categoria}' no existe en la localidad '{localidad}' para este usuario.", METODOS)
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'body': json.dumps(f"Error consultando la tabla RESTAURANTES: {str(e)}"),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST'
-            }
-        }
-    
-    # Paso 2: Generar un ID único para la mesa dentro del contexto del restaurante
-    clave_compuesta = f"{localidad}#{categoria}#{nombre_restaurant}"
-    
-    table_id = str(uuid.uuid4())  # ID único basado solo en el UUID
-    
-    # Paso 3: Crear el nuevo item de mesa
-    nueva_mesa = {
-        'Localidad#Categoria#Nombre_restaurant': clave_compuesta,  # Partition Key
-        'ID_Mesa': table_id,                # Sort Key
-        'Capacidad': capacidad,                # Capacidad de la mesa
+        return respuesta(500, f"Error consultando la tabla RESTAURANTES: {str(e)}", METODOS)
+
+    # Paso 2: Agregar todas las mesas al final del inventario en una sola escritura. El tamaño del
+    # inventario resultante indica qué posiciones (índices) les tocaron, sin leerlo antes.
+    actualizacion = 'SET Mesas = list_append(if_not_exists(Mesas, :vacia), :mesas)'
+    condicion = 'ID_Usuario = :usuario'
+    valores = {
+        ':vacia': [],
+        ':mesas': [{'ID_Mesa': mesa['ID_Mesa'], 'Capacidad': mesa['Capacidad']} for mesa in nuevas],
+        ':usuario': id_usuario
     }
-    
-    # Paso 4: Insertar la nueva mesa en la tabla MESAS
+    uniones = []
+    if pares:
+        # Las uniones se guardan por índice, así que hace falta leer el inventario; la escritura verifica
+        # que no haya cambiado mientras tanto
+        try:
+            restaurante = restaurantes_table.get_item(Key=clave_restaurante, ProjectionExpression='Mesas, Uniones',
+                                                      ConsistentRead=True).get('Item')
+        except Exception as e:
+            return respuesta(500, f"Error consultando la tabla RESTAURANTES: {str(e)}", METODOS)
+        if restaurante is None:
+            return respuesta(404, f"Error: El restaurante '{nombre_restaurant}' con categoria '{categoria}' no existe en la localidad '{localidad}' para este usuario.", METODOS)
+
+        inventario = restaurante.get('Mesas', [])
+        indices = {mesa['ID_Mesa']: indice for indice, mesa in enumerate([*inventario, *nuevas])}
+        desconocidas = sorted({id_mesa for par in pares for id_mesa in par if id_mesa not in indices})
+        if desconocidas:
+            return respuesta(400, f"Error: Mesas inexistentes en 'uniones': {', '.join(map(str, desconocidas))}.", METODOS)
+        try:
+            pares_indices = combinaciones.validar_uniones([(indices[a], indices[b]) for a, b in pares], len(indices))
+        except ValueError as e:
+            return respuesta(400, f"Error: {str(e)}", METODOS)
+
+        existentes = {tuple(sorted(int(indice) for indice in par)) for par in restaurante.get('Uniones', [])}
+        uniones = sorted(set(pares_indices) - existentes)
+        actualizacion += ', Uniones = list_append(if_not_exists(Uniones, :vacia), :uniones)'
+        condicion += ' AND (attribute_not_exists(Mesas) OR size(Mesas) = :cantidad)'
+        valores.update({':uniones': [list(par) for par in uniones], ':cantidad': len(inventario)})
+
     try:
-        mesas_table.put_item(Item=nueva_mesa)
+        response = restaurantes_table.update_item(
+            Key=clave_restaurante,
+            UpdateExpression=actualizacion,
+            ConditionExpression=condicion,
+            ExpressionAttributeValues=valores,
+            ReturnValues='UPDATED_NEW'
+        )
+    except restaurantes_table.meta.client.exceptions.ConditionalCheckFailedException:
+        propietarios.olvidar(localidad, categoria, nombre_restaurant, id_usuario)
+        if pares:
+            return respuesta(409, "Error: El inventario de mesas cambió mientras se guardaban las uniones. Intente nuevamente.", METODOS)
+        return respuesta(404, f"Error: El restaurante '{nombre_restaurant}' con categoria '{categoria}' no existe en la localidad '{localidad}' para este usuario.", METODOS)
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'body': json.dumps(f"Error agregando la mesa: {str(e)}"),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST'
-            }
-        }
-    
-    return {
-        'statusCode': 201,
-        'body': json.dumps("Mesa agregada exitosamente."),
-        'headers': {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-            'Access-Control-Allow-Methods': 'OPTIONS,POST'
-        }
-    }
+        return respuesta(500, f"Error agregando las mesas: {str(e)}", METODOS)
+
+    if nuevas:
+        primer_indice = len(response['Attributes']['Mesas']) - len(nuevas)
+        for desplazamiento, mesa in enumerate(nuevas):
+            mesa['Indice'] = primer_indice + desplazamiento
+
+    # Paso 3: Guardar el detalle de cada mesa en MESAS con BatchWriteItem
+    if nuevas:
+        try:
+            with mesas_table.batch_writer() as batch:
+                for mesa in nuevas:
+                    batch.put_item(Item=dict(mesa, **{'Localidad#Categoria#Nombre_restaurant': clave_compuesta}))
+        except Exception as e:
+            return respuesta(500, f"Error guardando las mesas en la tabla MESAS: {str(e)}", METODOS)
+
+    if solo_uniones:
+        return respuesta(201, {'mensaje': f"{len(uniones)} uniones de mesas agregadas exitosamente.", 'uniones': uniones}, METODOS)
+    if not en_lote and not pares:
+        return respuesta(201, "Mesa agregada exitosamente.", METODOS)
+    resultado = {'mensaje': f"{len(nuevas)} mesas agregadas exitosamente.", 'resultados': resultados}
+    if pares:
+        resultado['uniones'] = uniones
+    return respuesta(201, resultado, METODOS)
+
+
+def validar_pedido(pedido):
+    """Valida un elemento de 'mesas' y arma sus mesas.
+
+    Devuelve el resultado a informar al usuario: con 'ids' de las mesas a crear
+    (y las mesas en 'mesas') si es válido, o con 'error' si no lo es.
+    """
+    if not isinstance(pedido, dict):
+        return {'error': 'Cada elemento de mesas debe ser un objeto con capacidad.'}
+    etiqueta = pedido.get('etiqueta')
+    resultado = {'capacidad': pedido.get('capacidad'), 'etiqueta': etiqueta}
+    try:
+        capacidad = int(pedido.get('capacidad'))
+        cantidad = int(pedido.get('cantidad') or 1)
+    except (TypeError, ValueError):
+        return dict(resultado, error='capacidad y cantidad deben ser números enteros.')
+    if capacidad < 1 or cantidad < 1:
+        return dict(resultado, error='capacidad y cantidad deben ser mayores a cero.')
+    if cantidad > MAX_MESAS_POR_SOLICITUD:
+        return dict(resultado, error=f'cantidad no puede superar {MAX_MESAS_POR_SOLICITUD}.')
+    if pedido.get('unir'):
+        # Las mesas del pedido quedan en fila: cada una se puede juntar con la siguiente
+        resultado['unir'] = True
+
+    mesas = []
+    for numero in range(1, cantidad + 1):
+        mesa = {'ID_Mesa': str(uuid.uuid4()), 'Capacidad': capacidad}  # ID único basado solo en el UUID
+        if etiqueta:
+            mesa['Etiqueta'] = f"{etiqueta} {numero}" if cantidad > 1 else etiqueta
+        mesas.append(mesa)
+    return dict(resultado, capacidad=capacidad, cantidad=cantidad, ids=[mesa['ID_Mesa'] for mesa in mesas], mesas=mesas)
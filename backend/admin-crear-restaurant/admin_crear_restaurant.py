@@ -1,16 +1,8 @@
-import boto3
-import json
+from booktable import disponibilidad, horarios, metricas, notificaciones, transacciones, versiones
+from booktable.http import respuesta, leer_body, campos_vacios, error_campos_vacios, MENSAJE_JSON_INVALIDO
 
-dynamodb = boto3.resource('dynamodb')
-sns = boto3.client('sns')
+METODOS = 'OPTIONS,POST'
 
-def get_topic_arn(topic_name):
-    sns = boto3.client('sns')
-    topics = sns.list_topics()['Topics']
-    for topic in topics:
-        if topic['TopicArn'].split(':')[-1] == topic_name:
-            return topic['TopicArn']
-    return None
 
 def format_restaurant_message(restaurant_data):
     return f"""
@@ -23,124 +15,80 @@ Categoría: {restaurant_data['categoria']}
 ID Usuario Creador: {restaurant_data['id_usuario']}
 """
 
+@metricas.instrumentar
 def admin_crear_restaurant(event, context):
-    try:
-        # Analizar el cuerpo de la solicitud
-        body = json.loads(event.get('body', '{}'))
-    except json.JSONDecodeError:
-        return {
-            'statusCode': 400,
-            'body': json.dumps("Error: Cuerpo de la solicitud no es un JSON válido."),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST'
-            }
-        }
+    # Analizar el cuerpo de la solicitud
+    body = leer_body(event)
+    if body is None:
+        return respuesta(400, MENSAJE_JSON_INVALIDO, METODOS)
 
-    campos_requeridos = ['localidad', 'categoria', 'nombre_restaurant', 'id_usuario']   
     # Verificar si todos los campos están presentes y no vacíos
-    campos_vacios = [campo for campo in campos_requeridos if not body.get(campo)]
+    campos_requeridos = ['localidad', 'categoria', 'nombre_restaurant', 'id_usuario']
+    faltantes = campos_vacios(body, campos_requeridos)
+    if faltantes:
+        return error_campos_vacios(faltantes, METODOS)
 
-    if campos_vacios:
-        return {
-            'statusCode': 400,
-            'body': json.dumps(f"Error: Todos los campos son requeridos. Los siguientes campos estan vacios o ausentes: {', '.join(campos_vacios)}"),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST'
-            }
-        }
-    
     # Parámetros recibidos del usuario
     localidad = body['localidad']
     categoria = body['categoria']
     nombre_restaurant = body['nombre_restaurant']
     id_usuario = body['id_usuario']
-    
-    # Inicialización de la tabla
-    restaurant_table = dynamodb.Table('RESTAURANTES')
-    
+
+    # Minutos que dura una reserva si el pedido no dice otra cosa (opcional)
+    duracion_reserva = None
+    if body.get('duracion_reserva'):
+        try:
+            duracion_reserva = disponibilidad.validar_duracion(body['duracion_reserva'])
+        except ValueError as e:
+            return respuesta(400, f"Error: {str(e)}", METODOS)
+
+    # Zona horaria IANA del restaurante (opcional; si no viene, la por defecto)
+    zona_horaria = None
+    if body.get('zona_horaria'):
+        try:
+            zona_horaria = horarios.validar_zona(body['zona_horaria'])
+        except ValueError as e:
+            return respuesta(400, f"Error: {str(e)}", METODOS)
+
     categoria_restaurant = f"{categoria}#{nombre_restaurant}"
-    
-    # Paso 1: Verificar si ya existe un restaurante con el mismo nombre en la misma localidad y categoría
-    try:
-        response = restaurant_table.get_item(
-            Key={
-                'Localidad': localidad,  # PK
-                'Categoria#Nombre_restaurant': categoria_restaurant  # SK como combinación
-            }
-        )
-        
-        if 'Item' in response:
-            return {
-                'statusCode': 409,
-                'body': json.dumps("Error: Ya existe un restaurante con el mismo nombre en esta localidad y categoria."),
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                    'Access-Control-Allow-Methods': 'OPTIONS,POST'
-                }
-            }
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'body': json.dumps(f"Error consultando la tabla RESTAURANTES: {str(e)}"),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST'
-            }
-        }
-    
-    # Paso 2: Crear el nuevo restaurante
+
+    # Paso 1: Crear el restaurante, invalidar las búsquedas cacheadas de la localidad y encolar
+    # la notificación en una sola transacción.
+    # La condición sobre la clave rechaza un restaurante con el mismo nombre en la misma localidad y categoría.
     nuevo_restaurant = {
         'Localidad': localidad,
         'Categoria#Nombre_restaurant': categoria_restaurant,
         'ID_Usuario': id_usuario
     }
-    
+    if duracion_reserva:
+        nuevo_restaurant['Duracion_reserva'] = duracion_reserva
+    if zona_horaria:
+        nuevo_restaurant['Zona_horaria'] = zona_horaria
+    restaurant_details = {
+        'nombre_restaurant': nombre_restaurant,
+        'localidad': localidad,
+        'categoria': categoria,
+        'id_usuario': id_usuario
+    }
+
     try:
-        restaurant_table.put_item(Item=nuevo_restaurant)
-        
-        # Enviar notificación SNS
-        try:
-            topic_arn = get_topic_arn('restaurant-creation-notifications')
-            if topic_arn:
-                restaurant_details = {
-                    'nombre_restaurant': nombre_restaurant,
-                    'localidad': localidad,
-                    'categoria': categoria,
-                    'id_usuario': id_usuario
-                }
-                
-                sns.publish(
-                    TopicArn=topic_arn,
-                    Message=format_restaurant_message(restaurant_details),
-                    Subject=f'Nuevo Restaurante Creado - {nombre_restaurant}'
-                )
-        except Exception as e:
-            print(f"Error sending SNS notification: {str(e)}")
-            # Don't return error - restaurant was created successfully
-            
+        transacciones.ejecutar([
+            transacciones.put(
+                'RESTAURANTES', nuevo_restaurant,
+                condicion='attribute_not_exists(Localidad)'
+            ),
+            versiones.incrementar(versiones.clave_restaurantes(localidad)),
+            notificaciones.encolar(
+                notificaciones.TOPICO_RESTAURANTES,
+                f'Nuevo Restaurante Creado - {nombre_restaurant}',
+                format_restaurant_message(restaurant_details)
+            )
+        ])
+    except transacciones.TransaccionCancelada as e:
+        if e.fallo_condicion(0):
+            return respuesta(409, "Error: Ya existe un restaurante con el mismo nombre en esta localidad y categoria.", METODOS)
+        return respuesta(500, f"Error creando el restaurante: {str(e)}", METODOS)
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'body': json.dumps(f"Error creando el restaurante: {str(e)}"),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST'
-            }
-        }
-    
-    return {
-        'statusCode': 201,
-        'body': json.dumps("Restaurante creado exitosamente."),
-        'headers': {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-            'Access-Control-Allow-Methods': 'OPTIONS,POST'
-        }
-    }
+        return respuesta(500, f"Error creando el restaurante: {str(e)}", METODOS)
+
+    return respuesta(201, "Restaurante creado exitosamente.", METODOS)
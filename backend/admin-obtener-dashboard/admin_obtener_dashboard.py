@@ -0,0 +1,87 @@
+from booktable import aws, concurrencia, horarios, lotes, metricas, propietarios, reservas
+from booktable.http import respuesta, leer_query, campos_vacios, error_campos_vacios
+from booktable.paginacion import iterar_query
+
+METODOS = 'GET,OPTIONS'
+
+restaurantes_table = aws.tabla('RESTAURANTES')
+
+
+@metricas.instrumentar
+def admin_obtener_dashboard(event, context):
+    params = leer_query(event)
+
+    faltantes = campos_vacios(params, ['id_usuario'])
+    if faltantes:
+        return error_campos_vacios(faltantes, METODOS)
+
+    # El día de hoy de cada restaurante es el de su zona; el de la respuesta, el de la zona por defecto
+    today_str = horarios.hoy(horarios.ZONA_POR_DEFECTO)
+
+    try:
+        # Paso 1: Restaurantes del usuario, por el índice de dueños
+        claves = [
+            {'Localidad': item['Localidad'], 'Categoria#Nombre_restaurant': item['Categoria#Nombre_restaurant']}
+            for item in iterar_query(restaurantes_table, **propietarios.query_por_propietario(params['id_usuario']))
+        ]
+        if not claves:
+            return respuesta(200, {'fecha': today_str, 'restaurantes': [], 'totales': resumir([])}, METODOS, event=event)
+
+        # Paso 2: El inventario de mesas de todos ellos en un solo BatchGetItem
+        restaurantes = lotes.batch_get({
+            'RESTAURANTES': {
+                'Keys': claves,
+                'ProjectionExpression': 'Localidad, #sk, Mesas, Zona_horaria',
+                'ExpressionAttributeNames': {'#sk': 'Categoria#Nombre_restaurant'}
+            }
+        })['RESTAURANTES']
+        restaurantes.sort(key=lambda restaurante: (restaurante['Localidad'], restaurante['Categoria#Nombre_restaurant']))
+
+        # Paso 3: Las reservas de hoy de cada restaurante, con una query por partición en paralelo
+        # (una por restaurante, o una por shard si RESERVAS está particionada por día)
+        reservas_por_restaurante = reservas_de_hoy(restaurantes)
+    except Exception as e:
+        return respuesta(500, f"Error al obtener el resumen: {str(e)}", METODOS)
+
+    filas = []
+    for restaurante, reservas_restaurante in zip(restaurantes, reservas_por_restaurante):
+        categoria, nombre_restaurant = restaurante['Categoria#Nombre_restaurant'].split('#', 1)
+        mesas = restaurante.get('Mesas', [])
+        filas.append({
+            'localidad': restaurante['Localidad'],
+            'categoria': categoria,
+            'nombre_restaurant': nombre_restaurant,
+            'fecha': horarios.hoy(horarios.zona_de(restaurante)),
+            'mesas': len(mesas),
+            'capacidad': sum(int(mesa['Capacidad']) for mesa in mesas),
+            'reservas': len(reservas_restaurante),
+            'comensales': sum(int(reserva.get('Comensales', 0)) for reserva in reservas_restaurante)
+        })
+
+    return respuesta(200, {'fecha': today_str, 'restaurantes': filas, 'totales': resumir(filas)}, METODOS, event=event)
+
+
+def reservas_de_hoy(restaurantes):
+    """Reservas del día de hoy (en su zona) de cada restaurante, solo los comensales, en el orden de ``restaurantes``.
+
+    Todas las particiones de todos los restaurantes van en un solo ``mapear``.
+    """
+    consultas = []
+    for posicion, restaurante in enumerate(restaurantes):
+        zona = horarios.zona_de(restaurante)
+        dia = horarios.hoy(zona)
+        clave_compuesta = f"{restaurante['Localidad']}#{restaurante['Categoria#Nombre_restaurant']}"
+        consultas += [(posicion, pk, dia, zona) for pk in reservas.particiones(clave_compuesta, dia)]
+    resultados = concurrencia.mapear(
+        lambda consulta: reservas.consultar_particion(consulta[1], consulta[2], consulta[2], consulta[3],
+                                                      ProjectionExpression='Comensales'),
+        consultas
+    )
+    por_restaurante = [[] for _ in restaurantes]
+    for (posicion, *_), items in zip(consultas, resultados):
+        por_restaurante[posicion] += items
+    return por_restaurante
+
+
+def resumir(filas):
+    return {campo: sum(fila[campo] for fila in filas) for campo in ('mesas', 'capacidad', 'reservas', 'comensales')}
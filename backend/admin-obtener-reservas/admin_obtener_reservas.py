@@ -1,117 +1,159 @@
-import boto3
-import json
 from datetime import datetime, timedelta
-from boto3.dynamodb.conditions import Key, Attr
-import boto3.dynamodb.types
 
+from booktable import disponibilidad, horarios, metricas, propietarios, reservas
+from booktable.http import respuesta, leer_query, campos_vacios, error_campos_vacios
+from booktable.paginacion import parametros_pagina
 
-dynamodb = boto3.resource('dynamodb')
+METODOS = 'GET,OPTIONS'
 
+# Atributos de RESERVAS que se pueden pedir con 'campos'
+CAMPOS_PERMITIDOS = {'Fecha_hora', 'ID_Mesa', 'Indice_mesa', 'Mesas_unidas', 'Indices_unidos', 'Nombre_usuario', 'Mail_usuario', 'Comensales', 'Duracion'}
 
+# Rango máximo entre 'from' y 'to'
+MAX_DIAS = 92
+
+@metricas.instrumentar
 def admin_obtener_reservas(event, context):
     try:
-        params = event.get('queryStringParameters', {}) or {}
+        params = leer_query(event)
 
         campos_requeridos = ['localidad', 'categoria', 'nombre_restaurant', 'id_usuario']
-
-        campos_vacios = [campo for campo in campos_requeridos if not params.get(campo)]
-
-        if campos_vacios:
-            return {
-                'statusCode': 400,
-                'body': json.dumps(
-                    f"Error: Todos los campos son requeridos. Los siguientes campos están vacíos o ausentes: {', '.join(campos_vacios)}"),
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                    'Access-Control-Allow-Methods': 'GET,OPTIONS'
-                }
-            }
-
+        faltantes = campos_vacios(params, campos_requeridos)
+        if faltantes:
+            return error_campos_vacios(faltantes, METODOS)
 
         localidad = params.get('localidad')
         categoria = params.get('categoria')
         nombre_restaurant = params.get('nombre_restaurant')
         id_usuario = params.get('id_usuario')
 
+        try:
+            limit, next_token = parametros_pagina(params)
+            campos = leer_campos(params)
+        except ValueError as e:
+            return respuesta(400, f"Error: {str(e)}", METODOS)
 
-        clave_compuesta = f'{localidad}#{categoria}#{nombre_restaurant}'
-
-        today = datetime.utcnow() - timedelta(hours=3)
-        today_str = today.strftime('%Y-%m-%d')
-
+        agregar = params.get('agregar')
+        if agregar and agregar != 'hora':
+            return respuesta(400, "Error: 'agregar' solo admite el valor 'hora'.", METODOS)
 
-        reservas_table = dynamodb.Table('RESERVAS')
-        restaurantes_table = dynamodb.Table('RESTAURANTES')
+        clave_compuesta = f'{localidad}#{categoria}#{nombre_restaurant}'
 
-        # Paso 0: Verificar que exista el restaurant en la tabla RESTAURANTES y que sea de ese user
+        # Paso 0: Verificar que exista el restaurant y que sea de ese user, leyendo en el mismo pedido su zona
+        # y, para el resumen por hora, el inventario de mesas
+        atributos = ['Zona_horaria', 'Mesas', 'Duracion_reserva'] if agregar else ['Zona_horaria']
         try:
-            response_restaurante = restaurantes_table.query(
-                KeyConditionExpression=Key('Localidad').eq(localidad) & Key('Categoria#Nombre_restaurant').eq(
-                    f"{categoria}#{nombre_restaurant}"),
-                FilterExpression=Attr('ID_Usuario').eq(id_usuario))
-
-            if not response_restaurante['Items']:
-                return {
-                    'statusCode': 404,
-                    'body': json.dumps(
-                        f"Error: El restaurante '{nombre_restaurant}' con categoria '{categoria}' no existe en la localidad '{localidad}' para este usuario."),
-                    'headers': {
-                        'Access-Control-Allow-Origin': '*',
-                        'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                        'Access-Control-Allow-Methods': 'OPTIONS,POST'
-                    }
-                }
+            restaurante = propietarios.restaurante_de(localidad, categoria, nombre_restaurant, id_usuario, atributos)
         except Exception as e:
-            return {
-                'statusCode': 500,
-                'body': json.dumps(f"Error consultando la tabla RESTAURANTES: {str(e)}"),
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                    'Access-Control-Allow-Methods': 'OPTIONS,POST'
-                }
-            }
+            return respuesta(500, f"Error consultando la tabla RESTAURANTES: {str(e)}", METODOS)
+        if restaurante is None:
+            return respuesta(404, f"Error: El restaurante '{nombre_restaurant}' con categoria '{categoria}' no existe en la localidad '{localidad}' para este usuario.", METODOS)
 
-        # Paso 1: Buscar las reservas del dia de hoy para el restaurante en la tabla RESERVAS
+        # El rango es de horas locales del restaurante; por defecto, su día de hoy
+        zona = horarios.zona_de(restaurante)
         try:
-            response = reservas_table.query(
-                KeyConditionExpression=Key('Localidad#Categoria#Nombre_restaurant').eq(clave_compuesta) &
-                                       Key('Fecha_hora#ID_Mesa').begins_with(today_str)
-            )
-            reservas = response.get('Items', [])
-            json_data = boto3.dynamodb.types.TypeSerializer().serialize(reservas)
-
+            desde, hasta = leer_rango(params, zona)
+        except ValueError as e:
+            return respuesta(400, f"Error: {str(e)}", METODOS)
+
+        # Con varios días y RESERVAS particionada por día, las particiones se consultan en paralelo
+        if agregar:
+            # Paso 1 (agregado): Recorrer el rango trayendo solo lo necesario y resumir por hora
+            try:
+                return respuesta(200, resumir_por_hora(clave_compuesta, restaurante, desde, hasta, zona), METODOS, event=event)
+            except Exception as e:
+                print(f"Query error: {str(e)}")
+                return respuesta(500, f"Error al obtener las reservas: {str(e)}", METODOS)
+
+        # Paso 1: Buscar las reservas del rango para el restaurante en la tabla RESERVAS
+        try:
+            proyeccion = {}
+            if campos:
+                proyeccion = {
+                    'ProjectionExpression': ', '.join(f'#c{i}' for i in range(len(campos))),
+                    'ExpressionAttributeNames': {f'#c{i}': campo for i, campo in enumerate(campos)}
+                }
+            items, next_token = reservas.consultar_pagina(clave_compuesta, desde, hasta, zona, limit, next_token, **proyeccion)
+        except ValueError:
+            return respuesta(400, "Error: next_token inválido", METODOS)
         except Exception as e:
             print(f"Query error: {str(e)}")
-            return {
-                'statusCode': 500,
-                'body': json.dumps(f"Error al obtener las reservas: {str(e)}"),
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                    'Access-Control-Allow-Methods': 'GET,OPTIONS'
-                }
-            }
+            return respuesta(500, f"Error al obtener las reservas: {str(e)}", METODOS)
 
         # Paso 2: Devolver las reservas al front
-        return {
-            'statusCode': 200,
-            'body': json.dumps(json_data),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'GET,OPTIONS'
-            }
-        }
+        return respuesta(200, {'items': items, 'next_token': next_token}, METODOS, event=event)
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
-        return {
-            'statusCode': 500,
-            'body': json.dumps(f"Error inesperado: {str(e)}"),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'GET,OPTIONS'
+        return respuesta(500, f"Error inesperado: {str(e)}", METODOS)
+
+
+def leer_rango(params, zona):
+    """Devuelve (desde, hasta) en hora local de ``zona``; por defecto el día de hoy.
+
+    Cada extremo puede ser una fecha (YYYY-MM-DD) o fecha y hora ISO (YYYY-MM-DDTHH:MM:SS);
+    ambos son inclusivos.
+    """
+    desde = params.get('from') or horarios.hoy(zona)
+    hasta = params.get('to') or desde
+    try:
+        inicio = datetime.fromisoformat(desde)
+        fin = datetime.fromisoformat(hasta)
+    except ValueError:
+        raise ValueError("'from' y 'to' deben ser fechas ISO (YYYY-MM-DD o YYYY-MM-DDTHH:MM:SS)")
+    if fin < inicio:
+        raise ValueError("'to' no puede ser anterior a 'from'")
+    if fin - inicio > timedelta(days=MAX_DIAS):
+        raise ValueError(f"El rango no puede superar {MAX_DIAS} días")
+    return desde, hasta
+
+
+def leer_campos(params):
+    """Atributos pedidos en 'campos' (separados por coma), o None para traer todos."""
+    if not params.get('campos'):
+        return None
+    campos = [campo.strip() for campo in params['campos'].split(',') if campo.strip()]
+    invalidos = [campo for campo in campos if campo not in CAMPOS_PERMITIDOS]
+    if invalidos:
+        raise ValueError(f"Campos inválidos: {', '.join(invalidos)}. Se admiten: {', '.join(sorted(CAMPOS_PERMITIDOS))}")
+    return campos
+
+
+def resumir_por_hora(clave_compuesta, restaurante, desde, hasta, zona):
+    """Comensales, reservas y mesas ocupadas por hora en el rango, con la ocupación sobre el inventario.
+
+    ``restaurante`` es el item de RESTAURANTES con ``Mesas`` y ``Duracion_reserva``.
+    Las reservas y los comensales cuentan en la hora en que empieza la reserva; la
+    mesa queda ocupada en todas las horas que toca su duración dentro del rango.
+    """
+    cantidad_mesas = len(restaurante.get('Mesas', []))
+    duracion_restaurante = disponibilidad.duracion(restaurante)
+
+    def hora(clave):
+        return horas.setdefault(clave, {'reservas': 0, 'comensales': 0, 'mesas': set()})
+
+    horas = {}
+    for reserva in reservas.consultar(clave_compuesta, desde, hasta, zona,
+                                      ProjectionExpression='Fecha_hora, ID_Mesa, Mesas_unidas, Comensales, Duracion'):
+        inicio = hora(reserva['Fecha_hora'][:13])
+        inicio['reservas'] += 1
+        inicio['comensales'] += int(reserva.get('Comensales', 0))
+        duracion = int(reserva.get('Duracion') or duracion_restaurante)
+        for franja in disponibilidad.franjas(reserva['Fecha_hora'], duracion, zona):
+            if franja[:13] <= hasta[:13] + horarios.FIN_DE_RANGO:
+                hora(franja[:13])['mesas'].update([reserva['ID_Mesa'], *reserva.get('Mesas_unidas', [])])
+
+    return {
+        'from': desde,
+        'to': hasta,
+        'mesas': cantidad_mesas,
+        'horas': [
+            {
+                'hora': f'{hora}:00',
+                'reservas': datos['reservas'],
+                'comensales': datos['comensales'],
+                'mesas_ocupadas': len(datos['mesas']),
+                'ocupacion': round(len(datos['mesas']) / cantidad_mesas, 3) if cantidad_mesas else None
             }
-        }
\ No newline at end of file
+            for hora, datos in sorted(horas.items())
+        ]
+    }
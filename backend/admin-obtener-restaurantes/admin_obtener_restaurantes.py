@@ -0,0 +1,32 @@
+from booktable import aws, metricas, propietarios
+from booktable.http import respuesta, leer_query, campos_vacios, error_campos_vacios
+from booktable.paginacion import consultar_pagina, parametros_pagina
+
+METODOS = 'GET,OPTIONS'
+
+restaurantes_table = aws.tabla('RESTAURANTES')
+
+
+@metricas.instrumentar
+def admin_obtener_restaurantes(event, context):
+    params = leer_query(event)
+
+    faltantes = campos_vacios(params, ['id_usuario'])
+    if faltantes:
+        return error_campos_vacios(faltantes, METODOS)
+
+    try:
+        limit, next_token = parametros_pagina(params)
+    except ValueError as e:
+        return respuesta(400, f"Error: {str(e)}", METODOS)
+
+    # Restaurantes del usuario, por el índice de dueños (solo claves)
+    try:
+        items, next_token = consultar_pagina(
+            restaurantes_table, limit, next_token,
+            **propietarios.query_por_propietario(params['id_usuario'])
+        )
+    except Exception as e:
+        return respuesta(500, f"Error consultando la tabla RESTAURANTES: {str(e)}", METODOS)
+
+    return respuesta(200, {'items': items, 'next_token': next_token}, METODOS)
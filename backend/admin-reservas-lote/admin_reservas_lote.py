@@ -0,0 +1,402 @@
+from datetime import datetime, timedelta
+
+from booktable import disponibilidad, horarios, idempotencia, lotes, metricas, notificaciones, propietarios, reservas
+from booktable.http import respuesta, leer_body, campos_vacios, error_campos_vacios, MENSAJE_JSON_INVALIDO
+
+METODOS = 'OPTIONS,POST'
+
+ACCIONES = ('cancelar', 'mover')
+
+# Reservas procesadas por solicitud: una noche de 300 cubiertos son unas 100-150
+MAX_RESERVAS = 1000
+
+# Rango máximo entre 'from' y 'to'
+MAX_DIAS = 31
+
+# Desplazamiento máximo al mover (minutos): una semana
+MAX_DESPLAZAMIENTO = 7 * 24 * 60
+
+# Intentos si otras reservas toman alguna de las mesas de destino mientras se mueven
+MAX_INTENTOS = 3
+
+MENSAJE_SIN_MIGRAR = "La reserva no tiene ID_Usuario, Indice_mesa o Duracion: correr reconstruir_disponibilidad.py o cancelarla con delete_reserva."
+MENSAJE_CLAVES_ANTERIORES = "Error: Hay reservas en el rango con la clave anterior a la migración: correr reconstruir_disponibilidad.py antes de procesarlas en bloque."
+
+
+class MesasTomadas(Exception):
+    """Otras reservas siguieron tomando las mesas de destino en todos los intentos."""
+
+
+def format_cancelacion_message(reserva, nombre_restaurant, localidad):
+    return f"""
+¡Hola {reserva.get('Nombre_usuario', '')}! Tu reserva fue cancelada por el restaurante.
+
+Detalles de la reserva:
+Restaurante: {nombre_restaurant}
+Localidad: {localidad}
+Fecha y hora: {reserva['Fecha_hora']}
+"""
+
+
+def format_reprogramacion_message(reserva, fecha_hora_nueva, nombre_restaurant, localidad):
+    return f"""
+¡Hola {reserva.get('Nombre_usuario', '')}! El restaurante cambió el horario de tu reserva.
+
+Detalles de la reserva:
+Restaurante: {nombre_restaurant}
+Localidad: {localidad}
+Fecha y hora anterior: {reserva['Fecha_hora']}
+Nueva fecha y hora: {fecha_hora_nueva}
+Mesa: {reserva['ID_Mesa']}
+"""
+
+
+@metricas.instrumentar
+@idempotencia.idempotente(METODOS)
+def admin_reservas_lote(event, context):
+    # Analizar el cuerpo de la solicitud
+    body = leer_body(event)
+    if body is None:
+        return respuesta(400, MENSAJE_JSON_INVALIDO, METODOS)
+
+    campos_requeridos = ['localidad', 'categoria', 'nombre_restaurant', 'id_usuario', 'accion', 'from']
+    faltantes = campos_vacios(body, campos_requeridos)
+    if faltantes:
+        return error_campos_vacios(faltantes, METODOS)
+
+    localidad = body['localidad']
+    categoria = body['categoria']
+    nombre_restaurant = body['nombre_restaurant']
+    id_usuario = body['id_usuario']
+    accion = body['accion']
+
+    if accion not in ACCIONES:
+        return respuesta(400, f"Error: 'accion' debe ser {' o '.join(ACCIONES)}.", METODOS)
+    desplazamiento = None
+    if accion == 'mover':
+        try:
+            desplazamiento = int(body.get('desplazamiento'))
+        except (TypeError, ValueError):
+            return respuesta(400, "Error: 'desplazamiento' debe ser un número entero de minutos.", METODOS)
+        if not desplazamiento or abs(desplazamiento) > MAX_DESPLAZAMIENTO:
+            return respuesta(400, f"Error: 'desplazamiento' debe ser distinto de cero y de a lo sumo {MAX_DESPLAZAMIENTO} minutos.", METODOS)
+
+    clave_compuesta = f'{localidad}#{categoria}#{nombre_restaurant}'
+
+    # Paso 0: Verificar que exista el restaurant y que sea de ese user (cacheado en el contenedor)
+    try:
+        if not propietarios.es_propietario(localidad, categoria, nombre_restaurant, id_usuario):
+            return respuesta(404, f"Error: El restaurante '{nombre_restaurant}' con categoria '{categoria}' no existe en la localidad '{localidad}' para este usuario.", METODOS)
+        zona = horarios.zona_restaurante(localidad, categoria, nombre_restaurant)
+    except Exception as e:
+        return respuesta(500, f"Error consultando la tabla RESTAURANTES: {str(e)}", METODOS)
+
+    try:
+        desde, hasta = leer_rango(body)
+    except ValueError as e:
+        return respuesta(400, f"Error: {str(e)}", METODOS)
+
+    # Paso 1: Reservas del rango (en hora local del restaurante), como mucho MAX_RESERVAS. Las que siguen con la
+    # clave anterior no aparecen en la consulta: en lugar de dejarlas afuera y responder 'completo' se corta acá
+    try:
+        if reservas.hay_claves_anteriores(clave_compuesta, desde, hasta, zona):
+            return respuesta(409, MENSAJE_CLAVES_ANTERIORES, METODOS)
+        items, siguiente = reservas.consultar_pagina(clave_compuesta, desde, hasta, zona, MAX_RESERVAS)
+    except Exception as e:
+        return respuesta(500, f"Error al obtener las reservas: {str(e)}", METODOS)
+    if siguiente and accion == 'mover':
+        # Las reservas movidas podrían volver a caer en el rango de la solicitud siguiente
+        return respuesta(400, f"Error: Hay más de {MAX_RESERVAS} reservas en el rango; moverlas en rangos más chicos.", METODOS)
+
+    fallidas = [fallida(item, MENSAJE_SIN_MIGRAR) for item in items if not completa(item)]
+    pendientes = [preparar(item, zona) for item in items if completa(item)]
+
+    # Paso 2: Cancelar o mover las reservas con BatchWriteItem en paralelo y actualizar DISPONIBILIDAD por franja
+    try:
+        if accion == 'cancelar':
+            procesadas, errores = cancelar(clave_compuesta, pendientes, nombre_restaurant, localidad)
+        else:
+            procesadas, errores = mover(clave_compuesta, pendientes, zona, desplazamiento, nombre_restaurant, localidad)
+    except MesasTomadas:
+        return respuesta(409, "Error: Otras reservas están tomando las mesas del nuevo horario. Intente nuevamente.", METODOS)
+    except Exception as e:
+        return respuesta(500, f"Error procesando las reservas: {str(e)}", METODOS)
+
+    # Paso 3: Informar el avance: si quedan reservas en el rango, se vuelve a llamar con el mismo cuerpo
+    return respuesta(200, {
+        'accion': accion,
+        'from': desde,
+        'to': hasta,
+        'reservas': len(items),
+        'procesadas': procesadas,
+        'fallidas': fallidas + errores,
+        'completo': siguiente is None
+    }, METODOS)
+
+
+def leer_rango(body):
+    """Devuelve (desde, hasta), fechas (YYYY-MM-DD) o fechas y horas ISO locales, ambos inclusivos."""
+    desde = body['from']
+    hasta = body.get('to') or desde
+    try:
+        inicio = datetime.fromisoformat(desde)
+        fin = datetime.fromisoformat(hasta)
+    except (TypeError, ValueError):
+        raise ValueError("'from' y 'to' deben ser fechas ISO (YYYY-MM-DD o YYYY-MM-DDTHH:MM:SS)")
+    if fin < inicio:
+        raise ValueError("'to' no puede ser anterior a 'from'")
+    if fin - inicio > timedelta(days=MAX_DIAS):
+        raise ValueError(f"El rango no puede superar {MAX_DIAS} días")
+    return desde, hasta
+
+
+def completa(item):
+    """Si la reserva tiene lo necesario para procesarla en bloque (las anteriores a esos atributos no)."""
+    return all(atributo in item for atributo in ('ID_Usuario', 'Indice_mesa', 'Duracion'))
+
+
+def fallida(item, error):
+    return {'fecha_hora': item['Fecha_hora'], 'id_mesa': item['ID_Mesa'], 'nombre_usuario': item.get('Nombre_usuario'), 'error': error}
+
+
+def preparar(item, zona):
+    """Datos de una reserva de RESERVAS para cancelarla o moverla."""
+    instante = reservas.instante(item)
+    return {
+        'item': item,
+        'instante': instante,
+        'indices': set(reservas.indices(item)),
+        'franjas': disponibilidad.franjas(item['Fecha_hora'], int(item['Duracion']), zona),
+        'clave': {reservas.PK: item[reservas.PK], reservas.SK: item[reservas.SK]},
+        'clave_usuario': {'ID_Usuario': item['ID_Usuario'], 'Fecha_hora': instante}
+    }
+
+
+def indices_por_franja(lista, campo='franjas'):
+    """{franja: índices} de las mesas que ocupan las reservas en sus franjas (``campo``)."""
+    resultado = {}
+    for reserva in lista:
+        for franja in reserva[campo]:
+            resultado.setdefault(franja, set()).update(reserva['indices'])
+    return resultado
+
+
+def escribir(escrituras):
+    """Escribe ``[(reserva, tabla, solicitud)]`` por lotes; devuelve los ``id`` de las reservas con alguna fallida."""
+    por_tabla = {}
+    for _, tabla, solicitud in escrituras:
+        por_tabla.setdefault(tabla, []).append(solicitud)
+    pendientes = lotes.batch_write(por_tabla)
+    return {id(reserva) for reserva, tabla, solicitud in escrituras if solicitud in pendientes.get(tabla, ())}
+
+
+def notificar(mensajes):
+    """Deja en el outbox las notificaciones ``[(email, tipo, asunto, mensaje)]``; el worker las publica en lotes."""
+    pendientes = lotes.batch_write({notificaciones.TABLA: [
+        {'PutRequest': {'Item': notificaciones.nueva(notificaciones.TOPICO_RESERVAS, asunto, mensaje,
+                                                     atributos={'tipo': tipo, 'email': email})}}
+        for email, tipo, asunto, mensaje in mensajes
+    ]}) if mensajes else {}
+    if pendientes:
+        print(f"{len(pendientes[notificaciones.TABLA])} notificaciones no se pudieron encolar")
+
+
+def cancelar(clave_compuesta, lista, nombre_restaurant, localidad):
+    """Cancela las reservas; devuelve (cantidad cancelada, fallidas)."""
+    # Primero se borran las reservas: si algo falla, la mesa queda ocupada de más y no reservada dos veces
+    fallaron = escribir([
+        escritura
+        for reserva in lista
+        for escritura in (
+            (reserva, reservas.TABLA, {'DeleteRequest': {'Key': reserva['clave']}}),
+            (reserva, 'USUARIOS', {'DeleteRequest': {'Key': reserva['clave_usuario']}})
+        )
+    ])
+    canceladas = [reserva for reserva in lista if id(reserva) not in fallaron]
+    errores = [fallida(reserva['item'], "No se pudo borrar la reserva; volver a intentar.") for reserva in lista if id(reserva) in fallaron]
+
+    disponibilidad.liberar_franjas(clave_compuesta, indices_por_franja(canceladas))
+    notificar([
+        (reserva['item']['Mail_usuario'], 'reserva_cancelada', f'Reserva cancelada - {nombre_restaurant}',
+         format_cancelacion_message(reserva['item'], nombre_restaurant, localidad))
+        for reserva in canceladas if reserva['item'].get('Mail_usuario')
+    ])
+    return len(canceladas), errores
+
+
+def mover(clave_compuesta, lista, zona, desplazamiento, nombre_restaurant, localidad):
+    """Mueve las reservas ``desplazamiento`` minutos (en hora local), con las mismas mesas; devuelve
+    (cantidad movida, fallidas)."""
+    _, categoria, _ = clave_compuesta.split('#', 2)
+    for reserva in lista:
+        item = reserva['item']
+        nueva = (datetime.fromisoformat(item['Fecha_hora']) + timedelta(minutes=desplazamiento)).isoformat()
+        instante = horarios.timestamp(nueva, zona)
+        reserva['fecha_hora_nueva'] = horarios.local(instante, zona)
+        reserva['instante_nuevo'] = instante
+        reserva['franjas_nuevas'] = disponibilidad.franjas(reserva['fecha_hora_nueva'], int(item['Duracion']), zona)
+        # Los mismos atributos que al crear la reserva, en su nuevo horario
+        unidas = [{'ID_Mesa': id_mesa, 'Indice': int(indice)}
+                  for id_mesa, indice in zip(item.get('Mesas_unidas', ()), item.get('Indices_unidos', ()))]
+        operaciones = reservas.crear(
+            localidad, categoria, nombre_restaurant, instante, {'ID_Mesa': item['ID_Mesa'], 'Indice': int(item['Indice_mesa'])},
+            item['ID_Usuario'], item.get('Nombre_usuario'), item.get('Mail_usuario'), item.get('Comensales'),
+            int(item['Duracion']), zona, unidas
+        )
+        reserva['items_nuevos'] = [operacion['Put']['Item'] for operacion in operaciones]
+        reserva['clave_nueva'] = {reservas.PK: reserva['items_nuevos'][0][reservas.PK], reservas.SK: reserva['items_nuevos'][0][reservas.SK]}
+        reserva['clave_usuario_nueva'] = {'ID_Usuario': item['ID_Usuario'], 'Fecha_hora': instante}
+
+    # Paso 2a: Ocupar las mesas en las franjas nuevas. Las que ya ocupaba el mismo grupo de reservas (un
+    # corrimiento dentro de la noche) no hace falta ocuparlas de nuevo
+    for _ in range(MAX_INTENTOS):
+        movidas, errores = planificar(clave_compuesta, lista)
+        agregadas = indices_por_franja(movidas, 'franjas_nuevas')
+        quitadas = indices_por_franja(movidas)
+        nuevas = {franja: indices - quitadas.get(franja, set()) for franja, indices in agregadas.items()}
+        nuevas = {franja: indices for franja, indices in nuevas.items() if indices}
+        tomadas = disponibilidad.ocupar_franjas(clave_compuesta, nuevas)
+        if not tomadas:
+            break
+        # Otra reserva tomó alguna mesa en el medio: se deshace lo ocupado y se vuelve a planificar
+        disponibilidad.liberar_franjas(clave_compuesta, {franja: indices for franja, indices in nuevas.items() if franja not in tomadas})
+    else:
+        raise MesasTomadas()
+
+    # Paso 2b: Escribir las reservas en su nueva clave y borrar la anterior
+    confirmadas, sin_mover, a_medias = reescribir(movidas)
+    errores += [fallida(reserva['item'], "No se pudo mover la reserva; volver a intentar.") for reserva in sin_mover]
+    errores += [fallida(reserva['item'], "La reserva quedó en los dos horarios; cancelar una con delete_reserva.") for reserva in a_medias]
+
+    # Paso 2c: Liberar las franjas que dejaron las reservas movidas, salvo las que siguen ocupadas por el movimiento
+    ocupadas = indices_por_franja(confirmadas + a_medias, 'franjas_nuevas')
+    for franja, indices in indices_por_franja(sin_mover + a_medias).items():
+        ocupadas.setdefault(franja, set()).update(indices)
+    liberadas = indices_por_franja(confirmadas)
+    for franja, indices in indices_por_franja(sin_mover, 'franjas_nuevas').items():
+        liberadas.setdefault(franja, set()).update(indices)
+    liberadas = {franja: indices - ocupadas.get(franja, set()) for franja, indices in liberadas.items()}
+    disponibilidad.liberar_franjas(clave_compuesta, {franja: indices for franja, indices in liberadas.items() if indices})
+
+    notificar([
+        (reserva['item']['Mail_usuario'], 'reserva_reprogramada', f'Reserva reprogramada - {nombre_restaurant}',
+         format_reprogramacion_message(reserva['item'], reserva['fecha_hora_nueva'], nombre_restaurant, localidad))
+        for reserva in confirmadas if reserva['item'].get('Mail_usuario')
+    ])
+    return len(confirmadas), errores
+
+
+def planificar(clave_compuesta, lista):
+    """Separa las reservas que se pueden mover de las que no; devuelve (movibles, fallidas).
+
+    Una reserva no se puede mover si alguna de sus mesas está ocupada en las
+    franjas nuevas por una reserva que se queda, o si el usuario ya tiene otra
+    reserva a la nueva hora. Las que se quedan siguen ocupando su horario, así
+    que se repite hasta que no aparecen nuevas.
+    """
+    franjas_todas = sorted({franja for reserva in lista for franja in reserva['franjas'] + reserva['franjas_nuevas']})
+    leidas = lotes.batch_get({
+        disponibilidad.TABLA: {'Keys': disponibilidad.claves(clave_compuesta, franjas_todas),
+                               'ProjectionExpression': 'Fecha_hora, Ocupadas', 'ConsistentRead': True},
+        'USUARIOS': {'Keys': [reserva['clave_usuario_nueva'] for reserva in lista],
+                     'ProjectionExpression': 'ID_Usuario, Fecha_hora', 'ConsistentRead': True}
+    }) if lista else {disponibilidad.TABLA: [], 'USUARIOS': []}
+
+    # Lo ocupado sin contar las reservas a mover
+    base = {item['Fecha_hora']: disponibilidad.ocupadas(item) for item in leidas[disponibilidad.TABLA]}
+    for franja, indices in indices_por_franja(lista).items():
+        base[franja] = base.get(franja, set()) - indices
+    claves_usuario = {(reserva['item']['ID_Usuario'], reserva['instante']) for reserva in lista}
+    usuarios_base = {(item['ID_Usuario'], int(item['Fecha_hora'])) for item in leidas['USUARIOS']} - claves_usuario
+
+    errores = {}
+    while True:
+        quedan = [reserva for reserva in lista if id(reserva) in errores]
+        ocupadas = {franja: set(indices) for franja, indices in base.items()}
+        for franja, indices in indices_por_franja(quedan).items():
+            ocupadas.setdefault(franja, set()).update(indices)
+        usuarios = usuarios_base | {(reserva['item']['ID_Usuario'], reserva['instante']) for reserva in quedan}
+
+        nuevos = False
+        for reserva in sorted(lista, key=lambda reserva: reserva['instante']):
+            if id(reserva) in errores:
+                continue
+            if (reserva['item']['ID_Usuario'], reserva['instante_nuevo']) in usuarios:
+                errores[id(reserva)] = "El usuario ya tiene otra reserva en el nuevo horario."
+            elif any(ocupadas.get(franja, set()) & reserva['indices'] for franja in reserva['franjas_nuevas']):
+                errores[id(reserva)] = "La mesa está ocupada en el nuevo horario."
+            else:
+                for franja in reserva['franjas_nuevas']:
+                    ocupadas.setdefault(franja, set()).update(reserva['indices'])
+                usuarios.add((reserva['item']['ID_Usuario'], reserva['instante_nuevo']))
+                continue
+            nuevos = True
+        if not nuevos:
+            break
+
+    movibles = [reserva for reserva in lista if id(reserva) not in errores]
+    return movibles, [fallida(reserva['item'], errores[id(reserva)]) for reserva in lista if id(reserva) in errores]
+
+
+def reescribir(movidas):
+    """Escribe cada reserva en su nueva clave de RESERVAS y USUARIOS y borra las anteriores.
+
+    Al correr una noche, la clave nueva de una reserva suele ser la anterior de
+    otra (la misma mesa una hora después): se escribe por olas, cada reserva
+    recién cuando su clave nueva quedó libre, y la clave anterior se borra solo
+    después de escribir la nueva. Devuelve (movidas, sin mover, a medias: con
+    la clave nueva escrita y la anterior sin borrar).
+    """
+    def claves_anteriores(reserva):
+        return [(reservas.TABLA, _clave(reserva['clave'])), ('USUARIOS', _clave(reserva['clave_usuario']))]
+
+    def claves_nuevas(reserva):
+        return [(reservas.TABLA, _clave(reserva['clave_nueva'])), ('USUARIOS', _clave(reserva['clave_usuario_nueva']))]
+
+    existentes = {clave for reserva in movidas for clave in claves_anteriores(reserva)}
+    confirmadas, a_medias, pendientes = [], [], list(movidas)
+    while pendientes:
+        ola = [reserva for reserva in pendientes if not any(clave in existentes for clave in claves_nuevas(reserva))]
+        if not ola:
+            break
+        pendientes = [reserva for reserva in pendientes if reserva not in ola]
+
+        fallaron = escribir([
+            escritura
+            for reserva in ola
+            for escritura in (
+                (reserva, reservas.TABLA, {'PutRequest': {'Item': reserva['items_nuevos'][0]}}),
+                (reserva, 'USUARIOS', {'PutRequest': {'Item': reserva['items_nuevos'][1]}})
+            )
+        ])
+        escritas = [reserva for reserva in ola if id(reserva) not in fallaron]
+        # Si falló alguna de las dos escrituras, la reserva se queda donde estaba (y lo escrito se deshace)
+        deshacer = [reserva for reserva in ola if id(reserva) in fallaron]
+        escribir([
+            escritura
+            for reserva in deshacer
+            for escritura in (
+                (reserva, reservas.TABLA, {'DeleteRequest': {'Key': reserva['clave_nueva']}}),
+                (reserva, 'USUARIOS', {'DeleteRequest': {'Key': reserva['clave_usuario_nueva']}})
+            )
+        ])
+        fallaron = escribir([
+            escritura
+            for reserva in escritas
+            for escritura in (
+                (reserva, reservas.TABLA, {'DeleteRequest': {'Key': reserva['clave']}}),
+                (reserva, 'USUARIOS', {'DeleteRequest': {'Key': reserva['clave_usuario']}})
+            )
+        ])
+        for reserva in escritas:
+            if id(reserva) in fallaron:
+                a_medias.append(reserva)
+            else:
+                confirmadas.append(reserva)
+                existentes.difference_update(claves_anteriores(reserva))
+    sin_mover = [reserva for reserva in movidas if reserva not in confirmadas and reserva not in a_medias]
+    return confirmadas, sin_mover, a_medias
+
+
+def _clave(clave):
+    return tuple(sorted((nombre, str(valor)) for nombre, valor in clave.items()))
@@ -0,0 +1,47 @@
+from boto3.dynamodb.types import TypeDeserializer
+
+from booktable import archivo, metricas
+
+deserializer = TypeDeserializer()
+
+
+@metricas.instrumentar
+def archivador_reservas(event, context):
+    """Archiva las reservas que el TTL borra de RESERVAS (stream con OLD_IMAGE).
+
+    Solo se archivan los borrados del TTL (los hace el servicio de DynamoDB);
+    las cancelaciones de los usuarios no. Si no se puede escribir el archivo
+    de una fecha, sus registros se devuelven en ``batchItemFailures`` para que
+    Lambda los reintente.
+    """
+    registros = [record for record in event.get('Records', []) if es_vencimiento(record)]
+    if not registros:
+        return {'batchItemFailures': []}
+
+    # El nombre sale de las secuencias del lote: un reintento del mismo lote pisa sus archivos
+    secuencias = [record['dynamodb']['SequenceNumber'] for record in registros]
+    nombre = f'{secuencias[0]}-{secuencias[-1]}'
+
+    por_fecha = {}
+    for record in registros:
+        imagen = record['dynamodb']['OldImage']
+        reserva = {atributo: deserializer.deserialize(valor) for atributo, valor in imagen.items()}
+        por_fecha.setdefault(reserva['Fecha_hora'][:10], []).append((record['dynamodb']['SequenceNumber'], reserva))
+
+    destino = archivo.almacen()
+    fallidos = []
+    for fecha, registros_fecha in por_fecha.items():
+        try:
+            archivo.archivar([reserva for _, reserva in registros_fecha], nombre, destino)
+        except Exception as e:
+            print(f"Error archivando las reservas del {fecha}: {str(e)}")
+            fallidos.extend(secuencia for secuencia, _ in registros_fecha)
+
+    return {'batchItemFailures': [{'itemIdentifier': secuencia} for secuencia in fallidos]}
+
+
+def es_vencimiento(record):
+    """True si el registro es un borrado hecho por el TTL."""
+    identidad = record.get('userIdentity') or {}
+    return (record.get('eventName') == 'REMOVE' and identidad.get('type') == 'Service'
+            and identidad.get('principalId') == 'dynamodb.amazonaws.com')
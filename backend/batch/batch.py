@@ -0,0 +1,93 @@
+import importlib
+import json
+
+from booktable import concurrencia, metricas
+from booktable.http import respuesta, leer_body, codificar, MENSAJE_JSON_INVALIDO
+
+METODOS = 'OPTIONS,POST'
+
+# (método, ruta) -> handler (módulo y función), como en API Gateway. El módulo de cada handler se
+# empaqueta junto a este (ver infra/datasources.tf) y se importa recién la primera vez que se usa
+RUTAS = {
+    ('POST', '/reservas'): 'crear_reserva',
+    ('GET', '/reservas'): 'obtener_reservas',
+    ('DELETE', '/reservas'): 'delete_reserva',
+    ('POST', '/reservas/lote'): 'crear_reservas_lote',
+    ('GET', '/restaurantes'): 'buscar_restaurant',
+    ('GET', '/disponibilidad'): 'buscar_disponibilidad',
+    ('POST', '/admin/restaurant'): 'admin_crear_restaurant',
+    ('POST', '/admin/mesas'): 'admin_crear_mesa',
+    ('GET', '/admin/reservas'): 'admin_obtener_reservas',
+    ('GET', '/admin/restaurantes'): 'admin_obtener_restaurantes',
+    ('GET', '/admin/dashboard'): 'admin_obtener_dashboard',
+}
+
+MAX_OPERACIONES = 20
+
+# Headers del pedido que se pasan a cada operación y de su respuesta que se devuelven
+HEADERS_PEDIDO = ('If-None-Match', 'Idempotency-Key')
+HEADERS_RESPUESTA = ('ETag', 'Cache-Control', 'Retry-After', 'Idempotent-Replayed')
+
+_handlers = {}
+
+
+@metricas.instrumentar
+def batch(event, context):
+    # Analizar el cuerpo de la solicitud
+    body = leer_body(event)
+    if body is None:
+        return respuesta(400, MENSAJE_JSON_INVALIDO, METODOS)
+
+    operaciones = body.get('operaciones')
+    if not isinstance(operaciones, list) or not 1 <= len(operaciones) <= MAX_OPERACIONES:
+        return respuesta(400, f"Error: 'operaciones' debe ser una lista de 1 a {MAX_OPERACIONES} operaciones.", METODOS)
+
+    # Paso 1: Ejecutar las operaciones en paralelo, cada una con su handler como si llegara por API Gateway
+    resultados = concurrencia.mapear_pedidos(ejecutar, operaciones)
+
+    # Paso 2: Devolver los resultados en el orden de las operaciones, cada uno con su status
+    return respuesta(200, {'resultados': resultados}, METODOS, event=event)
+
+
+def ejecutar(operacion):
+    """Resultado ``{'status', 'headers', 'body'}`` de una operación ``{'metodo', 'ruta', 'query', 'body', 'headers'}``."""
+    if not isinstance(operacion, dict):
+        return _resultado(400, "Error: Cada operación debe ser un objeto con 'metodo' y 'ruta'.")
+    metodo = str(operacion.get('metodo') or '').upper()
+    ruta = '/' + str(operacion.get('ruta') or '').strip('/')
+    if (metodo, ruta) not in RUTAS:
+        return _resultado(404, f"Error: No existe la operación {metodo} {ruta}.")
+    query = operacion.get('query') or {}
+    headers = operacion.get('headers') or {}
+    if not isinstance(query, dict) or not isinstance(headers, dict):
+        return _resultado(400, "Error: 'query' y 'headers' deben ser objetos.")
+
+    evento = {
+        'httpMethod': metodo,
+        'path': ruta,
+        'queryStringParameters': {nombre: str(valor) for nombre, valor in query.items()} or None,
+        'headers': {nombre: str(valor) for nombre, valor in headers.items() if nombre.title() in HEADERS_PEDIDO},
+        'body': codificar(operacion['body']) if 'body' in operacion else None,
+    }
+    try:
+        resultado = _handler(RUTAS[(metodo, ruta)])(evento, None)
+    except Exception as e:
+        print(f"Error en la operación {metodo} {ruta}: {str(e)}")
+        return _resultado(500, f"Error inesperado: {str(e)}")
+
+    cabeceras = resultado.get('headers') or {}
+    return _resultado(
+        resultado['statusCode'],
+        json.loads(resultado['body']) if resultado.get('body') else None,
+        {nombre: cabeceras[nombre] for nombre in HEADERS_RESPUESTA if nombre in cabeceras}
+    )
+
+
+def _handler(nombre):
+    if nombre not in _handlers:
+        _handlers[nombre] = getattr(importlib.import_module(nombre), nombre)
+    return _handlers[nombre]
+
+
+def _resultado(status, body, headers=None):
+    return {'status': status, 'headers': headers or {}, 'body': body}
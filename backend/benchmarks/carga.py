@@ -0,0 +1,442 @@
+"""Prueba de carga offline de los handlers HTTP.
+
+Levanta un servidor de moto local con las tablas de ``infra/db.tf``, siembra
+N restaurantes con M mesas cada uno y K reservas (a través de los propios
+handlers, así DISPONIBILIDAD, USUARIOS y RESERVAS quedan consistentes) y
+después dispara tráfico sintético concurrente contra todos los handlers
+expuestos por API Gateway, con una mezcla de pedidos configurable en
+``MEZCLA``. Las reservas se concentran en unos pocos restaurantes y horarios
+para que haya competencia por las mismas mesas.
+
+Por handler reporta la cantidad de pedidos, la latencia p50/p95/p99, las
+llamadas a DynamoDB y SNS por pedido (incluidas las que se hacen desde el
+pool de ``booktable.concurrencia``) y los códigos de respuesta. Al final
+revisa las tablas: mesas reservadas dos veces en la misma franja (reservas
+superpuestas), diferencias entre DISPONIBILIDAD y RESERVAS y reservas que se
+pierden o se repiten al recorrer las de cada restaurante en páginas chicas.
+
+Los handlers corren en este proceso, en hilos, así que comparten los caches
+de contenedor como si todos los pedidos llegaran a una misma Lambda caliente,
+y las latencias incluyen el viaje HTTP al servidor de moto: sirven para
+comparar versiones entre sí, no como latencia absoluta en AWS. Con
+``--salida`` se guarda el reporte en JSON para comparar corridas.
+Las variables ``BOOKTABLE_PARTICION_RESERVAS`` y ``BOOKTABLE_SHARDS_RESERVAS``
+eligen el esquema de claves de RESERVAS, como en las Lambdas.
+
+Uso:
+    python backend/benchmarks/carga.py [--restaurantes 20] [--mesas 10] [--reservas 300]
+                                       [--pedidos 2000] [--concurrencia 16] [--semilla 1] [--salida r.json]
+"""
+import argparse
+import contextvars
+import importlib
+import json
+import logging
+import os
+import random
+import socket
+import statistics
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from esquema import ENV_AWS_FALSO, configurar_path, crear_tablas
+
+LOCALIDADES = ['Palermo', 'Belgrano', 'Recoleta']
+CATEGORIAS = ['Parrilla', 'Pastas', 'Sushi']
+CAPACIDADES = [2, 2, 4, 4, 4, 6, 8]
+COMENSALES = [2, 2, 2, 3, 4, 4, 6]
+
+FECHA_BASE = 1893456000  # 2030-01-01 00:00 UTC, siempre en el futuro
+# 20 y 21 hs (GMT-3) de tres días seguidos
+HORARIOS = [FECHA_BASE + dia * 86400 + hora * 3600 for dia in range(3) for hora in (23, 24)]
+DESDE, HASTA = '2030-01-01', '2030-01-03'
+
+# handler -> peso en la mezcla de tráfico
+MEZCLA = {
+    'crear_reserva': 30,
+    'buscar_disponibilidad': 15,
+    'buscar_restaurant': 15,
+    'obtener_reservas': 10,
+    'delete_reserva': 10,
+    'admin_obtener_reservas': 7,
+    'admin_obtener_dashboard': 4,
+    'admin_obtener_restaurantes': 3,
+    'crear_reservas_lote': 3,
+    'admin_crear_mesa': 2,
+    'admin_crear_restaurant': 1,
+    'batch': 3,
+}
+
+# Reservas por página al revisar la paginación: menos que las de un restaurante, para recorrer varias
+LIMIT_REVISION = 4
+
+# Llamadas a AWS del pedido en curso (la lista la comparten los hilos del pool)
+_llamadas = contextvars.ContextVar('llamadas', default=None)
+
+
+def _registrar_llamada(model, **kwargs):
+    llamadas = _llamadas.get()
+    if llamadas is not None:
+        llamadas.append(model.service_model.service_name)
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))]
+
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _iniciar_moto(puerto):
+    """Servidor de moto que procesa de a un pedido por vez.
+
+    El backend de moto no es seguro entre hilos (con pedidos concurrentes falla o
+    deja transacciones a medias), así que los pedidos se atienden en paralelo
+    pero se procesan en serie. La competencia entre reservas se sigue dando
+    entre la lectura de disponibilidad y la escritura de cada handler.
+    """
+    from moto.server import DomainDispatcherApplication, create_backend_app
+    from werkzeug.serving import make_server
+
+    app = DomainDispatcherApplication(create_backend_app)
+    lock = threading.Lock()
+
+    def en_serie(environ, start_response):
+        with lock:
+            return list(app(environ, start_response))
+
+    servidor = make_server('127.0.0.1', puerto, en_serie, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+class Escenario:
+    """Restaurantes sembrados y reservas vigentes, compartidos por los hilos de carga."""
+
+    def __init__(self, restaurantes, mesas, semilla):
+        self.restaurantes = []
+        self.mesas = mesas
+        self.reservas = []
+        self._lock = threading.Lock()
+        self._semilla = semilla
+        self._locales = threading.local()
+        propietarios = max(1, restaurantes // 3)
+        for i in range(restaurantes):
+            self.restaurantes.append({
+                'localidad': LOCALIDADES[i % len(LOCALIDADES)],
+                'categoria': CATEGORIAS[i // len(LOCALIDADES) % len(CATEGORIAS)],
+                'nombre_restaurant': f'Resto {i:03d}',
+                'id_usuario': f'owner-{i % propietarios}@carga.test',
+            })
+        # Unos pocos restaurantes concentran la demanda (Zipf)
+        self._pesos = [1 / (i + 1) for i in range(restaurantes)]
+
+    @property
+    def rng(self):
+        if not hasattr(self._locales, 'rng'):
+            self._locales.rng = random.Random(f'{self._semilla}-{threading.get_ident()}')
+        return self._locales.rng
+
+    def restaurante(self, popular=False):
+        if popular:
+            return self.rng.choices(self.restaurantes, self._pesos)[0]
+        return self.rng.choice(self.restaurantes)
+
+    def agregar_reserva(self, user_id, timestamp):
+        with self._lock:
+            self.reservas.append((user_id, timestamp))
+
+    def tomar_reserva(self):
+        with self._lock:
+            if not self.reservas:
+                return None
+            return self.reservas.pop(self.rng.randrange(len(self.reservas)))
+
+    def ver_reserva(self):
+        with self._lock:
+            return self.rng.choice(self.reservas) if self.reservas else None
+
+
+def _sin_propietario(restaurante):
+    return {campo: restaurante[campo] for campo in ('localidad', 'categoria', 'nombre_restaurant')}
+
+
+def _pedido_reserva(escenario):
+    rng = escenario.rng
+    user_id = f'cliente-{uuid.uuid4().hex[:12]}@carga.test'
+    timestamp = rng.choice(HORARIOS)
+    body = dict(_sin_propietario(escenario.restaurante(popular=True)), datetime=str(timestamp),
+                comensales=str(rng.choice(COMENSALES)), user_id=user_id, user_name='carga', email=user_id)
+    return {'body': json.dumps(body)}, (user_id, timestamp)
+
+
+def _pedido(handler, escenario):
+    """(handler, evento de API Gateway, datos para registrar el resultado) de un pedido a ``handler``."""
+    rng = escenario.rng
+    if handler == 'crear_reserva':
+        return (handler,) + _pedido_reserva(escenario)
+    if handler == 'crear_reservas_lote':
+        timestamp = rng.choice(HORARIOS)
+        grupos = []
+        for _ in range(rng.randint(3, 6)):
+            user_id = f'lote-{uuid.uuid4().hex[:12]}@carga.test'
+            grupos.append({'user_id': user_id, 'user_name': 'carga', 'email': user_id, 'comensales': rng.choice(COMENSALES)})
+        body = dict(_sin_propietario(escenario.restaurante(popular=True)), datetime=str(timestamp), grupos=grupos)
+        return handler, {'body': json.dumps(body)}, timestamp
+    if handler == 'delete_reserva':
+        reserva = escenario.tomar_reserva()
+        if reserva is None:
+            # Sin reservas para borrar, el pedido pasa a ser una reserva nueva
+            return _pedido('crear_reserva', escenario)
+        return handler, {'body': json.dumps({'user_id': reserva[0], 'datetime': str(reserva[1])})}, reserva
+    if handler == 'obtener_reservas':
+        reserva = escenario.ver_reserva()
+        return handler, {'queryStringParameters': {'user_id': reserva[0] if reserva else 'nadie@carga.test'}}, None
+    if handler == 'admin_obtener_reservas':
+        restaurante = escenario.restaurante(popular=True)
+        params = dict(restaurante, **{'from': DESDE, 'to': HASTA})
+        if rng.random() < 0.5:
+            params['agregar'] = 'hora'
+        return handler, {'queryStringParameters': params}, None
+    if handler in ('admin_obtener_restaurantes', 'admin_obtener_dashboard'):
+        return handler, {'queryStringParameters': {'id_usuario': escenario.restaurante()['id_usuario']}}, None
+    if handler == 'admin_crear_mesa':
+        return handler, {'body': json.dumps(dict(escenario.restaurante(), capacidad=str(rng.choice(CAPACIDADES))))}, None
+    if handler == 'admin_crear_restaurant':
+        restaurante = dict(escenario.restaurante(), nombre_restaurant=f'Nuevo {uuid.uuid4().hex[:8]}')
+        return handler, {'body': json.dumps(restaurante)}, None
+    if handler == 'buscar_restaurant':
+        params = {'localidad': rng.choice(LOCALIDADES)}
+        if rng.random() < 0.5:
+            params['categoria'] = rng.choice(CATEGORIAS)
+        return handler, {'queryStringParameters': params}, None
+    if handler == 'buscar_disponibilidad':
+        params = {'localidad': rng.choice(LOCALIDADES), 'datetime': str(rng.choice(HORARIOS)),
+                  'comensales': str(rng.choice(COMENSALES))}
+        return handler, {'queryStringParameters': params}, None
+    if handler == 'batch':
+        # Una pantalla en un solo pedido: el panel del owner o la de un cliente
+        if rng.random() < 0.5:
+            query = {'id_usuario': escenario.restaurante()['id_usuario']}
+            operaciones = [{'metodo': 'GET', 'ruta': '/admin/restaurantes', 'query': query},
+                           {'metodo': 'GET', 'ruta': '/admin/dashboard', 'query': query}]
+        else:
+            reserva = escenario.ver_reserva()
+            operaciones = [
+                {'metodo': 'GET', 'ruta': '/reservas', 'query': {'user_id': reserva[0] if reserva else 'nadie@carga.test'}},
+                {'metodo': 'GET', 'ruta': '/disponibilidad', 'query': {'localidad': rng.choice(LOCALIDADES),
+                                                                        'datetime': str(rng.choice(HORARIOS)),
+                                                                        'comensales': str(rng.choice(COMENSALES))}},
+            ]
+        return handler, {'body': json.dumps({'operaciones': operaciones})}, None
+    raise ValueError(handler)
+
+
+def _registrar(handler, resultado, meta, escenario):
+    """Mantiene al día las reservas vigentes del escenario según la respuesta."""
+    status = resultado.get('statusCode')
+    if handler == 'crear_reserva' and status == 200:
+        escenario.agregar_reserva(*meta)
+    elif handler == 'crear_reservas_lote' and status == 200:
+        for grupo in json.loads(resultado['body'])['reservados']:
+            escenario.agregar_reserva(grupo['user_id'], meta)
+    elif handler == 'delete_reserva' and status not in (200, 404):
+        # No se borró: sigue vigente para otro intento
+        escenario.agregar_reserva(*meta)
+
+
+def _sembrar(handlers, escenario, reservas):
+    from booktable import admision
+
+    for restaurante in escenario.restaurantes:
+        handlers['admin_crear_restaurant']({'body': json.dumps(restaurante)}, None)
+        mesas = [{'capacidad': escenario.rng.choice(CAPACIDADES), 'cantidad': 1} for _ in range(escenario.mesas)]
+        handlers['admin_crear_mesa']({'body': json.dumps(dict(restaurante, mesas=mesas))}, None)
+    creadas = 0
+    # El sembrado va en serie y sin control de admisión: la carga concurrente es la que lo pone a prueba
+    tasa, admision.TASA = admision.TASA, 0
+    try:
+        for _ in range(reservas):
+            evento, meta = _pedido_reserva(escenario)
+            if handlers['crear_reserva'](evento, None)['statusCode'] == 200:
+                escenario.agregar_reserva(*meta)
+                creadas += 1
+    finally:
+        admision.TASA = tasa
+    return creadas
+
+
+def _ejecutar(handlers, handler, escenario):
+    handler, evento, meta = _pedido(handler, escenario)
+    llamadas = []
+    _llamadas.set(llamadas)
+    inicio = time.perf_counter()
+    try:
+        resultado = handlers[handler](evento, None)
+    finally:
+        _llamadas.set(None)
+    duracion = (time.perf_counter() - inicio) * 1000
+    _registrar(handler, resultado, meta, escenario)
+    return handler, duracion, resultado.get('statusCode'), Counter(llamadas)
+
+
+def _revisar_tablas(dynamodb):
+    """Mesas reservadas dos veces en una franja y diferencias entre DISPONIBILIDAD y RESERVAS."""
+    from booktable import disponibilidad, horarios, reservas as esquema_reservas
+
+    def escanear(tabla):
+        items, kwargs = [], {}
+        while True:
+            response = dynamodb.Table(tabla).scan(**kwargs)
+            items += response['Items']
+            if 'LastEvaluatedKey' not in response:
+                return items
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    reservas = escanear('RESERVAS')
+    por_mesa = Counter()
+    reservadas = defaultdict(set)
+    for reserva in reservas:
+        for franja in disponibilidad.franjas(reserva['Fecha_hora'], int(reserva['Duracion']), horarios.ZONA_POR_DEFECTO):
+            clave = (esquema_reservas.restaurante(reserva), franja)
+            por_mesa[clave + (reserva['ID_Mesa'],)] += 1
+            reservadas[clave].add(int(reserva['Indice_mesa']))
+
+    ocupadas = {
+        (item['Localidad#Categoria#Nombre_restaurant'], item['Fecha_hora']): {int(i) for i in item.get('Ocupadas', ())}
+        for item in escanear('DISPONIBILIDAD')
+    }
+    horarios = set(reservadas) | set(ocupadas)
+    return {
+        'reservas': len(reservas),
+        'mesas_reservadas_dos_veces': sum(cantidad - 1 for cantidad in por_mesa.values() if cantidad > 1),
+        'reservas_sin_ocupar': sum(len(reservadas[h] - ocupadas.get(h, set())) for h in horarios),
+        'ocupadas_sin_reserva': sum(len(ocupadas.get(h, set()) - reservadas[h]) for h in horarios),
+        'usuarios': len(escanear('USUARIOS')),
+    }
+
+
+def _revisar_paginas(escenario):
+    """Reservas que faltan o sobran al recorrer las de cada restaurante de a ``LIMIT_REVISION``."""
+    from booktable import horarios, reservas
+
+    diferencias = 0
+    for restaurante in escenario.restaurantes:
+        clave_compuesta = f"{restaurante['localidad']}#{restaurante['categoria']}#{restaurante['nombre_restaurant']}"
+        zona = horarios.ZONA_POR_DEFECTO
+        todas = [item[reservas.SK] for item in reservas.consultar(clave_compuesta, DESDE, HASTA, zona)]
+        paginadas, token = [], None
+        while True:
+            items, token = reservas.consultar_pagina(clave_compuesta, DESDE, HASTA, zona, LIMIT_REVISION, token)
+            paginadas += [item[reservas.SK] for item in items]
+            if not token:
+                break
+        diferencias += sum((Counter(todas) - Counter(paginadas)).values()) + sum((Counter(paginadas) - Counter(todas)).values())
+    return diferencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--restaurantes', type=int, default=20)
+    parser.add_argument('--mesas', type=int, default=10, help='mesas por restaurante')
+    parser.add_argument('--reservas', type=int, default=300, help='reservas sembradas antes de la carga')
+    parser.add_argument('--pedidos', type=int, default=2000)
+    parser.add_argument('--concurrencia', type=int, default=16, help='pedidos en vuelo a la vez')
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--salida', help='archivo donde guardar el reporte en JSON')
+    args = parser.parse_args()
+
+    os.environ.update(ENV_AWS_FALSO)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    puerto = _puerto_libre()
+    servidor = _iniciar_moto(puerto)
+    os.environ['AWS_ENDPOINT_URL'] = f'http://127.0.0.1:{puerto}'
+    try:
+        import boto3
+
+        dynamodb = boto3.resource('dynamodb')
+        crear_tablas(dynamodb.meta.client)
+        sns = boto3.client('sns')
+        for topico in ('restaurant-creation-notifications', 'reservation-notifications'):
+            sns.create_topic(Name=topico)
+
+        configurar_path()
+        from booktable import aws
+
+        # observar también alcanza a los resources que aws.tabla crea en cada hilo
+        for servicio in ('dynamodb', 'sns'):
+            aws.observar(f'before-call.{servicio}', _registrar_llamada)
+        handlers = {nombre: getattr(importlib.import_module(nombre), nombre) for nombre in MEZCLA}
+
+        escenario = Escenario(args.restaurantes, args.mesas, args.semilla)
+        inicio = time.perf_counter()
+        sembradas = _sembrar(handlers, escenario, args.reservas)
+        print(f"Sembrado: {args.restaurantes} restaurantes x {args.mesas} mesas, {sembradas}/{args.reservas} reservas "
+              f"({time.perf_counter() - inicio:.1f} s)")
+
+        rng = random.Random(args.semilla)
+        secuencia = rng.choices(list(MEZCLA), list(MEZCLA.values()), k=args.pedidos)
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrencia) as pool:
+            muestras = list(pool.map(lambda handler: _ejecutar(handlers, handler, escenario), secuencia))
+        total = time.perf_counter() - inicio
+
+        revision = _revisar_tablas(dynamodb)
+        revision['reservas_mal_paginadas'] = _revisar_paginas(escenario)
+    finally:
+        servidor.shutdown()
+
+    por_handler = defaultdict(list)
+    for nombre, duracion, status, llamadas in muestras:
+        por_handler[nombre].append((duracion, status, llamadas))
+
+    reporte = {'pedidos': len(muestras), 'segundos': total, 'pedidos_por_segundo': len(muestras) / total,
+               'handlers': {}, 'tablas': revision}
+    print(f"{len(muestras)} pedidos con concurrencia {args.concurrencia} en {total:.1f} s "
+          f"({reporte['pedidos_por_segundo']:.0f} pedidos/s)")
+    print(f"{'handler':<28} {'n':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'ddb/ped':>8} {'sns/ped':>8}  status")
+    for nombre in MEZCLA:
+        if nombre not in por_handler:
+            continue
+        filas = por_handler[nombre]
+        duraciones = [duracion for duracion, _, _ in filas]
+        fila = {
+            'n': len(filas),
+            'p50': _percentil(duraciones, 50),
+            'p95': _percentil(duraciones, 95),
+            'p99': _percentil(duraciones, 99),
+            'dynamodb_por_pedido': statistics.mean(llamadas['dynamodb'] for _, _, llamadas in filas),
+            'sns_por_pedido': statistics.mean(llamadas['sns'] for _, _, llamadas in filas),
+            'status': dict(sorted(Counter(status for _, status, _ in filas).items())),
+        }
+        reporte['handlers'][nombre] = fila
+        status = ' '.join(f'{codigo}:{cantidad}' for codigo, cantidad in fila['status'].items())
+        print(f"{nombre:<28} {fila['n']:>5} {fila['p50']:>8.1f} {fila['p95']:>8.1f} {fila['p99']:>8.1f} "
+              f"{fila['dynamodb_por_pedido']:>8.2f} {fila['sns_por_pedido']:>8.2f}  {status}")
+
+    conflictos = reporte['handlers'].get('crear_reserva', {}).get('status', {}).get(409, 0)
+    print(f"Reservas rechazadas por conflicto (409): {conflictos}")
+    admision = reporte['handlers'].get('crear_reserva', {}).get('status', {}).get(429, 0)
+    print(f"Reservas rechazadas por el control de admisión (429): {admision}")
+    print(f"Mesas reservadas dos veces en la misma franja: {revision['mesas_reservadas_dos_veces']}")
+    print(f"Reservas sin la mesa ocupada en DISPONIBILIDAD: {revision['reservas_sin_ocupar']}, "
+          f"mesas ocupadas sin reserva: {revision['ocupadas_sin_reserva']}")
+    print(f"Reservas perdidas o repetidas al paginar de a {LIMIT_REVISION}: {revision['reservas_mal_paginadas']}")
+
+    if args.salida:
+        with open(args.salida, 'w') as archivo:
+            json.dump(reporte, archivo, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark de la codificación de respuestas.
+
+Compara, sobre listados de reservas como los que devuelven obtener_reservas y
+admin_obtener_reservas, el formato anterior (``TypeSerializer`` de DynamoDB,
+con cada valor envuelto en ``{"S": ...}``/``{"N": ...}``) contra el JSON
+compacto de ``booktable.http.codificar``, y el costo y ahorro del gzip que
+aplica ``respuesta`` cuando el cliente lo acepta.
+
+Para cada tamaño de resultado se reportan los bytes del body y la mediana del
+tiempo de codificación (y de compresión) en milisegundos.
+
+Uso:
+    python backend/benchmarks/codificacion.py [--repeticiones 50] [--semilla 1]
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from esquema import LAYER_DIR
+
+sys.path.insert(0, LAYER_DIR)
+
+from boto3.dynamodb.types import TypeSerializer
+
+from booktable import horarios, http
+
+# Una página de un usuario, el día de un restaurante y la semana de un restaurante
+TAMANIOS = (10, 200, 2000)
+
+NOMBRES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Elena', 'Facundo', 'Gimena', 'Hernán', 'Inés', 'Julián']
+
+
+def _reservas(rng, cantidad):
+    """Items de RESERVAS tal como los devuelve boto3 (números como Decimal)."""
+    mesas = [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(30)]
+    items = []
+    for i in range(cantidad):
+        dia, hora = divmod(i, 40)
+        indice = rng.randrange(len(mesas))
+        nombre = rng.choice(NOMBRES)
+        fecha_hora = f'2030-01-{1 + dia % 28:02d}T{19 + hora % 5}:00:00'
+        items.append({
+            'Localidad#Categoria#Nombre_restaurant': 'Palermo#Parrilla#Don Julio',
+            'Fecha_hora#ID_Mesa': horarios.sort_key(horarios.timestamp(fecha_hora, horarios.ZONA_POR_DEFECTO), indice),
+            'Fecha_hora': fecha_hora,
+            'ID_Mesa': mesas[indice],
+            'Indice_mesa': Decimal(indice),
+            'Nombre_usuario': nombre,
+            'Mail_usuario': f'{nombre.lower()}{i}@mail.test',
+            'Comensales': Decimal(rng.choice([2, 2, 3, 4, 4, 6])),
+        })
+    return items
+
+
+def _anterior(items):
+    return json.dumps({'items': TypeSerializer().serialize(items), 'next_token': None}, default=http._json_default)
+
+
+def _actual(items):
+    return http.codificar({'items': items, 'next_token': None})
+
+
+def _mediana_ms(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticiones', type=int, default=50)
+    parser.add_argument('--semilla', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.semilla)
+    print(f"{'reservas':>8} {'formato':<10} {'bytes':>10} {'encode ms':>10} {'gzip bytes':>11} {'gzip ms':>8}")
+    for cantidad in TAMANIOS:
+        items = _reservas(rng, cantidad)
+        for formato, codificar in (('dynamodb', _anterior), ('compacto', _actual)):
+            ms, cuerpo = _mediana_ms(lambda: codificar(items), args.repeticiones)
+            datos = cuerpo.encode('utf-8')
+            ms_gzip, comprimido = _mediana_ms(
+                lambda: gzip.compress(datos, compresslevel=http.NIVEL_GZIP, mtime=0), args.repeticiones
+            )
+            print(f"{cantidad:>8} {formato:<10} {len(datos):>10} {ms:>10.2f} {len(comprimido):>11} {ms_gzip:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
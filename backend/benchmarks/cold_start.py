@@ -0,0 +1,253 @@
+"""Benchmark de cold start de los handlers.
+
+Para cada handler lanza varios intérpretes nuevos (uno por corrida, como un
+contenedor de Lambda recién creado) y mide:
+
+* import: tiempo de importar el módulo del handler (incluye boto3 y el layer).
+* primera: latencia de la primera invocación dentro de ese intérprete.
+* segunda: latencia de una segunda invocación (contenedor ya caliente).
+
+Las llamadas a AWS van contra un servidor de moto local, así que los números
+sirven para comparar versiones entre sí, no como latencia absoluta en AWS.
+
+Uso:
+    python backend/benchmarks/cold_start.py [--corridas 5] [--comparar <rev-git>]
+
+Con ``--comparar`` se extrae ``backend/`` de la revisión indicada (por ejemplo
+el commit anterior al cambio) y se muestran ambas mediciones lado a lado.
+"""
+import argparse
+import json
+import logging
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from esquema import BACKEND_DIR, HANDLERS, ENV_AWS_FALSO, crear_tablas
+
+LOCALIDAD = 'Palermo'
+CATEGORIA = 'Parrilla'
+RESTAURANT = 'Don Julio'
+OWNER = 'owner@bench.test'
+CLIENTE = 'cliente@bench.test'
+FECHA_BASE = 1893456000  # 2030-01-01 00:00 UTC, siempre en el futuro
+
+
+def _evento(handler, tag, corrida):
+    restaurant = {'localidad': LOCALIDAD, 'categoria': CATEGORIA, 'nombre_restaurant': RESTAURANT}
+    if handler == 'crear_reserva':
+        body = dict(restaurant, datetime=str(FECHA_BASE + 3600 * corrida), comensales='2',
+                    user_id=f'{tag}-{corrida}@bench.test', user_name='bench', email='bench@bench.test')
+        return {'body': json.dumps(body)}
+    if handler == 'crear_reservas_lote':
+        grupos = [{'user_id': f'{tag}-{corrida}-{i}@bench.test', 'user_name': 'bench', 'email': 'bench@bench.test',
+                   'comensales': 2 + i % 3} for i in range(4)]
+        return {'body': json.dumps(dict(restaurant, datetime=str(FECHA_BASE + 3600 * (corrida + 100)), grupos=grupos))}
+    if handler == 'delete_reserva':
+        return {'body': json.dumps({'user_id': f'borrar-{tag}-{corrida}@bench.test', 'datetime': str(FECHA_BASE)})}
+    if handler == 'obtener_reservas':
+        return {'queryStringParameters': {'user_id': CLIENTE}}
+    if handler == 'admin_obtener_reservas':
+        return {'queryStringParameters': dict(restaurant, id_usuario=OWNER)}
+    if handler == 'admin_reservas_lote':
+        # Cancela las reservas que dejó crear_reservas_lote (después de la primera corrida el rango queda vacío)
+        body = dict(restaurant, id_usuario=OWNER, accion='cancelar', **{'from': '2030-01-04', 'to': '2030-01-05'})
+        return {'body': json.dumps(body)}
+    if handler in ('admin_obtener_restaurantes', 'admin_obtener_dashboard'):
+        return {'queryStringParameters': {'id_usuario': OWNER}}
+    if handler == 'admin_crear_mesa':
+        return {'body': json.dumps(dict(restaurant, capacidad='4', id_usuario=OWNER))}
+    if handler == 'admin_crear_restaurant':
+        return {'body': json.dumps(dict(restaurant, nombre_restaurant=f'{RESTAURANT} {tag}-{corrida}', id_usuario=OWNER))}
+    if handler == 'buscar_restaurant':
+        return {'queryStringParameters': {'localidad': LOCALIDAD}}
+    if handler == 'buscar_disponibilidad':
+        return {'queryStringParameters': {'localidad': LOCALIDAD, 'datetime': str(FECHA_BASE), 'comensales': '2'}}
+    if handler == 'batch':
+        operaciones = [
+            {'metodo': 'GET', 'ruta': '/admin/restaurantes', 'query': {'id_usuario': OWNER}},
+            {'metodo': 'GET', 'ruta': '/admin/dashboard', 'query': {'id_usuario': OWNER}},
+            {'metodo': 'GET', 'ruta': '/disponibilidad', 'query': {'localidad': LOCALIDAD, 'datetime': str(FECHA_BASE), 'comensales': '2'}},
+        ]
+        return {'body': json.dumps({'operaciones': operaciones})}
+    if handler == 'notificaciones_worker':
+        return {'Records': [{
+            'eventName': 'INSERT',
+            'dynamodb': {
+                'SequenceNumber': f'{tag}-{corrida}',
+                'NewImage': {
+                    'ID_Notificacion': {'S': f'{tag}-{corrida}'},
+                    'Topico': {'S': 'reservation-notifications'},
+                    'Asunto': {'S': 'bench'},
+                    'Mensaje': {'S': 'bench'},
+                    'Atributos': {'M': {'email': {'S': CLIENTE}}},
+                },
+            },
+        }]}
+    if handler == 'archivador_reservas':
+        return {'Records': [{
+            'eventName': 'REMOVE',
+            'userIdentity': {'type': 'Service', 'principalId': 'dynamodb.amazonaws.com'},
+            'dynamodb': {
+                'SequenceNumber': f'{tag}-{corrida}',
+                'OldImage': {
+                    'Localidad#Categoria#Nombre_restaurant': {'S': f'{LOCALIDAD}#{CATEGORIA}#{RESTAURANT}'},
+                    'Fecha_hora#ID_Mesa': {'S': '31558980#0000'},
+                    'Fecha_hora': {'S': '2030-01-01T20:00:00'},
+                    'ID_Mesa': {'S': 'mesa-00'},
+                    'Comensales': {'N': '2'},
+                },
+            },
+        }]}
+    raise ValueError(handler)
+
+
+def _sembrar(endpoint):
+    import boto3
+
+    dynamodb = boto3.resource('dynamodb', endpoint_url=endpoint)
+    crear_tablas(dynamodb.meta.client)
+    sns = boto3.client('sns', endpoint_url=endpoint)
+    for topico in ('restaurant-creation-notifications', 'reservation-notifications'):
+        sns.create_topic(Name=topico)
+
+    clave = f'{LOCALIDAD}#{CATEGORIA}#{RESTAURANT}'
+    mesas = [{'ID_Mesa': f'mesa-{i:02d}', 'Capacidad': 2 + i % 4 * 2} for i in range(10)]
+    dynamodb.Table('RESTAURANTES').put_item(Item={
+        'Localidad': LOCALIDAD, 'Categoria#Nombre_restaurant': f'{CATEGORIA}#{RESTAURANT}', 'ID_Usuario': OWNER,
+        'Mesas': mesas,
+    })
+    for i, mesa in enumerate(mesas):
+        dynamodb.Table('MESAS').put_item(Item=dict(mesa, **{'Localidad#Categoria#Nombre_restaurant': clave, 'Indice': i}))
+    for i in range(5):
+        dynamodb.Table('USUARIOS').put_item(Item={
+            'ID_Usuario': CLIENTE, 'Fecha_hora': FECHA_BASE + 86400 * i, 'Localidad': LOCALIDAD,
+            'Categoria': CATEGORIA, 'Nombre_restaurant': RESTAURANT, 'ID_Mesa': 'mesa-00', 'Comensales': 2,
+        })
+    return dynamodb
+
+
+def _sembrar_borrado(dynamodb, tag, corrida):
+    # Cada corrida de delete_reserva borra una reserva propia
+    dynamodb.Table('USUARIOS').put_item(Item={
+        'ID_Usuario': f'borrar-{tag}-{corrida}@bench.test', 'Fecha_hora': FECHA_BASE, 'Localidad': LOCALIDAD,
+        'Categoria': CATEGORIA, 'Nombre_restaurant': RESTAURANT, 'ID_Mesa': f'mesa-{corrida:02d}', 'Indice_mesa': corrida,
+        'Comensales': 2,
+    })
+
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _medir(backend_dir, directorio, evento, endpoint):
+    env = dict(os.environ, **ENV_AWS_FALSO, AWS_ENDPOINT_URL=endpoint)
+    env.setdefault('BOOKTABLE_ARCHIVO_DIR', os.path.join(tempfile.gettempdir(), 'booktable-archivo-bench'))
+    rutas = [os.path.join(backend_dir, 'booktable-layer', 'python'), os.path.join(backend_dir, directorio)]
+    if directorio == 'batch':
+        # El zip de BatchLambda trae los módulos de los handlers que ejecuta (ver infra/datasources.tf)
+        rutas += [os.path.join(backend_dir, otro) for otro in HANDLERS if otro != directorio]
+    env['PYTHONPATH'] = os.pathsep.join(rutas)
+    salida = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--hijo', HANDLERS[directorio], json.dumps(evento)],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def _hijo(modulo, evento_json):
+    evento = json.loads(evento_json)
+    t0 = time.perf_counter()
+    handler = getattr(__import__(modulo), modulo)
+    t1 = time.perf_counter()
+    primera = handler(evento, None)
+    t2 = time.perf_counter()
+    handler(evento, None)
+    t3 = time.perf_counter()
+    print(json.dumps({
+        'import': (t1 - t0) * 1000,
+        'primera': (t2 - t1) * 1000,
+        'segunda': (t3 - t2) * 1000,
+        'status': primera.get('statusCode'),
+    }))
+
+
+def _extraer_backend(rev, destino):
+    raiz = subprocess.run(['git', 'rev-parse', '--show-toplevel'], cwd=BACKEND_DIR,
+                          capture_output=True, text=True, check=True).stdout.strip()
+    archivo = subprocess.run(['git', 'archive', rev, 'backend'], cwd=raiz, capture_output=True, check=True).stdout
+    subprocess.run(['tar', '-x', '-C', destino], input=archivo, check=True)
+    return os.path.join(destino, 'backend')
+
+
+def _medir_arbol(backend_dir, tag, corridas, endpoint, dynamodb):
+    resultados = {}
+    for directorio, modulo in HANDLERS.items():
+        # Un árbol anterior puede no tener todos los handlers
+        if not os.path.isdir(os.path.join(backend_dir, directorio)):
+            continue
+        muestras = []
+        for corrida in range(corridas):
+            if modulo == 'delete_reserva':
+                _sembrar_borrado(dynamodb, tag, corrida)
+            muestras.append(_medir(backend_dir, directorio, _evento(modulo, tag, corrida), endpoint))
+        resultados[modulo] = {
+            metrica: statistics.median(m[metrica] for m in muestras)
+            for metrica in ('import', 'primera', 'segunda')
+        }
+        resultados[modulo]['status'] = muestras[0]['status']
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corridas', type=int, default=5)
+    parser.add_argument('--comparar', metavar='REV', help='revision de git contra la cual comparar')
+    parser.add_argument('--hijo', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        _hijo(*args.hijo)
+        return
+
+    os.environ.update(ENV_AWS_FALSO)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    from moto.server import ThreadedMotoServer
+
+    puerto = _puerto_libre()
+    servidor = ThreadedMotoServer(ip_address='127.0.0.1', port=puerto, verbose=False)
+    servidor.start()
+    endpoint = f'http://127.0.0.1:{puerto}'
+    try:
+        dynamodb = _sembrar(endpoint)
+        actual = _medir_arbol(BACKEND_DIR, 'actual', args.corridas, endpoint, dynamodb)
+        anterior = None
+        if args.comparar:
+            with tempfile.TemporaryDirectory() as tmp:
+                anterior = _medir_arbol(_extraer_backend(args.comparar, tmp), 'anterior', args.corridas, endpoint, dynamodb)
+    finally:
+        servidor.stop()
+
+    print(f"Mediana de {args.corridas} corridas por handler (ms)")
+    columnas = ('import', 'primera', 'segunda')
+    encabezado = f"{'handler':<24}" + ''.join(f"{c:>10}" for c in columnas)
+    if anterior:
+        encabezado += ''.join(f"{c + ' ant':>14}" for c in columnas)
+    print(encabezado)
+    for modulo in HANDLERS.values():
+        fila = f"{modulo:<24}" + ''.join(f"{actual[modulo][c]:>10.1f}" for c in columnas)
+        if anterior and modulo in anterior:
+            fila += ''.join(f"{anterior[modulo][c]:>14.1f}" for c in columnas)
+        print(fila)
+
+
+if __name__ == '__main__':
+    main()
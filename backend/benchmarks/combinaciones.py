@@ -0,0 +1,73 @@
+"""Tiempo de búsqueda de combinaciones de mesas unidas.
+
+Arma salones con todas sus mesas unibles en grilla (cada mesa se puede juntar
+con la de al lado y con la de adelante, el peor caso para la búsqueda porque
+maximiza los conjuntos conexos), ocupa una fracción al azar de las mesas y
+mide ``combinaciones.buscar`` para grupos grandes, que no entran en ninguna
+mesa sola. Se reporta el tiempo por búsqueda y qué porcentaje de los grupos
+encontró lugar.
+
+Uso:
+    python backend/benchmarks/combinaciones.py [--busquedas 2000] [--ocupacion 0.5] [--semilla 1]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from esquema import LAYER_DIR
+
+sys.path.insert(0, LAYER_DIR)
+
+from booktable import combinaciones
+
+# Cantidad de mesas -> mesas por fila
+SALONES = {25: 5, 50: 10, 100: 10, 200: 20}
+
+CAPACIDADES = [2, 2, 4, 4, 4, 6]
+GRUPOS = [8, 10, 12, 14, 16, 20]
+
+
+def _salon(rng, cantidad, ancho):
+    inventario = [{'ID_Mesa': f'{i:03d}', 'Capacidad': rng.choice(CAPACIDADES)} for i in range(cantidad)]
+    uniones = []
+    for indice in range(cantidad):
+        if (indice + 1) % ancho and indice + 1 < cantidad:
+            uniones.append([indice, indice + 1])
+        if indice + ancho < cantidad:
+            uniones.append([indice, indice + ancho])
+    return inventario, uniones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--busquedas', type=int, default=2000, help='búsquedas por salon')
+    parser.add_argument('--ocupacion', type=float, default=0.5, help='fraccion de mesas ocupadas')
+    parser.add_argument('--semilla', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{args.busquedas} busquedas por salon, ocupacion {args.ocupacion:.0%}, hasta {combinaciones.MAX_MESAS} mesas por combinacion")
+    print(f"{'mesas':>6} {'uniones':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'con lugar':>10}")
+    for cantidad, ancho in SALONES.items():
+        rng = random.Random(args.semilla)
+        inventario, uniones = _salon(rng, cantidad, ancho)
+        tiempos = []
+        encontradas = 0
+        for _ in range(args.busquedas):
+            ocupadas = set(rng.sample(range(cantidad), int(cantidad * args.ocupacion)))
+            comensales = rng.choice(GRUPOS)
+            inicio = time.perf_counter()
+            if combinaciones.buscar(inventario, uniones, ocupadas, comensales):
+                encontradas += 1
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        percentiles = statistics.quantiles(tiempos, n=100)
+        print(f"{cantidad:>6} {len(uniones):>8} {percentiles[49]:>8.2f} {percentiles[98]:>8.2f} {max(tiempos):>8.2f} "
+              f"{encontradas / args.busquedas:>9.1%}")
+
+
+if __name__ == '__main__':
+    main()
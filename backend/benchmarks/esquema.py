@@ -0,0 +1,88 @@
+"""Esquema de las tablas de DynamoDB usado por los benchmarks.
+
+Refleja lo declarado en infra/db.tf; si se cambia una tabla allá hay que
+actualizarla también acá.
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAYER_DIR = os.path.join(BACKEND_DIR, 'booktable-layer', 'python')
+
+# nombre de la tabla -> (pk, tipo pk, sk, tipo sk); sk es None si la tabla no tiene sort key
+TABLAS = {
+    'MESAS': ('Localidad#Categoria#Nombre_restaurant', 'S', 'ID_Mesa', 'S'),
+    'RESTAURANTES': ('Localidad', 'S', 'Categoria#Nombre_restaurant', 'S'),
+    'USUARIOS': ('ID_Usuario', 'S', 'Fecha_hora', 'N'),
+    'RESERVAS': ('Localidad#Categoria#Nombre_restaurant', 'S', 'Fecha_hora#ID_Mesa', 'S'),
+    'DISPONIBILIDAD': ('Localidad#Categoria#Nombre_restaurant', 'S', 'Fecha_hora', 'S'),
+    'NOTIFICACIONES': ('ID_Notificacion', 'S', None, None),
+    'VERSIONES': ('Clave', 'S', None, None),
+    'IDEMPOTENCIA': ('Clave', 'S', None, None),
+    'ADMISION': ('Clave', 'S', None, None),
+}
+
+# nombre de la tabla -> [(indice secundario global, pk, tipo pk)], proyectados KEYS_ONLY
+INDICES = {
+    'RESTAURANTES': [('ID_Usuario-index', 'ID_Usuario', 'S')],
+}
+
+# directorio del handler -> nombre del modulo (y de la funcion)
+HANDLERS = {
+    'crear-reserva': 'crear_reserva',
+    'crear-reservas-lote': 'crear_reservas_lote',
+    'delete-reserva': 'delete_reserva',
+    'obtener-reservas': 'obtener_reservas',
+    'admin-obtener-reservas': 'admin_obtener_reservas',
+    'admin-reservas-lote': 'admin_reservas_lote',
+    'admin-obtener-restaurantes': 'admin_obtener_restaurantes',
+    'admin-obtener-dashboard': 'admin_obtener_dashboard',
+    'admin-crear-mesa': 'admin_crear_mesa',
+    'admin-crear-restaurant': 'admin_crear_restaurant',
+    'buscar-restaurant': 'buscar_restaurant',
+    'buscar-disponibilidad': 'buscar_disponibilidad',
+    'notificaciones-worker': 'notificaciones_worker',
+    'archivador-reservas': 'archivador_reservas',
+    'batch': 'batch',
+}
+
+ENV_AWS_FALSO = {
+    'AWS_ACCESS_KEY_ID': 'testing',
+    'AWS_SECRET_ACCESS_KEY': 'testing',
+    'AWS_SESSION_TOKEN': 'testing',
+    'AWS_DEFAULT_REGION': 'us-east-1',
+}
+
+
+def configurar_path(backend_dir=BACKEND_DIR):
+    """Agrega el layer y los directorios de los handlers al sys.path."""
+    rutas = [os.path.join(backend_dir, 'booktable-layer', 'python')]
+    rutas += [os.path.join(backend_dir, directorio) for directorio in HANDLERS]
+    for ruta in rutas:
+        if ruta not in sys.path:
+            sys.path.insert(0, ruta)
+
+
+def crear_tablas(cliente_dynamodb):
+    for nombre, (pk, tipo_pk, sk, tipo_sk) in TABLAS.items():
+        atributos = [{'AttributeName': pk, 'AttributeType': tipo_pk}]
+        claves = [{'AttributeName': pk, 'KeyType': 'HASH'}]
+        if sk:
+            atributos.append({'AttributeName': sk, 'AttributeType': tipo_sk})
+            claves.append({'AttributeName': sk, 'KeyType': 'RANGE'})
+        parametros = {}
+        for indice, pk_indice, tipo_pk_indice in INDICES.get(nombre, []):
+            if pk_indice not in (pk, sk):
+                atributos.append({'AttributeName': pk_indice, 'AttributeType': tipo_pk_indice})
+            parametros.setdefault('GlobalSecondaryIndexes', []).append({
+                'IndexName': indice,
+                'KeySchema': [{'AttributeName': pk_indice, 'KeyType': 'HASH'}],
+                'Projection': {'ProjectionType': 'KEYS_ONLY'},
+            })
+        cliente_dynamodb.create_table(
+            TableName=nombre,
+            BillingMode='PAY_PER_REQUEST',
+            AttributeDefinitions=atributos,
+            KeySchema=claves,
+            **parametros,
+        )
@@ -0,0 +1,108 @@
+"""Simulador offline de las estrategias de asignación de mesas.
+
+Genera demanda sintética para varios horarios pico: en cada horario llegan
+grupos de a uno (tamaños según una distribución típica) y cada estrategia
+decide en el momento en qué mesa sentarlos, o los rechaza si no hay lugar.
+Se reportan comensales sentados, tasa de rechazo y ocupación de asientos por
+estrategia, junto con el óptimo offline (conociendo toda la demanda de
+antemano: máxima cantidad de grupos y, a igualdad, de comensales) como
+referencia.
+
+Uso:
+    python backend/benchmarks/simulador_asignacion.py [--horarios 2000] [--carga 1.1] [--semilla 1]
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from esquema import LAYER_DIR
+
+sys.path.insert(0, LAYER_DIR)
+
+from booktable.asignacion import ESTRATEGIAS, demanda_restante, seleccionar_grupos
+
+# Tamaño de grupo -> probabilidad
+DISTRIBUCION_GRUPOS = {2: 0.42, 3: 0.12, 4: 0.24, 5: 0.06, 6: 0.09, 8: 0.05, 10: 0.02}
+
+# Mezclas de mesas de restaurantes tipo
+SALONES = {
+    'bodegon': [2] * 6 + [4] * 8 + [6] * 3 + [8] * 2 + [10],
+    'bistro': [2] * 10 + [4] * 4 + [6],
+    'parrilla': [4] * 10 + [6] * 4 + [8] * 2 + [12],
+}
+
+
+def _demanda_horario(rng, asientos, carga):
+    """Grupos que llegan a un horario, en orden de llegada."""
+    tamanios = list(DISTRIBUCION_GRUPOS)
+    pesos = list(DISTRIBUCION_GRUPOS.values())
+    media = sum(t * p for t, p in DISTRIBUCION_GRUPOS.items())
+    esperados = asientos * carga / media
+    cantidad = max(1, int(rng.gauss(esperados, esperados ** 0.5)))
+    return rng.choices(tamanios, pesos, k=cantidad)
+
+
+def _demanda_esperada(total_esperado):
+    # La estrategia anticipada no conoce el futuro: usa la composición esperada, como DEMANDA_ESPERADA
+    demanda = []
+    for tamanio, probabilidad in DISTRIBUCION_GRUPOS.items():
+        demanda.extend([tamanio] * round(total_esperado * probabilidad))
+    return demanda
+
+
+def _simular_horario(estrategia, mesas, grupos, esperada):
+    libres = list(mesas)
+    sentados = 0
+    comensales = 0
+    for llegados, grupo in enumerate(grupos):
+        candidatas = estrategia(libres, grupo, demanda_restante(esperada, llegados + 1))
+        if candidatas:
+            libres.remove(candidatas[0])
+            sentados += 1
+            comensales += grupo
+    return sentados, comensales
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--horarios', type=int, default=2000, help='horarios simulados por salon')
+    parser.add_argument('--carga', type=float, default=1.1, help='comensales pedidos / asientos del salon')
+    parser.add_argument('--semilla', type=int, default=1)
+    args = parser.parse_args()
+
+    media = sum(t * p for t, p in DISTRIBUCION_GRUPOS.items())
+    print(f"{args.horarios} horarios por salon, carga {args.carga:.2f}")
+    print(f"{'salon':<10} {'estrategia':<14} {'comensales':>11} {'grupos':>8} {'rechazo':>9} {'ocupacion':>10}")
+    for salon, capacidades in SALONES.items():
+        asientos = sum(capacidades)
+        rng = random.Random(args.semilla)
+        horarios = [_demanda_horario(rng, asientos, args.carga) for _ in range(args.horarios)]
+        total_grupos = sum(len(grupos) for grupos in horarios)
+        esperada = _demanda_esperada(asientos * args.carga / media)
+        # Los IDs de MESAS son UUIDs, así que el orden del query no sigue la capacidad
+        mesas = [{'ID_Mesa': f'{i:03d}', 'Capacidad': c} for i, c in enumerate(capacidades)]
+        rng.shuffle(mesas)
+
+        resultados = {}
+        for nombre, estrategia in ESTRATEGIAS.items():
+            sentados = comensales = 0
+            for grupos in horarios:
+                s, c = _simular_horario(estrategia, mesas, grupos, esperada)
+                sentados += s
+                comensales += c
+            resultados[nombre] = (sentados, comensales)
+
+        optimo = [seleccionar_grupos(capacidades, grupos) for grupos in horarios]
+        resultados['optimo_offline'] = (sum(len(o) for o in optimo), sum(sum(o) for o in optimo))
+
+        for nombre, (sentados, comensales) in resultados.items():
+            rechazo = 1 - sentados / total_grupos
+            ocupacion = comensales / (asientos * args.horarios)
+            print(f"{salon:<10} {nombre:<14} {comensales:>11} {sentados:>8} {rechazo:>8.1%} {ocupacion:>9.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,7 @@
+"""Runtime compartido por las Lambdas de cloud-booktable.
+
+Se despliega como Lambda layer (el zip contiene ``python/booktable``), por lo
+que cada handler lo importa directamente con ``from booktable import ...``.
+Importar el paquete no importa boto3: eso ocurre recién cuando un handler pide
+un cliente o una tabla.
+"""
@@ -0,0 +1,218 @@
+"""Control de admisión de pedidos de reserva por restaurante y horario.
+
+Cuando un restaurante muy buscado abre un horario, muchos pedidos llegan a la
+vez por las mismas mesas: casi todos terminan en un conflicto o en "no hay
+mesas", pero cada uno lee el restaurante y la disponibilidad e intenta la
+transacción. Antes de eso, cada pedido pasa por:
+
+* Un token bucket por restaurante y horario pedido, con un item de ADMISION
+  (``Clave``: ``<restaurante>#<instante>``). El bucket admite ``TASA`` pedidos
+  por segundo con ráfagas de hasta ``RAFAGA``; se implementa como GCRA: el
+  item guarda ``TAT`` (milisegundos), el instante en que el bucket vuelve a
+  estar lleno, y cada pedido lo avanza con una escritura condicional atómica,
+  sin leer antes. Los que exceden la tasa se rechazan con los segundos que
+  faltan para el próximo lugar (el ``Retry-After`` del 429).
+* Un marcador de horario agotado: cuando un pedido no encuentra mesas para
+  ``n`` comensales, ``registrar_agotado`` lo anota en el mismo item por
+  ``AGOTADO_SEGUNDOS`` y los pedidos de ``n`` o más comensales para ese
+  horario y duración se responden sin leer la disponibilidad. Una mesa que se
+  libera tarda como mucho eso en volver a ofrecerse.
+
+Las dos cosas también se cachean en el contenedor, así que un contenedor que
+ya sabe que el horario está lleno o agotado no escribe en DynamoDB. Si la
+tabla ADMISION falla (incluso por throttling o un error de conexión) el pedido se admite: el control
+de admisión nunca puede dejar sin reservas a un restaurante.
+
+``BOOKTABLE_ADMISION_TASA=0`` lo desactiva.
+"""
+import math
+import os
+import time
+
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import BotoCoreError, ClientError
+
+from booktable import aws
+from booktable.cache import CacheLRU
+from booktable.metricas import CODIGOS_THROTTLE
+
+TABLA = 'ADMISION'
+
+TASA = float(os.environ.get('BOOKTABLE_ADMISION_TASA', '5'))
+RAFAGA = int(os.environ.get('BOOKTABLE_ADMISION_RAFAGA', '20'))
+AGOTADO_SEGUNDOS = int(os.environ.get('BOOKTABLE_ADMISION_AGOTADO', '10'))
+
+# Los items vencen por TTL una vez que el bucket se llenó y el marcador pasó
+TTL_SEGUNDOS = 3600
+
+# Escrituras por pedido si otros pedidos mueven el TAT entre medio
+MAX_INTENTOS = 3
+
+MAX_ENTRADAS = 4096
+
+# Motivos de rechazo
+LIMITE = 'limite'
+AGOTADO = 'agotado'
+
+# Cancelaciones de transacción que indican throttling y no un conflicto
+MOTIVOS_THROTTLE = {'ThrottlingError', 'ProvisionedThroughputExceeded'}
+
+_lleno = CacheLRU(MAX_ENTRADAS)
+_agotado = CacheLRU(MAX_ENTRADAS)
+_deserializador = TypeDeserializer()
+
+
+def clave(clave_compuesta, instante):
+    return {'Clave': f'{clave_compuesta}#{int(instante)}'}
+
+
+def admitir(clave_compuesta, instante, comensales, duracion=None):
+    """Devuelve (motivo, segundos): (None, 0) si el pedido pasa; si no, ``LIMITE`` o ``AGOTADO`` y cuánto esperar.
+
+    ``duracion`` es la pedida (None si se usa la del restaurante), porque un
+    horario agotado para una duración puede no estarlo para otra más corta.
+    """
+    if TASA <= 0:
+        return None, 0
+    ahora = _ahora_ms()
+    pedido = (clave_compuesta, int(instante))
+
+    libre_desde = _lleno.obtener(pedido)
+    if libre_desde is not None and ahora < libre_desde:
+        return LIMITE, _segundos(libre_desde - ahora)
+    espera = _agotado_en_cache(pedido, duracion, comensales, ahora)
+    if espera:
+        return AGOTADO, espera
+
+    try:
+        item = _tomar_token(pedido, ahora)
+    except (ClientError, BotoCoreError) as e:
+        print(f"Admisión no disponible, se admite el pedido: {str(e)}")
+        return None, 0
+    if 'Rechazado_hasta' in item:
+        libre_desde = item['Rechazado_hasta']
+        _lleno.guardar(pedido, libre_desde, (libre_desde - ahora) / 1000)
+        return LIMITE, _segundos(libre_desde - ahora)
+
+    # El marcador compartido, si otro contenedor ya encontró el horario agotado
+    nombre = _atributo_agotado(duracion)
+    if nombre in item and int(item.get(f'{nombre}_hasta', 0)) > ahora:
+        _guardar_agotado(pedido, duracion, int(item[nombre]), int(item[f'{nombre}_hasta']))
+        espera = _agotado_en_cache(pedido, duracion, comensales, ahora)
+        if espera:
+            return AGOTADO, espera
+    return None, 0
+
+
+def registrar_agotado(clave_compuesta, instante, comensales, duracion=None):
+    """Anota que no hay mesas para ``comensales`` en el horario; devuelve los segundos que dura la marca."""
+    if TASA <= 0:
+        return 0
+    ahora = _ahora_ms()
+    hasta = ahora + AGOTADO_SEGUNDOS * 1000
+    pedido = (clave_compuesta, int(instante))
+    _guardar_agotado(pedido, duracion, comensales, hasta)
+
+    nombre = _atributo_agotado(duracion)
+    cliente = aws.cliente('dynamodb')
+    try:
+        # Se queda con la menor cantidad de comensales agotada mientras la marca siga vigente
+        cliente.update_item(
+            TableName=TABLA,
+            Key=clave(*pedido),
+            UpdateExpression='SET #comensales = :comensales, #hasta = :hasta, Expira = :expira',
+            ConditionExpression='attribute_not_exists(#comensales) OR #comensales >= :comensales OR #hasta <= :ahora',
+            ExpressionAttributeNames={'#comensales': nombre, '#hasta': f'{nombre}_hasta'},
+            ExpressionAttributeValues={':comensales': comensales, ':hasta': hasta, ':ahora': ahora,
+                                       ':expira': ahora // 1000 + TTL_SEGUNDOS}
+        )
+    except cliente.exceptions.ConditionalCheckFailedException:
+        pass
+    except (ClientError, BotoCoreError) as e:
+        print(f"No se pudo registrar el horario agotado: {str(e)}")
+    return AGOTADO_SEGUNDOS
+
+
+def saturado(error):
+    """True si el error es throttling de DynamoDB (también como motivo de una transacción cancelada)."""
+    if isinstance(error, ClientError):
+        return error.response['Error']['Code'] in CODIGOS_THROTTLE
+    return bool(MOTIVOS_THROTTLE & set(getattr(error, 'motivos', None) or ()))
+
+
+def _tomar_token(pedido, ahora):
+    """Avanza el TAT del bucket si hay lugar; devuelve el item (con ``Rechazado_hasta`` si no lo había).
+
+    Con el bucket lleno (TAT vencido) el TAT pasa a ``ahora + intervalo``; si
+    no, avanza un intervalo siempre que no supere ``ahora + tolerancia``. Cada
+    caso es una escritura condicional; si otro pedido movió el TAT entre medio
+    se reintenta con el valor que devolvió la condición fallida.
+    """
+    intervalo = math.ceil(1000 / TASA)
+    limite = ahora + intervalo * (RAFAGA - 1)
+    valores = {':ahora': ahora, ':intervalo': intervalo, ':expira': ahora // 1000 + TTL_SEGUNDOS}
+    tat = None
+    for _ in range(MAX_INTENTOS):
+        if tat is not None and tat > limite:
+            return {'Rechazado_hasta': tat - intervalo * (RAFAGA - 1)}
+        if tat is None or tat <= ahora:
+            expresion = 'SET TAT = :ahora + :intervalo, Expira = :expira'
+            condicion = 'attribute_not_exists(TAT) OR TAT <= :ahora'
+            extra = {}
+        else:
+            expresion = 'SET TAT = TAT + :intervalo, Expira = :expira'
+            condicion = 'TAT > :ahora AND TAT <= :limite'
+            extra = {':limite': limite}
+        ok, item = _actualizar(pedido, expresion, condicion, dict(valores, **extra))
+        if ok:
+            return item
+        tat = int(item.get('TAT', 0))
+    # Demasiada contención sobre el mismo horario: se rechaza como si estuviera lleno
+    return {'Rechazado_hasta': ahora + intervalo}
+
+
+def _actualizar(pedido, expresion, condicion, valores):
+    """(True, item nuevo) o (False, item anterior) si falla la condición."""
+    try:
+        response = aws.cliente('dynamodb').update_item(
+            TableName=TABLA,
+            Key=clave(*pedido),
+            UpdateExpression=expresion,
+            ConditionExpression=condicion,
+            ExpressionAttributeValues=valores,
+            ReturnValues='ALL_NEW',
+            ReturnValuesOnConditionCheckFailure='ALL_OLD'
+        )
+        return True, response.get('Attributes', {})
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        item = e.response.get('Item') or {}
+        # El item del error viene sin deserializar (el resource no lo transforma)
+        return False, {nombre: _deserializador.deserialize(valor) for nombre, valor in item.items()}
+
+
+def _atributo_agotado(duracion):
+    return f"Agotado_{duracion or 'restaurante'}"
+
+
+def _guardar_agotado(pedido, duracion, comensales, hasta):
+    ttl = (hasta - _ahora_ms()) / 1000
+    if ttl > 0:
+        _agotado.guardar((*pedido, duracion), (comensales, hasta), ttl)
+
+
+def _agotado_en_cache(pedido, duracion, comensales, ahora):
+    """Segundos que quedan de la marca si el horario está agotado para ``comensales``; si no, 0."""
+    marca = _agotado.obtener((*pedido, duracion))
+    if marca is None or comensales < marca[0] or marca[1] <= ahora:
+        return 0
+    return _segundos(marca[1] - ahora)
+
+
+def _segundos(milisegundos):
+    return max(1, math.ceil(milisegundos / 1000))
+
+
+def _ahora_ms():
+    return int(time.time() * 1000)
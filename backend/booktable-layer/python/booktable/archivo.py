@@ -0,0 +1,128 @@
+"""Archivo histórico de reservas vencidas.
+
+Cuando el TTL borra una reserva de RESERVAS, el stream de la tabla la entrega
+a ``archivador_reservas``, que la escribe acá. El archivo son archivos JSONL
+comprimidos con gzip (un item por línea, en JSON compacto), particionados
+por fecha de la reserva al estilo Hive::
+
+    reservas/fecha=2030-01-01/<nombre>.jsonl.gz
+
+así cada reporte lee solo los días de su rango, y un catálogo externo (Athena,
+por ejemplo) puede consultar el bucket tal cual.
+
+El almacén es un bucket de S3 (``BOOKTABLE_ARCHIVO_BUCKET``) o, en su lugar,
+un directorio local (``BOOKTABLE_ARCHIVO_DIR``), útil para pruebas y para
+reportes sobre una copia descargada.
+"""
+import gzip
+import json
+import os
+from datetime import date, timedelta
+
+from booktable import aws, concurrencia, reservas
+from booktable.http import codificar
+
+PREFIJO = 'reservas'
+EXTENSION = '.jsonl.gz'
+NIVEL_GZIP = 6
+
+
+class AlmacenLocal:
+    """Directorio local con la misma estructura de claves que el bucket."""
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+
+    def escribir(self, clave, datos):
+        ruta = os.path.join(self.directorio, clave)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        # Se escribe aparte y se renombra, para no dejar archivos a medias
+        with open(ruta + '.tmp', 'wb') as archivo:
+            archivo.write(datos)
+        os.replace(ruta + '.tmp', ruta)
+
+    def listar(self, prefijo):
+        directorio = os.path.join(self.directorio, prefijo)
+        if not os.path.isdir(directorio):
+            return []
+        return sorted(f'{prefijo}/{nombre}' for nombre in os.listdir(directorio) if nombre.endswith(EXTENSION))
+
+    def leer(self, clave):
+        with open(os.path.join(self.directorio, clave), 'rb') as archivo:
+            return archivo.read()
+
+
+class AlmacenS3:
+    def __init__(self, bucket):
+        self.bucket = bucket
+
+    def escribir(self, clave, datos):
+        aws.cliente('s3').put_object(Bucket=self.bucket, Key=clave, Body=datos, ContentEncoding='gzip',
+                                     ContentType='application/x-ndjson')
+
+    def listar(self, prefijo):
+        claves = []
+        for pagina in aws.cliente('s3').get_paginator('list_objects_v2').paginate(Bucket=self.bucket, Prefix=f'{prefijo}/'):
+            claves += [objeto['Key'] for objeto in pagina.get('Contents', []) if objeto['Key'].endswith(EXTENSION)]
+        return sorted(claves)
+
+    def leer(self, clave):
+        return aws.cliente('s3').get_object(Bucket=self.bucket, Key=clave)['Body'].read()
+
+
+def almacen():
+    """Almacén configurado por variables de entorno."""
+    if os.environ.get('BOOKTABLE_ARCHIVO_BUCKET'):
+        return AlmacenS3(os.environ['BOOKTABLE_ARCHIVO_BUCKET'])
+    if os.environ.get('BOOKTABLE_ARCHIVO_DIR'):
+        return AlmacenLocal(os.environ['BOOKTABLE_ARCHIVO_DIR'])
+    raise RuntimeError('Falta configurar BOOKTABLE_ARCHIVO_BUCKET o BOOKTABLE_ARCHIVO_DIR')
+
+
+def particion(fecha):
+    """Prefijo de las reservas de ``fecha`` (YYYY-MM-DD)."""
+    return f'{PREFIJO}/fecha={fecha}'
+
+
+def archivar(items_reservas, nombre, destino=None):
+    """Escribe las reservas (items de RESERVAS) en un archivo por fecha; devuelve las claves escritas.
+
+    ``nombre`` identifica el lote: reescribir el mismo lote con el mismo nombre
+    pisa sus archivos en lugar de duplicar las reservas.
+    """
+    destino = destino or almacen()
+    por_fecha = {}
+    for reserva in items_reservas:
+        por_fecha.setdefault(reserva['Fecha_hora'][:10], []).append(reserva)
+
+    claves = []
+    for fecha, items in sorted(por_fecha.items()):
+        contenido = ''.join(codificar(item) + '\n' for item in items).encode('utf-8')
+        clave = f'{particion(fecha)}/{nombre}{EXTENSION}'
+        destino.escribir(clave, gzip.compress(contenido, compresslevel=NIVEL_GZIP, mtime=0))
+        claves.append(clave)
+    return claves
+
+
+def leer(desde, hasta, clave_compuesta=None, origen=None):
+    """Reservas archivadas entre las fechas ``desde`` y ``hasta`` (inclusive), opcionalmente de un restaurante.
+
+    Las particiones se listan y los archivos se descargan en paralelo; las
+    reservas se devuelven en orden de fecha. Un reintento parcial del stream
+    puede archivar una reserva dos veces, así que se descartan los duplicados
+    (también los de una reserva archivada antes y después de migrar su partición).
+    """
+    origen = origen or almacen()
+    inicio, fin = date.fromisoformat(desde), date.fromisoformat(hasta)
+    fechas = [(inicio + timedelta(days=dia)).isoformat() for dia in range((fin - inicio).days + 1)]
+
+    listados = concurrencia.mapear(lambda fecha: origen.listar(particion(fecha)), fechas)
+    claves = [clave for listado in listados for clave in listado]
+    unicas = {}
+    for datos in concurrencia.mapear(origen.leer, claves):
+        for linea in gzip.decompress(datos).decode('utf-8').splitlines():
+            reserva = json.loads(linea)
+            restaurante = reservas.restaurante(reserva)
+            if clave_compuesta is None or restaurante == clave_compuesta:
+                unicas[(restaurante, reserva[reservas.SK])] = reserva
+    return sorted(unicas.values(), key=lambda reserva: reserva['Fecha_hora'])
@@ -0,0 +1,141 @@
+"""Estrategias de asignación de mesas.
+
+Cada estrategia recibe todas las mesas libres (items de MESAS con ``ID_Mesa``
+y ``Capacidad``, también las más chicas que el grupo), la cantidad de
+comensales y, opcionalmente, la demanda que se espera para el resto del
+horario (lista de tamaños de grupo, ver ``demanda_restante``). Devuelve las
+mesas donde entra el grupo ordenadas de la más conveniente a la menos
+conveniente, para que el handler pueda probar la siguiente si la primera se
+ocupa mientras tanto.
+"""
+import bisect
+import os
+from collections import Counter
+
+ESTRATEGIA_POR_DEFECTO = 'mejor_ajuste'
+
+
+def _capacidad(mesa):
+    return int(mesa['Capacidad'])
+
+
+def primera_libre(mesas, comensales, demanda=None):
+    """La primera mesa donde entra el grupo, en el orden en que vienen (comportamiento original)."""
+    return [mesa for mesa in mesas if _capacidad(mesa) >= comensales]
+
+
+def mejor_ajuste(mesas, comensales, demanda=None):
+    """La mesa más chica donde entra el grupo, así las grandes quedan para grupos grandes."""
+    return sorted(primera_libre(mesas, comensales), key=lambda mesa: (_capacidad(mesa), mesa['ID_Mesa']))
+
+
+def anticipada(mesas, comensales, demanda=None):
+    """Mejor ajuste que además mira la demanda esperada del resto del horario.
+
+    El costo de oportunidad se mide con todas las mesas libres: las que no
+    alcanzan para este grupo igual pueden sentar a los grupos chicos que
+    faltan llegar. Con grupos que entran en cualquier mesa de capacidad suficiente, la mesa más
+    chica siempre es la mejor elección; lo que la demanda agrega es saber cuándo
+    conviene no ocupar la mesa: si sentar al grupo hace que, de lo esperado para
+    el horario, se pierdan más comensales de los que el grupo aporta, se rechaza
+    (lista vacía). Sin demanda se comporta igual que ``mejor_ajuste``.
+    """
+    candidatas = mejor_ajuste(mesas, comensales)
+    if not demanda or not candidatas:
+        return candidatas
+
+    capacidades = [_capacidad(mesa) for mesa in mesas]
+    sin_sentar = sum(seleccionar_grupos(capacidades, demanda))
+    capacidades.remove(_capacidad(candidatas[0]))
+    sentando = comensales + sum(seleccionar_grupos(capacidades, demanda))
+    return candidatas if sentando >= sin_sentar else []
+
+
+ESTRATEGIAS = {
+    'primera_libre': primera_libre,
+    'mejor_ajuste': mejor_ajuste,
+    'anticipada': anticipada,
+}
+
+
+def ordenar_candidatas(mesas, comensales, demanda=None, estrategia=None):
+    """Aplica la estrategia indicada (o la de ``ESTRATEGIA_ASIGNACION``)."""
+    nombre = estrategia or os.environ.get('ESTRATEGIA_ASIGNACION', ESTRATEGIA_POR_DEFECTO)
+    if nombre not in ESTRATEGIAS:
+        raise ValueError(f"Estrategia de asignación desconocida: {nombre}")
+    return ESTRATEGIAS[nombre](mesas, comensales, demanda)
+
+
+def demanda_esperada(texto):
+    """Convierte ``"2:6,4:3,6:1"`` (tamaño:cantidad) en la lista de tamaños de grupo."""
+    demanda = []
+    for parte in filter(None, (texto or '').split(',')):
+        tamanio, cantidad = parte.split(':')
+        demanda.extend([int(tamanio)] * int(cantidad))
+    return demanda
+
+
+def demanda_restante(demanda, llegados):
+    """Lo que falta llegar al horario de la ``demanda`` esperada (``demanda_esperada``) si ya llegaron ``llegados`` grupos.
+
+    Los grupos que faltan mantienen la composición de la demanda esperada.
+    """
+    if not demanda:
+        return []
+    restantes = max(0, len(demanda) - llegados)
+    resultado = []
+    for tamanio, cantidad in sorted(Counter(demanda).items()):
+        resultado.extend([tamanio] * round(restantes * cantidad / len(demanda)))
+    return resultado
+
+
+def seleccionar_grupos(capacidades, grupos):
+    """Elige qué grupos sentar para maximizar la cantidad de grupos y, a igual cantidad, de comensales.
+
+    Como un grupo entra en cualquier mesa de capacidad mayor o igual, un
+    conjunto de grupos se puede sentar si y solo si, ordenando grupos y mesas de
+    mayor a menor, el i-ésimo grupo entra en la i-ésima mesa. Con esa prueba el
+    algoritmo goloso por tamaño decreciente es óptimo (matroide transversal).
+    Devuelve los tamaños de los grupos elegidos, de mayor a menor.
+    """
+    mesas = sorted(capacidades, reverse=True)
+    elegidos = []  # ordenados de menor a mayor para usar bisect
+    for grupo in sorted(grupos, reverse=True):
+        if len(elegidos) == len(mesas):
+            break
+        posicion = bisect.bisect_left(elegidos, grupo)
+        prueba = elegidos[:posicion] + [grupo] + elegidos[posicion:]
+        if all(g <= m for g, m in zip(reversed(prueba), mesas)):
+            elegidos = prueba
+    return elegidos[::-1]
+
+
+def asignar_grupos(mesas, grupos):
+    """Asigna en conjunto mesas a varios grupos del mismo horario.
+
+    ``mesas`` son las mesas libres y ``grupos`` una lista de ``(id, comensales)``.
+    Elige los grupos con ``seleccionar_grupos`` (máxima cantidad de grupos
+    sentados y, a igual cantidad, de comensales) y los ubica de mayor a menor
+    en la mesa más chica donde entran, lo que siempre encuentra lugar para un
+    conjunto de grupos que se puede sentar. Devuelve ``{id: mesa}``; los grupos
+    que no aparecen no se pudieron ubicar.
+    """
+    elegidos = seleccionar_grupos([_capacidad(mesa) for mesa in mesas], [comensales for _, comensales in grupos])
+
+    # Entre grupos del mismo tamaño se respeta el orden del pedido
+    cupos = {}
+    for comensales in elegidos:
+        cupos[comensales] = cupos.get(comensales, 0) + 1
+    a_ubicar = []
+    for id_grupo, comensales in grupos:
+        if cupos.get(comensales):
+            cupos[comensales] -= 1
+            a_ubicar.append((id_grupo, comensales))
+
+    libres = mejor_ajuste(mesas, 0)
+    asignacion = {}
+    for id_grupo, comensales in sorted(a_ubicar, key=lambda grupo: -grupo[1]):
+        mesa = next(mesa for mesa in libres if _capacidad(mesa) >= comensales)
+        libres.remove(mesa)
+        asignacion[id_grupo] = mesa
+    return asignacion
@@ -0,0 +1,143 @@
+"""Clientes de AWS compartidos, uno por contenedor.
+
+boto3 se importa de forma diferida en el primer pedido de un cliente o de una
+tabla. Los clientes usan una configuración ajustada (timeouts cortos, pool de
+conexiones y keep-alive) y se reutilizan entre invocaciones del mismo
+contenedor, al igual que los handles de las tablas de DynamoDB.
+
+Los resources de boto3 no son seguros entre hilos: los handles de ``tabla``
+se pueden guardar a nivel de módulo, pero cada hilo distinto del principal
+usa su propio resource (por ejemplo cuando ``/batch`` corre varios handlers a
+la vez). Los clientes sí son seguros y se comparten.
+
+Con ``observar`` se registran handlers de eventos de botocore (por ejemplo
+para medir cada llamada) en todos los clientes, los ya creados y los que se
+creen después.
+"""
+import os
+import threading
+
+_lock = threading.Lock()
+_session = None
+_clientes = {}
+_recursos = {}
+_tablas = {}
+_observadores = []
+_recursos_hilos = []
+_hilo = threading.local()
+
+
+def _config():
+    from botocore.config import Config
+
+    return Config(
+        connect_timeout=float(os.environ.get('BOOKTABLE_CONNECT_TIMEOUT', '1')),
+        read_timeout=float(os.environ.get('BOOKTABLE_READ_TIMEOUT', '5')),
+        max_pool_connections=int(os.environ.get('BOOKTABLE_MAX_POOL_CONNECTIONS', '25')),
+        retries={
+            'mode': 'standard',
+            'max_attempts': int(os.environ.get('BOOKTABLE_MAX_ATTEMPTS', '3')),
+        },
+        tcp_keepalive=True,
+    )
+
+
+def _get_session():
+    global _session
+    if _session is None:
+        import boto3
+
+        _session = boto3.session.Session()
+    return _session
+
+
+def recurso(servicio):
+    """Devuelve el resource de boto3 para ``servicio`` (creado una sola vez)."""
+    if servicio not in _recursos:
+        with _lock:
+            if servicio not in _recursos:
+                recurso_servicio = _get_session().resource(servicio, config=_config())
+                _aplicar_observadores(recurso_servicio.meta.client)
+                _recursos[servicio] = recurso_servicio
+    return _recursos[servicio]
+
+
+def cliente(servicio):
+    """Devuelve el cliente de boto3 para ``servicio`` (creado una sola vez).
+
+    Para DynamoDB se reutiliza el cliente interno del resource, así ambos
+    comparten el mismo pool de conexiones.
+    """
+    if servicio not in _clientes:
+        if servicio == 'dynamodb':
+            _clientes[servicio] = recurso('dynamodb').meta.client
+        else:
+            with _lock:
+                if servicio not in _clientes:
+                    cliente_servicio = _get_session().client(servicio, config=_config())
+                    _aplicar_observadores(cliente_servicio)
+                    _clientes[servicio] = cliente_servicio
+    return _clientes[servicio]
+
+
+def tabla(nombre):
+    """Devuelve el handle cacheado de la tabla de DynamoDB ``nombre``."""
+    if nombre not in _tablas:
+        with _lock:
+            if nombre not in _tablas:
+                _tablas[nombre] = _Tabla(nombre)
+    return _tablas[nombre]
+
+
+class _Tabla:
+    """Handle de una tabla que en cada hilo usa la ``Table`` del resource de ese hilo."""
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self._tablas = threading.local()
+
+    def __getattr__(self, atributo):
+        tabla_hilo = getattr(self._tablas, 'tabla', None)
+        if tabla_hilo is None:
+            tabla_hilo = self._tablas.tabla = _recurso_hilo('dynamodb').Table(self.nombre)
+        return getattr(tabla_hilo, atributo)
+
+
+def _recurso_hilo(servicio):
+    """El resource compartido en el hilo principal; en los demás, uno propio del hilo."""
+    if threading.current_thread() is threading.main_thread():
+        return recurso(servicio)
+    recursos = _hilo.__dict__.setdefault('recursos', {})
+    if servicio not in recursos:
+        with _lock:
+            recurso_servicio = _get_session().resource(servicio, config=_config())
+            _aplicar_observadores(recurso_servicio.meta.client)
+            _recursos_hilos.append(recurso_servicio)
+        recursos[servicio] = recurso_servicio
+    return recursos[servicio]
+
+
+def observar(evento, funcion, primero=False):
+    """Registra ``funcion`` para el evento de botocore ``evento`` en todos los clientes.
+
+    Con ``primero`` se registra antes que los handlers de botocore (necesario,
+    por ejemplo, para ver todos los ``needs-retry``).
+    """
+    with _lock:
+        _observadores.append((evento, funcion, primero))
+        recursos = list(_recursos.values()) + _recursos_hilos
+        clientes = {id(c): c for c in list(_clientes.values()) + [r.meta.client for r in recursos]}
+        for cliente_servicio in clientes.values():
+            _registrar(cliente_servicio, evento, funcion, primero)
+
+
+def _aplicar_observadores(cliente_servicio):
+    for evento, funcion, primero in _observadores:
+        _registrar(cliente_servicio, evento, funcion, primero)
+
+
+def _registrar(cliente_servicio, evento, funcion, primero):
+    if primero:
+        cliente_servicio.meta.events.register_first(evento, funcion)
+    else:
+        cliente_servicio.meta.events.register(evento, funcion)
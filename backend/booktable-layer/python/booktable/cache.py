@@ -0,0 +1,42 @@
+"""Cache en memoria del contenedor de Lambda.
+
+Cada contenedor tiene el suyo y se pierde cuando el contenedor se recicla, así
+que solo sirve para ahorrar lecturas repetidas: quien lo usa tiene que tolerar
+datos de hasta ``ttl`` segundos de antigüedad. El tamaño está acotado y se
+descarta primero lo usado hace más tiempo (LRU).
+"""
+from collections import OrderedDict
+import threading
+import time
+
+
+class CacheLRU:
+
+    def __init__(self, max_entradas):
+        self.max_entradas = max_entradas
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()
+
+    def obtener(self, clave, default=None):
+        """El valor guardado para ``clave``, o ``default`` si no está o ya venció."""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return default
+            if entrada[1] <= time.monotonic():
+                del self._entradas[clave]
+                return default
+            self._entradas.move_to_end(clave)
+            return entrada[0]
+
+    def guardar(self, clave, valor, ttl):
+        expira = time.monotonic() + ttl
+        with self._lock:
+            self._entradas[clave] = (valor, expira)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def descartar(self, clave):
+        with self._lock:
+            self._entradas.pop(clave, None)
@@ -0,0 +1,108 @@
+"""Combinaciones de mesas unidas para grupos que no entran en ninguna mesa.
+
+El restaurante declara qué mesas se pueden juntar en ``Uniones`` (en su item
+de RESTAURANTES): una lista de pares ``[i, j]`` de índices del inventario,
+por ejemplo dos mesas contiguas. Una combinación es un conjunto conexo de
+mesas libres según esos pares (se pueden ir juntando una al lado de la otra)
+de a lo sumo ``MAX_MESAS`` mesas, y sirve si la suma de sus capacidades
+alcanza para el grupo.
+
+La búsqueda trabaja con bitsets (un entero con un bit por mesa): las mesas
+libres, los vecinos de cada mesa y la vecindad del conjunto armado hasta el
+momento. Recorre cada conjunto conexo una sola vez (algoritmo ESU: cada
+conjunto se arma desde su mesa de menor índice y solo se agregan vecinos
+exclusivos del último agregado), deja de agrandar un conjunto en cuanto
+alcanza la capacidad (agregar mesas solo desperdicia lugares) y poda los que
+no pueden llegar ni con las mesas más grandes. Además la cantidad de
+conjuntos visitados tiene un tope, así que el tiempo queda acotado aun en
+salones con cientos de mesas unibles (ver ``benchmarks/combinaciones.py``).
+"""
+
+MAX_MESAS = 4
+
+# Conjuntos visitados por búsqueda como máximo
+MAX_EXPLORADOS = 20000
+
+# Combinaciones devueltas, para probar la siguiente si otra reserva toma una mesa
+MAX_CANDIDATAS = 5
+
+
+def validar_uniones(uniones, cantidad_mesas):
+    """Pares ``(i, j)`` de ``uniones`` si son índices distintos del inventario; si no, ValueError."""
+    pares = []
+    for par in uniones:
+        if not isinstance(par, (list, tuple)) or len(par) != 2:
+            raise ValueError('Cada unión debe ser un par de mesas.')
+        i, j = (int(indice) for indice in par)
+        if i == j or not (0 <= i < cantidad_mesas and 0 <= j < cantidad_mesas):
+            raise ValueError(f'Unión inválida: [{i}, {j}].')
+        pares.append((min(i, j), max(i, j)))
+    return pares
+
+
+def vecinos(cantidad_mesas, uniones):
+    """Bitset de las mesas unibles con cada mesa del inventario (las uniones fuera de rango se ignoran)."""
+    resultado = [0] * cantidad_mesas
+    for i, j in uniones or ():
+        i, j = int(i), int(j)
+        if i != j and 0 <= i < cantidad_mesas and 0 <= j < cantidad_mesas:
+            resultado[i] |= 1 << j
+            resultado[j] |= 1 << i
+    return resultado
+
+
+def _indices(bits):
+    while bits:
+        bit = bits & -bits
+        yield bit.bit_length() - 1
+        bits ^= bit
+
+
+def buscar(inventario, uniones, indices_ocupados, comensales, max_mesas=MAX_MESAS):
+    """Combinaciones de mesas libres donde entra el grupo, de la más conveniente a la menos conveniente.
+
+    Cada combinación es la lista de índices (de menor a mayor) de sus mesas.
+    Conviene la de menos lugares de sobra y, a igualdad, la de menos mesas.
+    Devuelve a lo sumo ``MAX_CANDIDATAS``.
+    """
+    cantidad = len(inventario)
+    adyacentes = vecinos(cantidad, uniones)
+    capacidades = [int(mesa['Capacidad']) for mesa in inventario]
+
+    libres = 0
+    for indice in range(cantidad):
+        if indice not in indices_ocupados:
+            libres |= 1 << indice
+    # Solo cuentan las mesas libres que se pueden juntar con alguna otra libre
+    unibles = 0
+    for indice in _indices(libres):
+        if adyacentes[indice] & libres:
+            unibles |= 1 << indice
+    if sum(capacidades[indice] for indice in _indices(unibles)) < comensales:
+        return []
+    maxima = max(capacidades[indice] for indice in _indices(unibles))
+
+    encontradas = []
+    explorados = 0
+    for inicio in _indices(unibles):
+        # Los conjuntos que arrancan en ``inicio`` solo usan mesas de índice mayor
+        mayores = unibles & ~((1 << (inicio + 1)) - 1)
+        pila = [(1 << inicio, adyacentes[inicio] & mayores, (1 << inicio) | adyacentes[inicio], capacidades[inicio], 1)]
+        while pila and explorados < MAX_EXPLORADOS:
+            conjunto, extension, vecindad, capacidad, mesas = pila.pop()
+            explorados += 1
+            if capacidad >= comensales:
+                encontradas.append((capacidad, mesas, conjunto))
+                continue
+            if mesas == max_mesas or capacidad + (max_mesas - mesas) * maxima < comensales:
+                continue
+            while extension:
+                bit = extension & -extension
+                extension ^= bit
+                indice = bit.bit_length() - 1
+                exclusivos = adyacentes[indice] & mayores & ~vecindad
+                pila.append((conjunto | bit, extension | exclusivos, vecindad | adyacentes[indice],
+                             capacidad + capacidades[indice], mesas + 1))
+
+    encontradas.sort(key=lambda combinacion: (combinacion[0], combinacion[1], list(_indices(combinacion[2]))))
+    return [list(_indices(conjunto)) for _, _, conjunto in encontradas[:MAX_CANDIDATAS]]
@@ -0,0 +1,58 @@
+"""Ejecución concurrente de llamadas a AWS dentro de una invocación.
+
+Las llamadas a DynamoDB pasan la mayor parte del tiempo esperando la red, así
+que varias en paralelo desde hilos tardan lo que la más lenta. El pool se
+crea una vez por contenedor y está acotado por ``BOOKTABLE_MAX_HILOS``, que no
+debería superar ``BOOKTABLE_MAX_POOL_CONNECTIONS`` (ver ``aws``).
+
+Los clientes de boto3 son seguros entre hilos; los resources no, así que las
+funciones que se ejecutan acá deben usar ``aws.cliente`` (o ``aws.tabla``, que
+da una tabla propia a cada hilo). Tampoco se deben anidar llamadas a
+``mapear``: con el pool lleno se bloquearían. Para correr pedidos completos en
+paralelo (los handlers de un ``/batch``), que a su vez usan ``mapear``, está
+``mapear_pedidos``, con un pool aparte.
+
+Cada tarea corre con una copia del contexto (``contextvars``) de quien llamó a
+``mapear``, así lo que se registre por invocación también ve las llamadas
+hechas desde el pool.
+"""
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_HILOS = int(os.environ.get('BOOKTABLE_MAX_HILOS', '8'))
+MAX_PEDIDOS = int(os.environ.get('BOOKTABLE_MAX_PEDIDOS', '4'))
+
+_lock = threading.Lock()
+_pools = {}
+
+
+def _get_pool(nombre='booktable', hilos=MAX_HILOS):
+    if nombre not in _pools:
+        with _lock:
+            if nombre not in _pools:
+                _pools[nombre] = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix=nombre)
+    return _pools[nombre]
+
+
+def mapear(funcion, elementos):
+    """Aplica ``funcion`` a cada elemento en paralelo y devuelve los resultados en orden.
+
+    Si alguna llamada falla se propaga la primera excepción (en orden de los
+    elementos). Con un solo elemento no se usa el pool.
+    """
+    return _mapear(_get_pool(), funcion, elementos)
+
+
+def mapear_pedidos(funcion, elementos):
+    """Como ``mapear`` pero en el pool de pedidos (``MAX_PEDIDOS`` hilos), donde ``funcion`` puede usar ``mapear``."""
+    return _mapear(_get_pool('booktable-pedidos', MAX_PEDIDOS), funcion, elementos)
+
+
+def _mapear(pool, funcion, elementos):
+    elementos = list(elementos)
+    if len(elementos) <= 1:
+        return [funcion(elemento) for elemento in elementos]
+    futuros = [pool.submit(contextvars.copy_context().run, funcion, elemento) for elemento in elementos]
+    return [futuro.result() for futuro in futuros]
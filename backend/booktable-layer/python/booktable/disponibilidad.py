@@ -0,0 +1,222 @@
+"""Índice de disponibilidad por restaurante y franja horaria.
+
+Cada restaurante guarda en su item de RESTAURANTES el inventario de mesas
+(``Mesas``: lista de ``{'ID_Mesa', 'Capacidad'}``); la posición en la lista es
+el índice de la mesa, que también se guarda como ``Indice`` en MESAS. También
+puede guardar ``Duracion_reserva``: los minutos que dura una reserva si el
+pedido no dice otra cosa (``DURACION_POR_DEFECTO`` si no está), y ``Uniones``:
+los pares de mesas que se pueden juntar para grupos grandes (ver
+``combinaciones``).
+
+Una reserva ocupa su mesa durante un intervalo, dividido en franjas de
+``FRANJA_MINUTOS``: cada franja que el intervalo toca queda ocupada. La tabla
+DISPONIBILIDAD tiene un item por restaurante y franja (sort key: el inicio de
+la franja en la hora local del restaurante, en ISO 8601; ver ``horarios``)
+con ``Ocupadas``: un number set con los índices de las mesas tomadas. Una
+franja sin item tiene todas las mesas libres. Las franjas
+de un intervalo son claves consecutivas, así que las reservas que se
+superponen con él se encuentran leyendo un rango acotado de la partición del
+restaurante (a lo sumo ``MAX_DURACION / FRANJA_MINUTOS`` items).
+
+Los sets se modifican con ``ADD`` y ``DELETE``, que son atómicos, así que
+reservar o liberar una mesa no necesita leer antes los items, y dos reservas
+superpuestas sobre la misma mesa se excluyen con la condición
+``NOT contains(Ocupadas, :indice)`` en cada franja compartida.
+"""
+from boto3.dynamodb.conditions import Key
+
+from booktable import aws, concurrencia, horarios, lotes, transacciones
+
+TABLA = 'DISPONIBILIDAD'
+
+FRANJA_MINUTOS = 15
+DURACION_POR_DEFECTO = 120
+MAX_DURACION = 360
+
+
+def clave(clave_compuesta, fecha_hora):
+    return {'Localidad#Categoria#Nombre_restaurant': clave_compuesta, 'Fecha_hora': fecha_hora}
+
+
+def duracion(restaurante):
+    """Duración por defecto (minutos) de las reservas del restaurante."""
+    return int(restaurante.get('Duracion_reserva') or DURACION_POR_DEFECTO)
+
+
+def validar_duracion(valor):
+    """Minutos de ``valor`` si es una duración válida; si no, ValueError."""
+    if not str(valor).isdigit() or not FRANJA_MINUTOS <= int(valor) <= MAX_DURACION:
+        raise ValueError(f"La duración debe ser un número de minutos entre {FRANJA_MINUTOS} y {MAX_DURACION}.")
+    return int(valor)
+
+
+def franjas(fecha_hora, minutos, zona):
+    """Inicios (ISO 8601, hora local) de las franjas que toca el intervalo [fecha_hora, fecha_hora + minutos).
+
+    El intervalo se mide en tiempo real en la ``zona`` del restaurante: en un
+    cambio de horario las franjas siguen al reloj local, que saltea o repite
+    horas (una hora repetida es una sola franja).
+    """
+    inicio = horarios.timestamp(fecha_hora, zona)
+    fin = inicio + minutos * 60
+    # Todos los desplazamientos de las zonas son múltiplos de la franja, así que alinear en UTC alinea en hora local
+    franja = inicio - inicio % (FRANJA_MINUTOS * 60)
+    resultado = []
+    while franja < fin:
+        local = horarios.local(franja, zona)
+        if local not in resultado:
+            resultado.append(local)
+        franja += FRANJA_MINUTOS * 60
+    return resultado
+
+
+def claves(clave_compuesta, franjas_intervalo):
+    return [clave(clave_compuesta, franja) for franja in franjas_intervalo]
+
+
+def ocupadas(item):
+    """Índices ocupados de un item de DISPONIBILIDAD (o de ninguno, si no existe)."""
+    return {int(indice) for indice in (item or {}).get('Ocupadas', ())}
+
+
+def ocupadas_en(items, franjas_intervalo):
+    """Índices ocupados en alguna de las franjas, a partir de items de DISPONIBILIDAD con ``Fecha_hora``."""
+    franjas_intervalo = set(franjas_intervalo)
+    indices = set()
+    for item in items:
+        if item['Fecha_hora'] in franjas_intervalo:
+            indices |= ocupadas(item)
+    return indices
+
+
+def leer_ocupadas(clave_compuesta, franjas_intervalo):
+    """Índices ocupados en las franjas, con una sola query (consistente) sobre su rango."""
+    items = aws.cliente('dynamodb').query(
+        TableName=TABLA,
+        KeyConditionExpression=Key('Localidad#Categoria#Nombre_restaurant').eq(clave_compuesta) &
+                               Key('Fecha_hora').between(min(franjas_intervalo), max(franjas_intervalo)),
+        ProjectionExpression='Fecha_hora, Ocupadas',
+        ConsistentRead=True
+    )['Items']
+    return ocupadas_en(items, franjas_intervalo)
+
+
+def leer_restaurante(clave_restaurante, clave_compuesta, instante, duracion=None):
+    """Devuelve (restaurante, fecha y hora local, items de DISPONIBILIDAD) para reservar en ``instante``.
+
+    El restaurante (inventario, uniones, duración y zona) y las franjas se leen en un
+    solo pedido; si no se sabe la duración todavía (es la del restaurante) se
+    leen las franjas de la duración máxima. Las franjas se calculan en la zona
+    por defecto: si el restaurante está en otra, se vuelven a leer las suyas.
+    El restaurante es None si no existe.
+    """
+    zona = horarios.ZONA_POR_DEFECTO
+    fecha_hora = horarios.local(instante, zona)
+    items = lotes.batch_get({
+        'RESTAURANTES': {'Keys': [clave_restaurante], 'ProjectionExpression': 'Localidad, Mesas, Uniones, Duracion_reserva, Zona_horaria'},
+        TABLA: _lectura_franjas(clave_compuesta, fecha_hora, duracion, zona)
+    })
+    if not items['RESTAURANTES']:
+        return None, fecha_hora, []
+    restaurante = items['RESTAURANTES'][0]
+    if horarios.zona_de(restaurante) != zona:
+        zona = horarios.zona_de(restaurante)
+        fecha_hora = horarios.local(instante, zona)
+        items = lotes.batch_get({TABLA: _lectura_franjas(clave_compuesta, fecha_hora, duracion, zona)})
+    return restaurante, fecha_hora, items[TABLA]
+
+
+def _lectura_franjas(clave_compuesta, fecha_hora, duracion, zona):
+    return {'Keys': claves(clave_compuesta, franjas(fecha_hora, duracion or MAX_DURACION, zona)), 'ProjectionExpression': 'Fecha_hora, Ocupadas'}
+
+
+def mesas_libres(inventario, indices_ocupados, comensales):
+    """Mesas del inventario libres y con capacidad suficiente, con su ``Indice``."""
+    return [
+        dict(mesa, Indice=indice)
+        for indice, mesa in enumerate(inventario)
+        if indice not in indices_ocupados and int(mesa['Capacidad']) >= comensales
+    ]
+
+
+def ocupar(clave_compuesta, franjas_intervalo, indice):
+    """Operaciones de transacción (una por franja) que ocupan la mesa si estaba libre en todas."""
+    return [
+        transacciones.update(
+            TABLA, clave(clave_compuesta, franja),
+            'ADD Ocupadas :mesa',
+            condicion='NOT contains(Ocupadas, :indice)',
+            valores={':mesa': {indice}, ':indice': indice}
+        )
+        for franja in franjas_intervalo
+    ]
+
+
+def liberar(clave_compuesta, franjas_intervalo, indice):
+    """Operaciones de transacción (una por franja) que vuelven a dejar libre la mesa."""
+    return [
+        transacciones.update(
+            TABLA, clave(clave_compuesta, franja),
+            'DELETE Ocupadas :mesa',
+            valores={':mesa': {indice}}
+        )
+        for franja in franjas_intervalo
+    ]
+
+
+def ocupar_varias(clave_compuesta, franjas_intervalo, indices):
+    """Como ``ocupar`` pero para varias mesas del mismo intervalo, con una operación por franja."""
+    indices = sorted(indices)
+    condicion = ' AND '.join(f'NOT contains(Ocupadas, :i{posicion})' for posicion in range(len(indices)))
+    valores = {f':i{posicion}': indice for posicion, indice in enumerate(indices)}
+    valores[':mesas'] = set(indices)
+    return [
+        transacciones.update(
+            TABLA, clave(clave_compuesta, franja),
+            'ADD Ocupadas :mesas',
+            condicion=condicion,
+            valores=valores
+        )
+        for franja in franjas_intervalo
+    ]
+
+
+def liberar_varias(clave_compuesta, franjas_intervalo, indices):
+    """Como ``liberar`` pero para varias mesas del mismo intervalo, con una operación por franja."""
+    return [
+        transacciones.update(
+            TABLA, clave(clave_compuesta, franja),
+            'DELETE Ocupadas :mesas',
+            valores={':mesas': set(indices)}
+        )
+        for franja in franjas_intervalo
+    ]
+
+
+def ocupar_franjas(clave_compuesta, indices_por_franja):
+    """Ocupa ``{franja: índices}`` fuera de transacciones, con una escritura por franja en paralelo.
+
+    Para operaciones masivas, donde cada franja junta las mesas de muchas
+    reservas. Cada franja se ocupa solo si todas sus mesas estaban libres;
+    devuelve las que no se pudieron ocupar.
+    """
+    franjas_pedidas = list(indices_por_franja)
+    operaciones = [ocupar_varias(clave_compuesta, [franja], indices_por_franja[franja])[0] for franja in franjas_pedidas]
+    resultados = concurrencia.mapear(_actualizar, operaciones)
+    return [franja for franja, ocupada in zip(franjas_pedidas, resultados) if not ocupada]
+
+
+def liberar_franjas(clave_compuesta, indices_por_franja):
+    """Como ``ocupar_franjas`` pero libera las mesas de cada franja (sin condición)."""
+    operaciones = [liberar_varias(clave_compuesta, [franja], indices)[0] for franja, indices in indices_por_franja.items()]
+    concurrencia.mapear(_actualizar, operaciones)
+
+
+def _actualizar(operacion):
+    """Ejecuta una operación de transacción ``Update`` como UpdateItem; False si falla su condición."""
+    cliente = aws.cliente('dynamodb')
+    try:
+        cliente.update_item(**operacion['Update'])
+        return True
+    except cliente.exceptions.ConditionalCheckFailedException:
+        return False
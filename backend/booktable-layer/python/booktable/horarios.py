@@ -0,0 +1,129 @@
+"""Horarios de las reservas: zona horaria de cada restaurante y sort key compacta de RESERVAS.
+
+Los pedidos y USUARIOS manejan instantes (epoch en segundos, UTC). Las horas
+locales (``Fecha_hora`` en RESERVAS, las franjas de DISPONIBILIDAD, los rangos
+de los reportes, el "hoy" del tablero) son las del restaurante: su item de
+RESTAURANTES guarda la zona IANA en ``Zona_horaria`` y los que no la tienen
+están en ``ZONA_POR_DEFECTO``. Todas las conversiones pasan por acá, con las
+reglas de la zona (cambios de horario incluidos) en lugar de un desplazamiento
+fijo. Si el runtime no trae la base de zonas, la zona por defecto cae a UTC-3
+fijo, que es el horario de Buenos Aires desde 2009.
+
+La sort key de RESERVAS es ``MMMMMMMM#IIII``: los minutos desde el epoch, de
+ancho fijo, y el índice de la mesa en el inventario del restaurante. Ordena
+por instante y después por mesa, no depende de la zona (es la misma
+representación que USUARIOS) y ocupa 13 bytes en lugar de los 56 de
+``2030-01-01T20:00:00#<uuid>``.
+"""
+import functools
+import time
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from booktable import aws
+from booktable.cache import CacheLRU
+
+ZONA_POR_DEFECTO = 'America/Argentina/Buenos_Aires'
+
+ANCHO_MINUTOS = 8
+ANCHO_INDICE = 4
+MAX_INDICE = 10 ** ANCHO_INDICE - 1
+
+# Mayor que cualquier carácter de la sort key después de los minutos ('#' y dígitos) y de una fecha y hora ISO
+FIN_DE_RANGO = '~'
+
+# La zona de un restaurante no cambia: se cachea en el contenedor
+TTL_ZONAS = 3600.0
+MAX_ENTRADAS = 1024
+
+_cache = CacheLRU(MAX_ENTRADAS)
+
+
+@functools.lru_cache(maxsize=None)
+def zona(nombre):
+    """tzinfo de la zona IANA ``nombre``; ValueError si no existe."""
+    try:
+        return ZoneInfo(nombre)
+    except (ZoneInfoNotFoundError, ValueError):
+        if nombre == ZONA_POR_DEFECTO:
+            return timezone(timedelta(hours=-3))
+        raise ValueError(f"Zona horaria desconocida: '{nombre}'.")
+
+
+def validar_zona(nombre):
+    """``nombre`` si es una zona IANA válida; si no, ValueError."""
+    if not isinstance(nombre, str):
+        raise ValueError("La zona horaria debe ser un nombre IANA, por ejemplo 'America/Argentina/Buenos_Aires'.")
+    zona(nombre)
+    return nombre
+
+
+def zona_de(item):
+    """Zona de un item de RESTAURANTES o USUARIOS (la por defecto si no tiene ``Zona_horaria``)."""
+    return item.get('Zona_horaria') or ZONA_POR_DEFECTO
+
+
+def zona_restaurante(localidad, categoria, nombre_restaurant):
+    """Zona del restaurante, leída de RESTAURANTES (cacheada); la por defecto si no existe."""
+    clave = (localidad, categoria, nombre_restaurant)
+    nombre = _cache.obtener(clave)
+    if nombre is None:
+        item = aws.tabla('RESTAURANTES').get_item(
+            Key={'Localidad': localidad, 'Categoria#Nombre_restaurant': f'{categoria}#{nombre_restaurant}'},
+            ProjectionExpression='Zona_horaria'
+        ).get('Item', {})
+        nombre = zona_de(item)
+        _cache.guardar(clave, nombre, TTL_ZONAS)
+    return nombre
+
+
+def local(instante, nombre_zona):
+    """Fecha y hora local (ISO 8601, sin offset) del instante ``instante`` (epoch en segundos)."""
+    return datetime.fromtimestamp(int(instante), zona(nombre_zona)).replace(tzinfo=None).isoformat()
+
+
+def timestamp(fecha_hora, nombre_zona):
+    """Inverso de ``local``. Una hora que se repite al atrasar el reloj es la primera de las dos."""
+    return int(datetime.fromisoformat(fecha_hora).replace(tzinfo=zona(nombre_zona)).timestamp())
+
+
+def hoy(nombre_zona):
+    """Fecha local de hoy (YYYY-MM-DD)."""
+    return local(time.time(), nombre_zona)[:10]
+
+
+def sort_key(instante, indice):
+    """Sort key de RESERVAS de la mesa ``indice`` en el instante ``instante`` (epoch en segundos)."""
+    if not 0 <= int(indice) <= MAX_INDICE:
+        raise ValueError(f"El índice de mesa debe estar entre 0 y {MAX_INDICE}.")
+    return f'{int(instante) // 60:0{ANCHO_MINUTOS}d}#{int(indice):0{ANCHO_INDICE}d}'
+
+
+def decodificar(clave):
+    """(instante, índice) de una sort key de ``sort_key``; ValueError si no tiene ese formato."""
+    minutos, indice = clave.split('#')
+    if len(minutos) != ANCHO_MINUTOS or len(indice) != ANCHO_INDICE:
+        raise ValueError(f"Sort key inválida: '{clave}'.")
+    return int(minutos) * 60, int(indice)
+
+
+def siguiente(clave):
+    """La menor sort key mayor que ``clave``: la mesa siguiente en el mismo minuto (o la primera del minuto siguiente)."""
+    instante, indice = decodificar(clave)
+    if indice == MAX_INDICE:
+        return sort_key(instante + 60, 0)
+    return sort_key(instante, indice + 1)
+
+
+def rango(desde, hasta, nombre_zona):
+    """Extremos de sort key (para ``between``) de las reservas entre dos horas locales, inclusive.
+
+    ``desde`` y ``hasta`` son una fecha (YYYY-MM-DD, el día entero) o una fecha
+    y hora ISO (se toma el minuto).
+    """
+    inicio = timestamp(desde, nombre_zona)
+    if len(hasta) == len('YYYY-MM-DD'):
+        fin = timestamp((date.fromisoformat(hasta) + timedelta(days=1)).isoformat(), nombre_zona) - 60
+    else:
+        fin = timestamp(hasta, nombre_zona)
+    return f'{inicio // 60:0{ANCHO_MINUTOS}d}', f'{fin // 60:0{ANCHO_MINUTOS}d}{FIN_DE_RANGO}'
@@ -0,0 +1,153 @@
+"""Respuestas HTTP y validación de entrada comunes a todos los handlers.
+
+Los bodies se codifican como JSON compacto: los Decimal y sets que devuelve
+DynamoDB pasan a números y listas nativas. Si se le pasa el ``event``,
+``respuesta`` comprime con gzip cuando el cliente lo acepta y el body supera
+``MIN_BYTES_GZIP``; el body comprimido viaja en base64 y API Gateway lo
+entrega como binario (la API tiene ``binary_media_types = ["*/*"]``).
+"""
+import base64
+import gzip
+import hashlib
+import json
+from decimal import Decimal
+
+CORS_ALLOW_HEADERS = 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,If-None-Match,Idempotency-Key'
+CORS_EXPOSE_HEADERS = 'ETag,Idempotent-Replayed'
+
+MENSAJE_JSON_INVALIDO = "Error: Cuerpo de la solicitud no es un JSON válido."
+
+# Debajo de este tamaño el gzip no compensa (cabe en un paquete y el header agrega ~20 bytes)
+MIN_BYTES_GZIP = 1024
+NIVEL_GZIP = 5
+
+_encoder = None
+
+
+def _json_default(valor):
+    # DynamoDB devuelve los números como Decimal y los string sets como set
+    if isinstance(valor, Decimal):
+        return int(valor) if valor == valor.to_integral_value() else float(valor)
+    if isinstance(valor, (set, frozenset)):
+        return sorted(valor)
+    raise TypeError(f"Object of type {type(valor).__name__} is not JSON serializable")
+
+
+def codificar(body):
+    """JSON compacto (sin espacios, UTF-8 sin escapar) del body."""
+    global _encoder
+    if _encoder is None:
+        _encoder = json.JSONEncoder(default=_json_default, ensure_ascii=False, separators=(',', ':'))
+    return _encoder.encode(body)
+
+
+def leer_header(event, nombre):
+    """Valor del header ``nombre`` del pedido (sin distinguir mayúsculas), o None."""
+    nombre = nombre.lower()
+    for clave, valor in (event.get('headers') or {}).items():
+        if clave.lower() == nombre:
+            return valor
+    return None
+
+
+def acepta_gzip(event):
+    """True si el pedido trae ``Accept-Encoding`` con gzip."""
+    valor = leer_header(event, 'Accept-Encoding') or ''
+    return any(codificacion.split(';')[0].strip().lower() == 'gzip' for codificacion in valor.split(','))
+
+
+def etag(body):
+    """ETag fuerte del body: un hash de su JSON compacto."""
+    return f'"{hashlib.sha256(codificar(body).encode("utf-8")).hexdigest()[:32]}"'
+
+
+def etag_coincide(event, valor_etag):
+    """True si el ``If-None-Match`` del pedido incluye ``valor_etag`` (o es ``*``)."""
+    valor = leer_header(event, 'If-None-Match')
+    if not valor:
+        return False
+    etags = [candidato.strip() for candidato in valor.split(',')]
+    # If-None-Match usa la comparación débil: el prefijo W/ no cuenta
+    return '*' in etags or valor_etag in (candidato.removeprefix('W/') for candidato in etags)
+
+
+def respuesta(status_code, body, metodos, headers=None, event=None):
+    """Arma la respuesta para API Gateway (proxy) con los headers de CORS.
+
+    Con ``event``, el body se comprime si el cliente acepta gzip y es lo bastante grande.
+    """
+    cabeceras = _cabeceras(metodos, headers)
+    cuerpo = codificar(body)
+
+    if event is not None:
+        cabeceras['Vary'] = 'Accept-Encoding'
+        datos = cuerpo.encode('utf-8')
+        if len(datos) >= MIN_BYTES_GZIP and acepta_gzip(event):
+            cabeceras['Content-Encoding'] = 'gzip'
+            return {
+                'statusCode': status_code,
+                'body': base64.b64encode(gzip.compress(datos, compresslevel=NIVEL_GZIP, mtime=0)).decode('ascii'),
+                'headers': cabeceras,
+                'isBase64Encoded': True,
+            }
+
+    return {
+        'statusCode': status_code,
+        'body': cuerpo,
+        'headers': cabeceras,
+    }
+
+
+def no_modificado(metodos, headers=None):
+    """Respuesta 304 (sin body) para un ``If-None-Match`` que coincide."""
+    cabeceras = _cabeceras(metodos, headers)
+    del cabeceras['Content-Type']
+    return {
+        'statusCode': 304,
+        'body': '',
+        'headers': cabeceras,
+    }
+
+
+def _cabeceras(metodos, headers):
+    cabeceras = {
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': CORS_ALLOW_HEADERS,
+        'Access-Control-Allow-Methods': metodos,
+        'Access-Control-Expose-Headers': CORS_EXPOSE_HEADERS,
+        'Content-Type': 'application/json',
+    }
+    if headers:
+        cabeceras.update(headers)
+    return cabeceras
+
+
+def leer_body(event):
+    """Devuelve el body JSON del evento como dict, o None si no es JSON válido."""
+    try:
+        body = event.get('body') or '{}'
+        # Con binary_media_types = ["*/*"] API Gateway entrega los bodies en base64
+        if event.get('isBase64Encoded'):
+            body = base64.b64decode(body)
+        body = json.loads(body)
+    except (TypeError, ValueError):
+        return None
+    return body if isinstance(body, dict) else None
+
+
+def leer_query(event):
+    """Devuelve los query string parameters del evento (nunca None)."""
+    return event.get('queryStringParameters') or {}
+
+
+def campos_vacios(datos, campos_requeridos):
+    """Devuelve los campos requeridos que están vacíos o ausentes en ``datos``."""
+    return [campo for campo in campos_requeridos if not datos.get(campo)]
+
+
+def error_campos_vacios(campos, metodos):
+    return respuesta(
+        400,
+        f"Error: Todos los campos son requeridos. Los siguientes campos están vacíos o ausentes: {', '.join(campos)}",
+        metodos,
+    )
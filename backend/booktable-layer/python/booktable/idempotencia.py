@@ -0,0 +1,192 @@
+"""Pedidos idempotentes con el header ``Idempotency-Key``.
+
+El cliente manda la misma clave en todos los reintentos de un pedido. La
+primera invocación toma la clave en IDEMPOTENCIA (put condicional, estado
+``EN_CURSO``), ejecuta el handler y guarda su respuesta; las siguientes la
+devuelven tal cual (con ``Idempotent-Replayed: true``) sin volver a ejecutar
+nada. Un duplicado que llega mientras el original sigue en curso espera a que
+termine en lugar de competir con él; si no termina en ``ESPERA_MAXIMA``
+segundos responde 409 con ``Retry-After``.
+
+Las respuestas de error del servidor (5xx) y las de conflicto (409, 429) no se
+guardan: la clave se libera para que el reintento vuelva a intentarlo. Si la
+Lambda muere a mitad de camino, la clave queda tomada hasta que vence su
+``Bloqueo`` y después la retoma el siguiente reintento. Cada toma lleva su
+``Token``: la respuesta se guarda (o la clave se libera) solo si la clave sigue
+tomada por la misma invocación, así un pedido lento cuyo bloqueo venció no pisa
+al reintento que la retomó.
+
+Si IDEMPOTENCIA no responde (throttling, error de conexión) el pedido no se
+ejecuta sin la clave: se responde 503 con ``Retry-After`` para que el cliente
+reintente con la misma clave.
+
+Cada clave vale para un handler y un body: reusarla con otro body es un 422.
+Los items vencen a las ``BOOKTABLE_TTL_IDEMPOTENCIA`` segundos (TTL de DynamoDB
+sobre ``Expira``; como el TTL borra con demora, los vencidos se ignoran).
+"""
+import functools
+import hashlib
+import os
+import time
+import uuid
+
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import BotoCoreError, ClientError
+
+from booktable import aws
+from booktable.http import respuesta, leer_header
+
+TABLA = 'IDEMPOTENCIA'
+HEADER = 'Idempotency-Key'
+MAX_LARGO_CLAVE = 255
+
+TTL_SEGUNDOS = int(os.environ.get('BOOKTABLE_TTL_IDEMPOTENCIA', '86400'))
+
+# Cuánto se considera vivo un pedido en curso (algo más que el timeout de las Lambdas)
+BLOQUEO_SEGUNDOS = 30
+
+# Espera de un duplicado concurrente, por debajo del timeout de 29 s de API Gateway
+ESPERA_MAXIMA = 8
+INTERVALO_ESPERA = 0.1
+MAX_INTERVALO_ESPERA = 0.5
+
+EN_CURSO = 'EN_CURSO'
+COMPLETO = 'COMPLETO'
+
+# Respuestas que no se guardan: el reintento tiene que volver a ejecutar el handler
+STATUS_REINTENTABLES = {409, 429}
+
+MENSAJE_NO_DISPONIBLE = "Error: El servicio no está disponible en este momento. Intente nuevamente."
+
+_deserializador = TypeDeserializer()
+
+
+def idempotente(metodos):
+    """Decorador para los handlers que escriben; sin el header no cambia nada."""
+    def decorador(handler):
+        @functools.wraps(handler)
+        def envuelto(event, context):
+            clave_cliente = leer_header(event, HEADER)
+            if not clave_cliente:
+                return handler(event, context)
+            if len(clave_cliente) > MAX_LARGO_CLAVE:
+                return respuesta(400, f"Error: '{HEADER}' no puede superar los {MAX_LARGO_CLAVE} caracteres.", metodos)
+
+            clave = f'{handler.__name__}#{clave_cliente}'
+            huella = _huella(event)
+            token = uuid.uuid4().hex
+
+            limite = time.monotonic() + ESPERA_MAXIMA
+            intervalo = INTERVALO_ESPERA
+            while True:
+                try:
+                    tomada, item = _tomar(clave, huella, token)
+                except (ClientError, BotoCoreError) as e:
+                    print(f"Idempotencia no disponible: {str(e)}")
+                    return respuesta(503, MENSAJE_NO_DISPONIBLE, metodos, headers={'Retry-After': '1'}, event=event)
+                if tomada:
+                    break
+                if item is not None:
+                    if item.get('Huella') != huella:
+                        return respuesta(422, f"Error: '{HEADER}' ya se usó con otro pedido.", metodos)
+                    if item.get('Estado') == COMPLETO:
+                        return _repetir(item['Respuesta'])
+                if time.monotonic() >= limite:
+                    return respuesta(409, "Error: El pedido original todavía está en curso. Intente nuevamente.",
+                                     metodos, headers={'Retry-After': '1'})
+                time.sleep(intervalo)
+                intervalo = min(intervalo * 2, MAX_INTERVALO_ESPERA)
+
+            try:
+                resultado = handler(event, context)
+            except Exception:
+                _liberar(clave, token)
+                raise
+
+            if resultado['statusCode'] >= 500 or resultado['statusCode'] in STATUS_REINTENTABLES:
+                _liberar(clave, token)
+            else:
+                _guardar(clave, token, resultado)
+            return resultado
+
+        return envuelto
+    return decorador
+
+
+def _huella(event):
+    """Hash del body del pedido, para detectar una clave reusada con otro pedido."""
+    body = event.get('body') or ''
+    return hashlib.sha256(body.encode('utf-8') if isinstance(body, str) else body).hexdigest()
+
+
+def _tomar(clave, huella, token):
+    """(True, None) si se tomó la clave; si no, (False, item existente o None).
+
+    Se puede tomar si no existe, si venció o si quedó en curso de un pedido con
+    el mismo body cuyo bloqueo ya pasó. Los errores que no son de la condición
+    se propagan.
+    """
+    ahora = int(time.time())
+    try:
+        aws.cliente('dynamodb').put_item(
+            TableName=TABLA,
+            Item={
+                'Clave': clave,
+                'Estado': EN_CURSO,
+                'Huella': huella,
+                'Token': token,
+                'Bloqueo': ahora + BLOQUEO_SEGUNDOS,
+                'Expira': ahora + TTL_SEGUNDOS,
+            },
+            ConditionExpression='attribute_not_exists(Clave) OR Expira < :ahora OR '
+                                '(Estado = :en_curso AND Huella = :huella AND Bloqueo < :ahora)',
+            ExpressionAttributeValues={':ahora': ahora, ':en_curso': EN_CURSO, ':huella': huella},
+            ReturnValuesOnConditionCheckFailure='ALL_OLD'
+        )
+        return True, None
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        item = e.response.get('Item')
+        # El item del error viene sin deserializar (el resource no lo transforma)
+        return False, {nombre: _deserializador.deserialize(valor) for nombre, valor in item.items()} if item else None
+
+
+def _guardar(clave, token, resultado):
+    """Guarda la respuesta si la clave sigue tomada por esta invocación."""
+    try:
+        aws.cliente('dynamodb').update_item(
+            TableName=TABLA,
+            Key={'Clave': clave},
+            UpdateExpression='SET Estado = :completo, Respuesta = :respuesta REMOVE Bloqueo, #token',
+            ConditionExpression='Estado = :en_curso AND #token = :token',
+            ExpressionAttributeNames={'#token': 'Token'},
+            ExpressionAttributeValues={':completo': COMPLETO, ':respuesta': resultado, ':en_curso': EN_CURSO,
+                                       ':token': token}
+        )
+    except ClientError as e:
+        # Otra invocación retomó la clave (o venció): su respuesta es la que vale
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+
+
+def _liberar(clave, token):
+    """Libera la clave si sigue tomada por esta invocación."""
+    try:
+        aws.cliente('dynamodb').delete_item(
+            TableName=TABLA,
+            Key={'Clave': clave},
+            ConditionExpression='#token = :token',
+            ExpressionAttributeNames={'#token': 'Token'},
+            ExpressionAttributeValues={':token': token}
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+
+
+def _repetir(guardada):
+    """La respuesta guardada, marcada como repetida."""
+    resultado = dict(guardada, statusCode=int(guardada['statusCode']))
+    resultado['headers'] = dict(guardada.get('headers') or {}, **{'Idempotent-Replayed': 'true'})
+    return resultado
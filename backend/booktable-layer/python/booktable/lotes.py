@@ -0,0 +1,92 @@
+"""Lecturas y escrituras por lotes (BatchGetItem / BatchWriteItem).
+
+DynamoDB puede devolver parte del lote sin procesar cuando hay throttling;
+estas funciones reintentan lo pendiente con backoff exponencial. Cuando un
+pedido supera el límite de claves se parte en lotes que se envían en paralelo.
+"""
+import random
+import time
+
+from booktable import aws, concurrencia
+
+MAX_REINTENTOS = 5
+LIMITE_BATCH_GET = 100
+LIMITE_BATCH_WRITE = 25
+
+
+def _esperar(intento):
+    time.sleep(min(1.0, 0.025 * 2 ** intento) * random.random())
+
+
+def batch_get(solicitudes):
+    """Lee varios items de una o más tablas en un solo BatchGetItem.
+
+    ``solicitudes`` es ``{tabla: {'Keys': [...], 'ProjectionExpression': ...}}``
+    con el mismo formato que boto3. Devuelve ``{tabla: [items]}``; los items
+    que no existen simplemente no aparecen. Lotes de más de 100 claves se
+    parten en varios pedidos concurrentes.
+    """
+    resultado = {tabla: [] for tabla in solicitudes}
+    for parcial in concurrencia.mapear(_batch_get_lote, _partir(solicitudes)):
+        for tabla, items in parcial.items():
+            resultado[tabla].extend(items)
+    return resultado
+
+
+def _batch_get_lote(lote):
+    resultado = {}
+    pendientes = lote
+    for intento in range(MAX_REINTENTOS + 1):
+        response = aws.cliente('dynamodb').batch_get_item(RequestItems=pendientes)
+        for tabla, items in response.get('Responses', {}).items():
+            resultado.setdefault(tabla, []).extend(items)
+        pendientes = response.get('UnprocessedKeys')
+        if not pendientes:
+            return resultado
+        _esperar(intento)
+    raise RuntimeError("BatchGetItem: quedaron claves sin procesar luego de los reintentos")
+
+
+def _partir(solicitudes):
+    claves = [(tabla, clave) for tabla, solicitud in solicitudes.items() for clave in solicitud['Keys']]
+    for inicio in range(0, len(claves), LIMITE_BATCH_GET):
+        lote = {}
+        for tabla, clave in claves[inicio:inicio + LIMITE_BATCH_GET]:
+            lote.setdefault(tabla, dict(solicitudes[tabla], Keys=[]))['Keys'].append(clave)
+        yield lote
+
+
+def batch_write(escrituras):
+    """Escribe y borra items de una o más tablas con BatchWriteItem.
+
+    ``escrituras`` es ``{tabla: [{'PutRequest': {'Item': ...}} o {'DeleteRequest': {'Key': ...}}]}``,
+    con el mismo formato que boto3. Las escrituras no son condicionales ni
+    atómicas entre sí: se parten en lotes de 25 que se envían en paralelo. No
+    lanza excepción por lo que DynamoDB deja sin procesar luego de los
+    reintentos: lo devuelve, con el mismo formato (vacío si se escribió todo).
+    """
+    pendientes = {}
+    for parcial in concurrencia.mapear(_batch_write_lote, _partir_escrituras(escrituras)):
+        for tabla, solicitudes in parcial.items():
+            pendientes.setdefault(tabla, []).extend(solicitudes)
+    return pendientes
+
+
+def _batch_write_lote(lote):
+    pendientes = lote
+    for intento in range(MAX_REINTENTOS + 1):
+        if intento:
+            _esperar(intento - 1)
+        pendientes = aws.cliente('dynamodb').batch_write_item(RequestItems=pendientes).get('UnprocessedItems')
+        if not pendientes:
+            return {}
+    return pendientes
+
+
+def _partir_escrituras(escrituras):
+    solicitudes = [(tabla, solicitud) for tabla, lista in escrituras.items() for solicitud in lista]
+    for inicio in range(0, len(solicitudes), LIMITE_BATCH_WRITE):
+        lote = {}
+        for tabla, solicitud in solicitudes[inicio:inicio + LIMITE_BATCH_WRITE]:
+            lote.setdefault(tabla, []).append(solicitud)
+        yield lote
@@ -0,0 +1,199 @@
+"""Métricas por invocación de las llamadas a AWS (DynamoDB, SNS y S3).
+
+Con ``BOOKTABLE_METRICAS=1``, ``instrumentar`` envuelve el handler y cada
+llamada que hacen los clientes de ``aws`` queda registrada como un paso: la
+operación y la tabla, la latencia, la capacidad consumida (se agrega
+``ReturnConsumedCapacity='TOTAL'`` a las operaciones de DynamoDB que lo
+admiten), los reintentos y los throttles, y las particiones que tocó en las
+tablas cuya partition key identifica un restaurante o una localidad (para
+encontrar claves calientes).
+
+Al terminar la invocación se imprime un solo registro en formato EMF
+(CloudWatch Embedded Metric Format): CloudWatch Logs extrae las métricas
+agregadas por función y el detalle de los pasos queda en el log para
+consultarlo con Logs Insights.
+
+Sin la variable, ``instrumentar`` devuelve el handler tal cual y no se
+registra nada en botocore, así que no hay costo.
+"""
+import contextvars
+import functools
+import json
+import os
+import time
+
+from booktable import aws
+
+ACTIVAS = os.environ.get('BOOKTABLE_METRICAS') == '1'
+NAMESPACE = os.environ.get('BOOKTABLE_METRICAS_NAMESPACE', 'BookTable')
+
+SERVICIOS = ('dynamodb', 'sns', 's3')
+
+CODIGOS_THROTTLE = {
+    'ProvisionedThroughputExceededException', 'ThrottlingException', 'RequestLimitExceeded', 'Throttling',
+}
+
+OPERACIONES_LECTURA = {'GetItem', 'BatchGetItem', 'Query', 'Scan', 'TransactGetItems'}
+
+# Tabla -> partition key que se registra (no se registran las claves con datos de usuarios)
+PARTICIONES = {
+    'RESTAURANTES': 'Localidad',
+    'MESAS': 'Localidad#Categoria#Nombre_restaurant',
+    'RESERVAS': 'Localidad#Categoria#Nombre_restaurant',
+    'DISPONIBILIDAD': 'Localidad#Categoria#Nombre_restaurant',
+    'VERSIONES': 'Clave',
+    'ADMISION': 'Clave',
+}
+
+# Pasos de la invocación en curso (los hilos de ``concurrencia`` ven la misma lista)
+_pasos = contextvars.ContextVar('pasos', default=None)
+_activadas = False
+
+
+def instrumentar(handler):
+    """Decorador para los handlers: emite un registro de métricas por invocación."""
+    if not ACTIVAS:
+        return handler
+    _activar()
+
+    @functools.wraps(handler)
+    def instrumentado(event, context):
+        pasos = []
+        token = _pasos.set(pasos)
+        inicio = time.perf_counter()
+        resultado = None
+        try:
+            resultado = handler(event, context)
+            return resultado
+        finally:
+            _pasos.reset(token)
+            duracion = (time.perf_counter() - inicio) * 1000
+            status = resultado.get('statusCode') if isinstance(resultado, dict) else None
+            print(json.dumps(registro_emf(handler.__name__, duracion, status, pasos)))
+
+    return instrumentado
+
+
+def registro_emf(funcion, duracion, status, pasos):
+    totales = {
+        'LlamadasDynamoDB': sum(1 for paso in pasos if paso['servicio'] == 'dynamodb'),
+        'LlamadasSNS': sum(1 for paso in pasos if paso['servicio'] == 'sns'),
+        'LlamadasS3': sum(1 for paso in pasos if paso['servicio'] == 's3'),
+        'RCU': sum(paso['rcu'] for paso in pasos),
+        'WCU': sum(paso['wcu'] for paso in pasos),
+        'Reintentos': sum(paso['reintentos'] for paso in pasos),
+        'Throttles': sum(paso['throttles'] for paso in pasos),
+    }
+    return {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': NAMESPACE,
+                'Dimensions': [['Funcion']],
+                'Metrics': [{'Name': 'Duracion', 'Unit': 'Milliseconds'}] +
+                           [{'Name': nombre, 'Unit': 'Count'} for nombre in totales],
+            }],
+        },
+        'Funcion': funcion,
+        'Duracion': round(duracion, 2),
+        'StatusCode': status,
+        **totales,
+        'Pasos': pasos,
+    }
+
+
+def _activar():
+    global _activadas
+    if _activadas:
+        return
+    _activadas = True
+    for servicio in SERVICIOS:
+        # Antes que los handlers de botocore: el resource de DynamoDB devuelve una copia de los parámetros en este
+        # evento y lo que se agregue después de la copia no llega al pedido
+        aws.observar(f'provide-client-params.{servicio}', _al_empezar, primero=True)
+        aws.observar(f'needs-retry.{servicio}', _al_reintentar, primero=True)
+        aws.observar(f'after-call.{servicio}', _al_terminar)
+
+
+def _al_empezar(params, model, context, **kwargs):
+    if _pasos.get() is None:
+        return
+    if 'ReturnConsumedCapacity' in model.input_shape.members:
+        params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+    context['booktable_paso'] = {
+        'inicio': time.perf_counter(),
+        'tabla': _tablas(params),
+        'particiones': _particiones(params),
+        'throttles': 0,
+    }
+
+
+def _al_reintentar(response, request_dict, **kwargs):
+    paso = request_dict.get('context', {}).get('booktable_paso')
+    if paso is not None and response is not None:
+        if response[1].get('Error', {}).get('Code') in CODIGOS_THROTTLE:
+            paso['throttles'] += 1
+
+
+def _al_terminar(http_response, parsed, model, context, **kwargs):
+    paso = context.get('booktable_paso')
+    pasos = _pasos.get()
+    if paso is None or pasos is None:
+        return
+    rcu, wcu = _capacidad(model.name, parsed.get('ConsumedCapacity'))
+    pasos.append({
+        'servicio': model.service_model.service_name,
+        'operacion': model.name,
+        'tabla': paso['tabla'],
+        'ms': round((time.perf_counter() - paso['inicio']) * 1000, 2),
+        'status': http_response.status_code,
+        'rcu': rcu,
+        'wcu': wcu,
+        'reintentos': parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0),
+        'throttles': paso['throttles'],
+        'particiones': paso['particiones'],
+    })
+
+
+def _capacidad(operacion, consumida):
+    """(RCU, WCU) de la respuesta; ``ConsumedCapacity`` es una lista en las operaciones de varias tablas."""
+    if not consumida:
+        return 0, 0
+    rcu = wcu = 0
+    for capacidad in consumida if isinstance(consumida, list) else [consumida]:
+        if 'ReadCapacityUnits' in capacidad or 'WriteCapacityUnits' in capacidad:
+            rcu += capacidad.get('ReadCapacityUnits', 0)
+            wcu += capacidad.get('WriteCapacityUnits', 0)
+        elif operacion in OPERACIONES_LECTURA:
+            rcu += capacidad.get('CapacityUnits', 0)
+        else:
+            wcu += capacidad.get('CapacityUnits', 0)
+    return rcu, wcu
+
+
+def _tablas(params):
+    if 'TableName' in params:
+        return params['TableName']
+    tablas = set(params.get('RequestItems', ()))
+    for operacion in params.get('TransactItems', ()):
+        tablas.update(detalle.get('TableName') for detalle in operacion.values())
+    return ','.join(sorted(tabla for tabla in tablas if tabla)) or None
+
+
+def _particiones(params):
+    """'TABLA:partition key' de los items que toca la llamada, en las tablas de ``PARTICIONES``."""
+    items = []
+    if 'TableName' in params:
+        items.append((params['TableName'], params.get('Key') or params.get('Item')))
+    for operacion in params.get('TransactItems', ()):
+        for detalle in operacion.values():
+            items.append((detalle.get('TableName'), detalle.get('Key') or detalle.get('Item')))
+    for tabla, pedido in params.get('RequestItems', {}).items():
+        # BatchGetItem trae un dict con Keys; BatchWriteItem, una lista de pedidos
+        if isinstance(pedido, dict):
+            items += [(tabla, clave) for clave in pedido.get('Keys', ())]
+    particiones = set()
+    for tabla, item in items:
+        if tabla in PARTICIONES and item and PARTICIONES[tabla] in item:
+            particiones.add(f'{tabla}:{item[PARTICIONES[tabla]]}')
+    return sorted(particiones)
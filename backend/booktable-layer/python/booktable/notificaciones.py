@@ -0,0 +1,77 @@
+"""Outbox de notificaciones.
+
+Los handlers no llaman a SNS: agregan un item a la tabla NOTIFICACIONES dentro
+de la misma transacción que la escritura que lo origina, así la notificación
+existe si y solo si la operación se confirmó. El stream de la tabla dispara
+la Lambda ``notificaciones_worker``, que publica los mensajes en lotes y
+borra los items enviados. Las operaciones masivas, que no escriben en
+transacciones, agregan sus notificaciones con BatchWriteItem una vez que
+confirmaron cada escritura (ver ``nueva``). Los items tienen TTL (``Expira``) por si alguno
+nunca se logra publicar.
+"""
+import json
+import os
+import time
+import uuid
+
+from booktable import aws, transacciones
+
+TABLA = 'NOTIFICACIONES'
+
+TOPICO_RESTAURANTES = 'restaurant-creation-notifications'
+TOPICO_RESERVAS = 'reservation-notifications'
+
+# Días que un item no publicado queda en el outbox
+DIAS_RETENCION = 7
+
+_arns = {}
+
+
+def encolar(topico, asunto, mensaje, atributos=None):
+    """Operación de transacción que agrega una notificación al outbox.
+
+    ``atributos`` son los MessageAttributes (strings) con los que se publica,
+    útiles para filtrar suscripciones (por ejemplo por ``email``).
+    """
+    return transacciones.put(TABLA, nueva(topico, asunto, mensaje, atributos))
+
+
+def nueva(topico, asunto, mensaje, atributos=None):
+    """Item del outbox de una notificación, para escribirlo por lotes (ver ``encolar``)."""
+    ahora = int(time.time())
+    item = {
+        'ID_Notificacion': str(uuid.uuid4()),
+        'Topico': topico,
+        'Asunto': asunto[:100],  # límite de SNS para el Subject
+        'Mensaje': mensaje,
+        'Creada': ahora,
+        'Expira': ahora + DIAS_RETENCION * 24 * 3600
+    }
+    if atributos:
+        item['Atributos'] = {nombre: str(valor) for nombre, valor in atributos.items()}
+    return item
+
+
+def arn_topico(nombre):
+    """ARN del tópico ``nombre``, resuelto una sola vez por contenedor.
+
+    Se toma de la variable de entorno ``TOPICOS_SNS`` (JSON nombre -> ARN) que
+    inyecta Terraform; si no está, se busca recorriendo todas las páginas de
+    ``list_topics``. Devuelve None si el tópico no existe.
+    """
+    if nombre not in _arns:
+        configurados = json.loads(os.environ.get('TOPICOS_SNS') or '{}')
+        arn = configurados.get(nombre) or _buscar_topico(nombre)
+        if arn is None:
+            return None
+        _arns[nombre] = arn
+    return _arns[nombre]
+
+
+def _buscar_topico(nombre):
+    paginator = aws.cliente('sns').get_paginator('list_topics')
+    for pagina in paginator.paginate():
+        for topic in pagina['Topics']:
+            if topic['TopicArn'].split(':')[-1] == nombre:
+                return topic['TopicArn']
+    return None
@@ -0,0 +1,86 @@
+"""Paginación de queries de DynamoDB.
+
+DynamoDB corta cada respuesta de ``query`` en 1 MB y devuelve
+``LastEvaluatedKey`` para seguir. ``iterar_query`` recorre todas las páginas
+de forma perezosa; ``consultar_pagina`` devuelve una página acotada junto con un
+token opaco (``next_token``) para que el cliente pida la siguiente.
+"""
+import base64
+import json
+from decimal import Decimal
+
+LIMITE_POR_DEFECTO = 100
+LIMITE_MAXIMO = 500
+
+
+def iterar_query(table, **kwargs):
+    """Generador con todos los items del query, pidiendo páginas a medida que se consumen."""
+    while True:
+        response = table.query(**kwargs)
+        yield from response.get('Items', [])
+        ultima_clave = response.get('LastEvaluatedKey')
+        if not ultima_clave:
+            return
+        kwargs['ExclusiveStartKey'] = ultima_clave
+
+
+def consultar_pagina(table, limit, next_token=None, **kwargs):
+    """Devuelve ``(items, next_token)`` con a lo sumo ``limit`` items.
+
+    Con ``FilterExpression`` DynamoDB aplica ``Limit`` antes de filtrar, por eso
+    se sigue pidiendo hasta completar la página o agotar el query.
+    ``next_token`` es None cuando no quedan más resultados.
+    """
+    items = []
+    if next_token:
+        kwargs['ExclusiveStartKey'] = decodificar_token(next_token)
+    while len(items) < limit:
+        response = table.query(Limit=limit - len(items), **kwargs)
+        items.extend(response.get('Items', []))
+        ultima_clave = response.get('LastEvaluatedKey')
+        if not ultima_clave:
+            return items, None
+        kwargs['ExclusiveStartKey'] = ultima_clave
+    return items, codificar_token(kwargs['ExclusiveStartKey'])
+
+
+def codificar_token(clave):
+    # Las claves solo pueden ser strings o números (Decimal)
+    valores = {
+        nombre: {'N': str(valor)} if isinstance(valor, Decimal) else {'S': valor}
+        for nombre, valor in clave.items()
+    }
+    return base64.urlsafe_b64encode(json.dumps(valores, separators=(',', ':')).encode()).decode()
+
+
+def decodificar_token(token):
+    """Inversa de ``codificar_token``; lanza ValueError si el token no es válido."""
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return {
+            nombre: Decimal(valor['N']) if 'N' in valor else valor['S']
+            for nombre, valor in valores.items()
+        }
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise ValueError("next_token inválido")
+
+
+def parametros_pagina(params):
+    """Lee ``limit`` y ``next_token`` de los query string parameters.
+
+    Lanza ValueError si ``limit`` no es un entero positivo o el token es inválido.
+    """
+    limit = params.get('limit')
+    if limit is None:
+        limit = LIMITE_POR_DEFECTO
+    else:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError("limit debe ser un número entero")
+        if limit <= 0:
+            raise ValueError("limit debe ser mayor a 0")
+    next_token = params.get('next_token') or None
+    if next_token:
+        decodificar_token(next_token)
+    return min(limit, LIMITE_MAXIMO), next_token
@@ -0,0 +1,76 @@
+"""Verificación de que un restaurante pertenece a un usuario.
+
+Los handlers de administración chequean la propiedad del restaurante en cada
+pedido. Las respuestas se cachean en el contenedor: las positivas por
+``BOOKTABLE_TTL_PROPIETARIOS`` segundos (un restaurante no cambia de dueño)
+y las negativas por menos tiempo, para que un restaurante recién creado no
+quede rechazado. Las escrituras que dependen del dueño igual lo vuelven a
+exigir en su ``ConditionExpression``; el cache solo ahorra la lectura.
+
+Los restaurantes de un usuario se listan con el índice ``ID_Usuario-index``
+de RESTAURANTES.
+"""
+import os
+
+from boto3.dynamodb.conditions import Key
+
+from booktable import aws
+from booktable.cache import CacheLRU
+
+INDICE_PROPIETARIO = 'ID_Usuario-index'
+
+TTL_POSITIVO = float(os.environ.get('BOOKTABLE_TTL_PROPIETARIOS', '300'))
+TTL_NEGATIVO = 5.0
+MAX_ENTRADAS = 1024
+
+_cache = CacheLRU(MAX_ENTRADAS)
+
+
+def clave_restaurante(localidad, categoria, nombre_restaurant):
+    return {'Localidad': localidad, 'Categoria#Nombre_restaurant': f"{categoria}#{nombre_restaurant}"}
+
+
+def es_propietario(localidad, categoria, nombre_restaurant, id_usuario):
+    """True si el restaurante existe y es de ``id_usuario``."""
+    clave = (localidad, categoria, nombre_restaurant, id_usuario)
+    propietario = _cache.obtener(clave)
+    if propietario is not None:
+        return propietario
+
+    response = aws.tabla('RESTAURANTES').get_item(
+        Key=clave_restaurante(localidad, categoria, nombre_restaurant),
+        ProjectionExpression='ID_Usuario'
+    )
+    propietario = response.get('Item', {}).get('ID_Usuario') == id_usuario
+    _cache.guardar(clave, propietario, TTL_POSITIVO if propietario else TTL_NEGATIVO)
+    return propietario
+
+
+def restaurante_de(localidad, categoria, nombre_restaurant, id_usuario, atributos=()):
+    """El item del restaurante con ``atributos`` si existe y es de ``id_usuario``; si no, None.
+
+    Para los handlers que además de verificar al dueño necesitan datos del
+    restaurante: una sola lectura, que también deja cacheada la propiedad.
+    """
+    response = aws.tabla('RESTAURANTES').get_item(
+        Key=clave_restaurante(localidad, categoria, nombre_restaurant),
+        ProjectionExpression=', '.join(['ID_Usuario', *atributos])
+    )
+    item = response.get('Item', {})
+    propietario = item.get('ID_Usuario') == id_usuario
+    _cache.guardar((localidad, categoria, nombre_restaurant, id_usuario), propietario,
+                   TTL_POSITIVO if propietario else TTL_NEGATIVO)
+    return item if propietario else None
+
+
+def olvidar(localidad, categoria, nombre_restaurant, id_usuario):
+    """Descarta lo cacheado, por ejemplo si una escritura condicionada al dueño fue rechazada."""
+    _cache.descartar((localidad, categoria, nombre_restaurant, id_usuario))
+
+
+def query_por_propietario(id_usuario):
+    """Parámetros de query de RESTAURANTES para listar los restaurantes de ``id_usuario``."""
+    return {
+        'IndexName': INDICE_PROPIETARIO,
+        'KeyConditionExpression': Key('ID_Usuario').eq(id_usuario)
+    }
@@ -0,0 +1,292 @@
+"""Items de una reserva.
+
+Una reserva se guarda dos veces: en RESERVAS (por restaurante y horario, para
+el dueño) y en USUARIOS (por usuario, para el cliente). Estas funciones arman
+las dos operaciones de transacción para que todos los handlers que crean
+reservas escriban exactamente los mismos atributos.
+
+Los dos items llevan ``Expira`` (epoch en segundos): el TTL de DynamoDB los
+borra ``BOOKTABLE_DIAS_RETENCION`` días después de que termina la reserva, y
+el stream de RESERVAS los pasa al archivo histórico (ver ``archivo``).
+
+La partition key de RESERVAS (el atributo ``Localidad#Categoria#Nombre_restaurant``)
+depende de ``BOOKTABLE_PARTICION_RESERVAS``:
+
+* ``restaurante`` (por defecto): el restaurante, ``Palermo#Parrilla#X``. Todas
+  sus reservas, de todas las fechas, quedan en una sola partición.
+* ``dia``: el restaurante y la fecha local, ``Palermo#Parrilla#X#2030-01-01``,
+  y con ``BOOKTABLE_SHARDS_RESERVAS`` > 1 también un shard de escritura elegido
+  por mesa, ``Palermo#Parrilla#X#2030-01-01#3``. Una noche con mucha demanda
+  se reparte entre varias particiones en lugar de concentrarse en una.
+
+La sort key (``Fecha_hora#ID_Mesa``) es la compacta de ``horarios.sort_key``:
+el instante en minutos y el índice de la mesa. Las lecturas de un rango de
+horas locales pasan por ``consultar`` y ``consultar_pagina``, que con el
+esquema por día consultan las particiones de cada fecha en paralelo y unen
+los resultados en orden. Solo leen la sort key compacta: las reservas
+existentes se pasan al esquema y a la sort key actuales con
+``scripts/migrar_claves_reservas.py`` (o ``reconstruir_disponibilidad.py``, que
+también les agrega el índice de la mesa) antes de desplegar.
+"""
+import os
+import re
+import zlib
+from datetime import date, timedelta
+
+from boto3.dynamodb.conditions import Key
+
+from booktable import aws, concurrencia, horarios, transacciones
+from booktable.paginacion import codificar_token, decodificar_token, iterar_query
+
+TABLA = 'RESERVAS'
+PK = 'Localidad#Categoria#Nombre_restaurant'
+SK = 'Fecha_hora#ID_Mesa'
+
+DIAS_RETENCION = int(os.environ.get('BOOKTABLE_DIAS_RETENCION', '30'))
+
+PARTICION = os.environ.get('BOOKTABLE_PARTICION_RESERVAS', 'restaurante')
+SHARDS = int(os.environ.get('BOOKTABLE_SHARDS_RESERVAS', '1'))
+ESQUEMAS = ('restaurante', 'dia')
+
+_SUFIJO_DIA = re.compile(r'#\d{4}-\d{2}-\d{2}(#\d+)?$')
+
+
+def expira(timestamp, duracion):
+    """Epoch (segundos) en que vence una reserva que empieza en ``timestamp`` y dura ``duracion`` minutos."""
+    return int(timestamp) + int(duracion) * 60 + DIAS_RETENCION * 24 * 3600
+
+
+def particion(clave_compuesta, fecha, indice, esquema=None, shards=None):
+    """Partition key de la reserva de la mesa ``indice`` en la fecha local ``fecha`` según el esquema
+    (por defecto, el configurado). Las mesas se reparten entre los shards por su índice."""
+    esquema = esquema or PARTICION
+    shards = shards or SHARDS
+    if esquema == 'restaurante':
+        return clave_compuesta
+    if shards == 1:
+        return f'{clave_compuesta}#{fecha[:10]}'
+    return f'{clave_compuesta}#{fecha[:10]}#{int(indice) % shards}'
+
+
+def particiones(clave_compuesta, fecha):
+    """Todas las partition keys en que puede haber reservas del restaurante en ``fecha`` (YYYY-MM-DD)."""
+    if PARTICION == 'restaurante':
+        return [clave_compuesta]
+    if SHARDS == 1:
+        return [f'{clave_compuesta}#{fecha}']
+    return [f'{clave_compuesta}#{fecha}#{shard}' for shard in range(SHARDS)]
+
+
+def instante(item):
+    """Instante (epoch en segundos) de un item de RESERVAS: los minutos de la sort key y los segundos
+    de ``Fecha_hora``. Es la ``Fecha_hora`` del item de la reserva en USUARIOS."""
+    return horarios.decodificar(item[SK])[0] + int(item['Fecha_hora'][17:19] or 0)
+
+
+def indices(item):
+    """Índices de todas las mesas que ocupa una reserva (de RESERVAS o USUARIOS), con las unidas."""
+    return [int(item['Indice_mesa']), *(int(indice) for indice in item.get('Indices_unidos', ()))]
+
+
+def restaurante(item):
+    """Clave compuesta del restaurante de un item de RESERVAS, con cualquiera de los esquemas."""
+    return _SUFIJO_DIA.sub('', item[PK])
+
+
+def clave(clave_compuesta, instante, indice, zona, esquema=None, shards=None):
+    """Clave primaria en RESERVAS de la reserva de la mesa ``indice`` en ``instante`` (epoch)."""
+    return {
+        PK: particion(clave_compuesta, horarios.local(instante, zona), indice, esquema, shards),
+        SK: horarios.sort_key(instante, indice)
+    }
+
+
+def clave_anterior(clave_compuesta, instante, id_mesa):
+    """Clave en RESERVAS de una reserva sin ``Indice_mesa``, que conserva la del esquema anterior a la sort key
+    compacta (``2030-01-01T20:00:00#<ID_Mesa>``, con el shard elegido por ``ID_Mesa``) porque
+    ``scripts/migrar_claves_reservas.py`` no la puede mover."""
+    fecha_hora = horarios.local(instante, horarios.ZONA_POR_DEFECTO)
+    if PARTICION == 'restaurante':
+        pk = clave_compuesta
+    elif SHARDS == 1:
+        pk = f'{clave_compuesta}#{fecha_hora[:10]}'
+    else:
+        pk = f'{clave_compuesta}#{fecha_hora[:10]}#{zlib.crc32(id_mesa.encode("utf-8")) % SHARDS}'
+    return {PK: pk, SK: f'{fecha_hora}#{id_mesa}'}
+
+
+def hay_claves_anteriores(clave_compuesta, desde, hasta, zona):
+    """Si quedan reservas del rango con la clave de ``clave_anterior`` (sin migrar), que ``consultar`` no ve.
+
+    Hace una query de un item por partición: es para las operaciones que no
+    pueden dejar reservas afuera sin avisar, no para las lecturas comunes.
+    """
+    inicio, fin = horarios.rango(desde, hasta, zona)
+    # La clave anterior está en hora de Buenos Aires, con segundos
+    sk_desde = horarios.local(int(inicio) * 60, horarios.ZONA_POR_DEFECTO)
+    sk_hasta = horarios.local(int(fin.rstrip(horarios.FIN_DE_RANGO)) * 60 + 59, horarios.ZONA_POR_DEFECTO) + horarios.FIN_DE_RANGO
+    pks = [pk for grupo in _grupos(clave_compuesta, sk_desde, sk_hasta) for pk in grupo]
+    consulta = {'Limit': 1, 'ProjectionExpression': '#sk', 'ExpressionAttributeNames': {'#sk': SK}}
+    return any(concurrencia.mapear(lambda pk: _pagina_particion(pk, sk_desde, sk_hasta, consulta), pks))
+
+
+def _grupos(clave_compuesta, desde, hasta):
+    """Partition keys del rango agrupadas en orden: todas las de un grupo van antes que las del siguiente."""
+    if PARTICION == 'restaurante':
+        return [[clave_compuesta]]
+    inicio, fin = date.fromisoformat(desde[:10]), date.fromisoformat(hasta[:10])
+    return [particiones(clave_compuesta, (inicio + timedelta(days=dia)).isoformat())
+            for dia in range((fin - inicio).days + 1)]
+
+
+def _query(pk, sk_desde, sk_hasta, **kwargs):
+    """Reservas de una partición entre dos sort keys (de ``horarios.rango``). Corre en el pool."""
+    return list(iterar_query(
+        aws.cliente('dynamodb'),
+        TableName=TABLA,
+        KeyConditionExpression=Key(PK).eq(pk) & Key(SK).between(sk_desde, sk_hasta),
+        **kwargs
+    ))
+
+
+def consultar(clave_compuesta, desde, hasta, zona, **kwargs):
+    """Todas las reservas del restaurante entre ``desde`` y ``hasta`` (inclusive), en orden.
+
+    ``desde`` y ``hasta`` son horas locales de la ``zona`` del restaurante: una
+    fecha o una fecha y hora ISO. Las particiones se consultan en paralelo; no
+    se puede llamar desde una tarea de ``concurrencia.mapear`` (ver
+    ``consultar_particion``).
+    """
+    sk_desde, sk_hasta = horarios.rango(desde, hasta, zona)
+    pks = [pk for grupo in _grupos(clave_compuesta, desde, hasta) for pk in grupo]
+    consulta = _con_sort_key(kwargs)
+    resultados = concurrencia.mapear(lambda pk: _query(pk, sk_desde, sk_hasta, **consulta), pks)
+    return _ordenar([item for items in resultados for item in items], kwargs)
+
+
+def consultar_particion(pk, desde, hasta, zona, **kwargs):
+    """Como ``consultar`` pero de una sola partición (de ``particiones``), para usar dentro del pool."""
+    return _query(pk, *horarios.rango(desde, hasta, zona), **kwargs)
+
+
+def consultar_pagina(clave_compuesta, desde, hasta, zona, limit, next_token=None, **kwargs):
+    """Devuelve ``(items, next_token)`` con a lo sumo ``limit`` reservas del rango, en orden.
+
+    El token es el sort key de la última reserva devuelta (ValueError si no es
+    uno) y la página siguiente empieza en el sort key posterior. Las
+    particiones se consultan de a ventanas de ``concurrencia.MAX_HILOS``, en
+    paralelo, y se corta en cuanto se junta la página (cada partición devuelve
+    como mucho ``limit + 1`` items).
+    """
+    inicio, fin = horarios.rango(desde, hasta, zona)
+    dia_inicio = desde
+    if next_token:
+        inicio = horarios.siguiente(decodificar_token(next_token).get(SK, ''))
+        dia_inicio = horarios.local(horarios.decodificar(inicio)[0], zona)
+    grupos = _grupos(clave_compuesta, dia_inicio, hasta)
+
+    consulta = dict(_con_sort_key(kwargs), Limit=limit + 1)
+
+    items = []
+    for posicion in range(0, len(grupos), concurrencia.MAX_HILOS):
+        pks = [pk for grupo in grupos[posicion:posicion + concurrencia.MAX_HILOS] for pk in grupo]
+        resultados = concurrencia.mapear(lambda pk: _pagina_particion(pk, inicio, fin, consulta), pks)
+        items += sorted((item for resultado in resultados for item in resultado), key=lambda item: item[SK])
+        if len(items) > limit:
+            break
+
+    token = codificar_token({SK: items[limit - 1][SK]}) if len(items) > limit else None
+    return _ordenar(items[:limit], kwargs), token
+
+
+def _pagina_particion(pk, sk_desde, sk_hasta, consulta):
+    response = aws.cliente('dynamodb').query(
+        TableName=TABLA,
+        KeyConditionExpression=Key(PK).eq(pk) & Key(SK).between(sk_desde, sk_hasta),
+        **consulta
+    )
+    return response.get('Items', [])
+
+
+def _con_sort_key(kwargs):
+    """Agrega el sort key a la proyección: hace falta para ordenar y para el token."""
+    if 'ProjectionExpression' not in kwargs:
+        return kwargs
+    return dict(
+        kwargs,
+        ProjectionExpression=f"{kwargs['ProjectionExpression']}, #sk_orden",
+        ExpressionAttributeNames=dict(kwargs.get('ExpressionAttributeNames', {}), **{'#sk_orden': SK})
+    )
+
+
+def _ordenar(items, kwargs):
+    """Ordena por sort key y se lo quita a los items si no estaba en la proyección pedida."""
+    items.sort(key=lambda item: item[SK])
+    if 'ProjectionExpression' in kwargs and SK not in kwargs.get('ExpressionAttributeNames', {}).values():
+        for item in items:
+            del item[SK]
+    return items
+
+
+def crear(localidad, categoria, nombre_restaurant, timestamp, mesa, usuario, nombre, email, comensales, duracion, zona,
+          unidas=()):
+    """Operaciones [RESERVAS, USUARIOS] que crean la reserva.
+
+    ``mesa`` es la mesa del inventario (con ``ID_Mesa`` e ``Indice``),
+    ``duracion``, los minutos que la reserva ocupa la mesa y ``zona``, la
+    zona horaria del restaurante. Ambas operaciones fallan si la mesa ya está
+    reservada en el horario o si el usuario ya tiene una reserva a esa hora,
+    respectivamente.
+
+    Si el grupo ocupa varias mesas unidas (ver ``combinaciones``), ``mesa`` es
+    la de menor índice, que da la clave en RESERVAS, y ``unidas`` las demás:
+    los dos items las guardan en ``Mesas_unidas`` e ``Indices_unidos``.
+    """
+    fecha_hora = horarios.local(timestamp, zona)
+    vencimiento = expira(timestamp, duracion)
+    extra = {}
+    if unidas:
+        extra = {
+            'Mesas_unidas': [unida['ID_Mesa'] for unida in unidas],
+            'Indices_unidos': [unida['Indice'] for unida in unidas]
+        }
+    return [
+        transacciones.put(
+            TABLA,
+            {
+                **clave(f"{localidad}#{categoria}#{nombre_restaurant}", timestamp, mesa['Indice'], zona),
+                'Fecha_hora': fecha_hora,
+                'ID_Mesa': mesa['ID_Mesa'],
+                'Indice_mesa': mesa['Indice'],
+                'ID_Usuario': usuario,
+                'Nombre_usuario': nombre,
+                'Mail_usuario': email,
+                'Comensales': comensales,
+                'Duracion': duracion,
+                'Expira': vencimiento,
+                **extra
+            },
+            condicion='attribute_not_exists(#sk)',
+            nombres={'#sk': SK}
+        ),
+        transacciones.put(
+            'USUARIOS',
+            {
+                'ID_Usuario': usuario,
+                'Fecha_hora': timestamp,
+                'Localidad': localidad,
+                'Categoria': categoria,
+                'Nombre_restaurant': nombre_restaurant,
+                'Nombre_usuario': nombre,
+                'Mail_usuario': email,
+                'Comensales': comensales,
+                'ID_Mesa': mesa['ID_Mesa'],
+                'Indice_mesa': mesa['Indice'],
+                'Duracion': duracion,
+                'Zona_horaria': zona,
+                'Expira': vencimiento,
+                **extra
+            },
+            condicion='attribute_not_exists(ID_Usuario)'
+        )
+    ]
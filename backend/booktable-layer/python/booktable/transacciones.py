@@ -0,0 +1,68 @@
+"""Escrituras transaccionales (TransactWriteItems) sobre DynamoDB.
+
+El cliente de ``aws.cliente('dynamodb')`` es el del resource, así que acepta
+valores nativos de Python (str, int, dict...) igual que ``Table.put_item``.
+"""
+from booktable import aws
+
+
+class TransaccionCancelada(Exception):
+    """La transacción fue cancelada; ``motivos`` tiene un código por operación.
+
+    El código es None para las operaciones que no causaron la cancelación, y
+    por ejemplo 'ConditionalCheckFailed' o 'TransactionConflict' para las demás.
+    """
+
+    def __init__(self, motivos):
+        super().__init__(f"Transacción cancelada: {motivos}")
+        self.motivos = motivos
+
+    def fallo_condicion(self, indice):
+        return self.motivos[indice] == 'ConditionalCheckFailed'
+
+
+def put(tabla, item, condicion=None, nombres=None, valores=None):
+    operacion = {'TableName': tabla, 'Item': item}
+    return {'Put': _con_condicion(operacion, condicion, nombres, valores)}
+
+
+def delete(tabla, clave, condicion=None, nombres=None, valores=None):
+    operacion = {'TableName': tabla, 'Key': clave}
+    return {'Delete': _con_condicion(operacion, condicion, nombres, valores)}
+
+
+def update(tabla, clave, expresion, condicion=None, nombres=None, valores=None):
+    operacion = {'TableName': tabla, 'Key': clave, 'UpdateExpression': expresion}
+    return {'Update': _con_condicion(operacion, condicion, nombres, valores)}
+
+
+def condition_check(tabla, clave, condicion, nombres=None, valores=None):
+    operacion = {'TableName': tabla, 'Key': clave}
+    return {'ConditionCheck': _con_condicion(operacion, condicion, nombres, valores)}
+
+
+def _con_condicion(operacion, condicion, nombres, valores):
+    if condicion:
+        operacion['ConditionExpression'] = condicion
+    if nombres:
+        operacion['ExpressionAttributeNames'] = nombres
+    if valores:
+        operacion['ExpressionAttributeValues'] = valores
+    return operacion
+
+
+def ejecutar(operaciones):
+    """Ejecuta las operaciones en una sola TransactWriteItems.
+
+    Lanza TransaccionCancelada si alguna condición falla o hay un conflicto con
+    otra transacción en curso.
+    """
+    cliente = aws.cliente('dynamodb')
+    try:
+        cliente.transact_write_items(TransactItems=operaciones)
+    except cliente.exceptions.TransactionCanceledException as e:
+        motivos = [
+            None if motivo.get('Code') in (None, 'None') else motivo['Code']
+            for motivo in e.response.get('CancellationReasons', [])
+        ]
+        raise TransaccionCancelada(motivos) from e
@@ -0,0 +1,43 @@
+"""Marcadores de versión para invalidar los caches de los contenedores.
+
+Cada escritura que cambia un listado cacheado incrementa, en la misma
+transacción, el contador de VERSIONES de ese listado (por ejemplo los
+restaurantes de una localidad). Los lectores guardan la versión junto a lo
+cacheado y lo descartan cuando cambia. La versión vigente se relee como mucho
+cada ``BOOKTABLE_TTL_VERSIONES`` segundos, que es lo que tarda un cambio en
+verse desde un contenedor que ya lo tenía cacheado.
+"""
+import os
+
+from booktable import aws, transacciones
+from booktable.cache import CacheLRU
+
+TABLA = 'VERSIONES'
+
+TTL_LECTURA = float(os.environ.get('BOOKTABLE_TTL_VERSIONES', '5'))
+MAX_ENTRADAS = 1024
+
+_cache = CacheLRU(MAX_ENTRADAS)
+
+
+def clave_restaurantes(localidad):
+    return f'RESTAURANTES#{localidad}'
+
+
+def incrementar(clave):
+    """Operación de transacción que incrementa la versión de ``clave``."""
+    return transacciones.update(
+        TABLA, {'Clave': clave},
+        'ADD Version :uno',
+        valores={':uno': 1}
+    )
+
+
+def leer(clave):
+    """Versión vigente de ``clave`` (0 si nunca se incrementó)."""
+    version = _cache.obtener(clave)
+    if version is None:
+        response = aws.tabla(TABLA).get_item(Key={'Clave': clave}, ProjectionExpression='Version')
+        version = int(response.get('Item', {}).get('Version', 0))
+        _cache.guardar(clave, version, TTL_LECTURA)
+    return version
@@ -0,0 +1,133 @@
+import os
+
+from boto3.dynamodb.conditions import Key
+
+from booktable import asignacion, aws, combinaciones, disponibilidad, horarios, lotes, metricas
+from booktable.http import respuesta, leer_query
+from booktable.paginacion import iterar_query
+
+METODOS = 'OPTIONS,GET'
+
+# Misma demanda que usa crear_reserva, así la búsqueda ofrece lo mismo que después se puede reservar
+DEMANDA_ESPERADA = asignacion.demanda_esperada(os.environ.get('DEMANDA_ESPERADA'))
+
+table = aws.tabla('RESTAURANTES')
+
+
+@metricas.instrumentar
+def buscar_disponibilidad(event, context):
+    params = leer_query(event)
+
+    localidad = params.get('localidad')
+    categoria = params.get('categoria')
+
+    faltantes = [campo for campo in ('localidad', 'datetime', 'comensales') if not params.get(campo)]
+    if faltantes:
+        return respuesta(400, {'error': f"Missing parameters: {', '.join(faltantes)}"}, METODOS)
+
+    try:
+        fecha_hora_timestamp = int(params['datetime'])
+        comensales = int(params['comensales'])
+    except ValueError:
+        return respuesta(400, {'error': '"datetime" and "comensales" must be integers'}, METODOS)
+
+    # La duración es opcional: si no viene se usa la de cada restaurante
+    duracion = None
+    if params.get('duracion'):
+        try:
+            duracion = disponibilidad.validar_duracion(params['duracion'])
+        except ValueError as e:
+            return respuesta(400, {'error': str(e)}, METODOS)
+
+    try:
+        # Paso 1: Restaurantes candidatos de la localidad (y categoría), con su inventario de mesas
+        key_condition = Key('Localidad').eq(localidad)
+        if categoria:
+            key_condition &= Key('Categoria#Nombre_restaurant').begins_with(categoria)
+
+        restaurantes = [
+            restaurante for restaurante in iterar_query(
+                table,
+                KeyConditionExpression=key_condition,
+                ProjectionExpression='Localidad, #sk, ID_Usuario, Mesas, Uniones, Duracion_reserva, Zona_horaria',
+                ExpressionAttributeNames={'#sk': 'Categoria#Nombre_restaurant'}
+            )
+            if puede_sentar(restaurante, comensales)
+        ]
+
+        # Paso 2: Mesas ocupadas de todos los candidatos durante la reserva (en la hora local de cada uno),
+        # en lotes concurrentes
+        franjas = {
+            f"{restaurante['Localidad']}#{restaurante['Categoria#Nombre_restaurant']}": franjas_restaurante(
+                restaurante, fecha_hora_timestamp, duracion or disponibilidad.duracion(restaurante))
+            for restaurante in restaurantes
+        }
+        ocupadas = leer_ocupadas(franjas)
+
+        # Paso 3: Quedarse con los restaurantes que tienen una mesa (o mesas unidas) que crear_reserva asignaría
+        items = []
+        for restaurante in restaurantes:
+            clave_compuesta = f"{restaurante['Localidad']}#{restaurante['Categoria#Nombre_restaurant']}"
+            restaurante.pop('Duracion_reserva', None)
+            restaurante.pop('Zona_horaria', None)
+            inventario = restaurante.pop('Mesas')
+            uniones = restaurante.pop('Uniones', [])
+            indices_ocupados = ocupadas.get(clave_compuesta, set())
+            mesas_libres = disponibilidad.mesas_libres(inventario, indices_ocupados, 0)
+            adecuadas = [mesa for mesa in mesas_libres if int(mesa['Capacidad']) >= comensales]
+            if adecuadas:
+                demanda = asignacion.demanda_restante(DEMANDA_ESPERADA, len(indices_ocupados) + 1)
+                if asignacion.ordenar_candidatas(mesas_libres, comensales, demanda):
+                    restaurante['Mesas_libres'] = len(adecuadas)
+                    items.append(restaurante)
+                continue
+            candidatas = combinaciones.buscar(inventario, uniones, indices_ocupados, comensales)
+            if candidatas:
+                restaurante['Mesas_libres'] = 0
+                restaurante['Mesas_unidas'] = len(candidatas[0])
+                items.append(restaurante)
+
+        return respuesta(200, {'items': items}, METODOS)
+
+    except Exception as e:
+        return respuesta(500, {'error': str(e)}, METODOS)
+
+
+def puede_sentar(restaurante, comensales):
+    """Si el grupo entra en alguna mesa del restaurante o, sumando capacidades, en sus mesas unibles."""
+    mesas = restaurante.get('Mesas', [])
+    if any(int(mesa['Capacidad']) >= comensales for mesa in mesas):
+        return True
+    unibles = {int(indice) for union in restaurante.get('Uniones', []) for indice in union if int(indice) < len(mesas)}
+    return sum(int(mesas[indice]['Capacidad']) for indice in unibles) >= comensales
+
+
+def franjas_restaurante(restaurante, instante, duracion):
+    """Franjas que ocuparía una reserva en el restaurante, en su hora local."""
+    zona = horarios.zona_de(restaurante)
+    return disponibilidad.franjas(horarios.local(instante, zona), duracion, zona)
+
+
+def leer_ocupadas(franjas):
+    """Devuelve {clave compuesta: índices ocupados} a partir de {clave compuesta: franjas de la reserva}."""
+    if not franjas:
+        return {}
+    claves = [
+        clave
+        for clave_compuesta, franjas_restaurante in franjas.items()
+        for clave in disponibilidad.claves(clave_compuesta, franjas_restaurante)
+    ]
+    items = lotes.batch_get({
+        disponibilidad.TABLA: {
+            'Keys': claves,
+            'ProjectionExpression': '#pk, Fecha_hora, Ocupadas',
+            'ExpressionAttributeNames': {'#pk': 'Localidad#Categoria#Nombre_restaurant'}
+        }
+    })
+    por_restaurante = {}
+    for item in items[disponibilidad.TABLA]:
+        por_restaurante.setdefault(item['Localidad#Categoria#Nombre_restaurant'], []).append(item)
+    return {
+        clave_compuesta: disponibilidad.ocupadas_en(items_restaurante, franjas[clave_compuesta])
+        for clave_compuesta, items_restaurante in por_restaurante.items()
+    }
@@ -1,59 +1,74 @@
-import boto3
-import json
+import os
+
 from boto3.dynamodb.conditions import Key
 
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table('RESTAURANTES')  # Replace with your DynamoDB table name
+from booktable import aws, metricas, versiones
+from booktable.cache import CacheLRU
+from booktable.http import respuesta, leer_query, etag, etag_coincide, no_modificado
+from booktable.paginacion import consultar_pagina, parametros_pagina
+
+METODOS = 'OPTIONS,GET'
+
+# Cuánto sirve el contenedor una búsqueda cacheada si la versión de la localidad no cambia
+TTL_BUSQUEDAS = float(os.environ.get('BOOKTABLE_TTL_BUSQUEDAS', '300'))
+MAX_BUSQUEDAS = 512
+
+# Lo que pueden cachear el navegador, API Gateway o un CDN delante de la API
+CACHE_CONTROL = f"public, max-age={os.environ.get('BOOKTABLE_MAX_AGE_BUSQUEDAS', '30')}"
 
+table = aws.tabla('RESTAURANTES')
+
+_busquedas = CacheLRU(MAX_BUSQUEDAS)
+
+
+@metricas.instrumentar
 def buscar_restaurant(event, context):
-    params = event.get('queryStringParameters', {}) or {}
-    
+    params = leer_query(event)
+
     localidad = params.get('localidad')
-    categoria = params.get('categoria')  
+    categoria = params.get('categoria')
 
     if not localidad:
-        return {
-            'statusCode': 400,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,GET',
-                'Content-Type': 'application/json'
-            },
-            'body': json.dumps({'error': 'Missing "localidad" parameter'})
-        }
+        return respuesta(400, {'error': 'Missing "localidad" parameter'}, METODOS)
 
     try:
-        key_condition = Key('Localidad').eq(localidad)
-        
-        if categoria:
-            key_condition &= Key('Categoria#Nombre_restaurant').begins_with(categoria)
-        
-        response = table.query(
-            KeyConditionExpression=key_condition
-        )
-
-        items = response.get('Items', [])
-        
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',  
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,GET',
-                'Content-Type': 'application/json'
-            },
-            'body': json.dumps(items)
-        }
+        limit, next_token = parametros_pagina(params)
+    except ValueError as e:
+        return respuesta(400, {'error': str(e)}, METODOS)
 
+    try:
+        # La versión cambia cada vez que se crea un restaurante en la localidad
+        version = versiones.leer(versiones.clave_restaurantes(localidad))
+
+        clave = (localidad, categoria or '', limit, next_token or '')
+        busqueda = _busquedas.obtener(clave)
+        if busqueda is None or busqueda['version'] != version:
+            busqueda = buscar(localidad, categoria, limit, next_token)
+            busqueda['version'] = version
+            _busquedas.guardar(clave, busqueda, TTL_BUSQUEDAS)
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,GET',
-                'Content-Type': 'application/json'
-            },
-            'body': json.dumps({'error': str(e)})
-        }
+        return respuesta(500, {'error': str(e)}, METODOS)
+
+    headers = {'ETag': busqueda['etag'], 'Cache-Control': CACHE_CONTROL}
+    if etag_coincide(event, busqueda['etag']):
+        return no_modificado(METODOS, headers)
+    return respuesta(200, busqueda['body'], METODOS, headers=headers, event=event)
+
+
+def buscar(localidad, categoria, limit, next_token):
+    """Consulta RESTAURANTES y devuelve el body de la respuesta con su ETag."""
+    key_condition = Key('Localidad').eq(localidad)
+
+    if categoria:
+        key_condition &= Key('Categoria#Nombre_restaurant').begins_with(categoria)
+
+    # El inventario de mesas (Mesas) no se expone en la búsqueda
+    items, next_token = consultar_pagina(
+        table, limit, next_token,
+        KeyConditionExpression=key_condition,
+        ProjectionExpression='Localidad, #sk, ID_Usuario',
+        ExpressionAttributeNames={'#sk': 'Categoria#Nombre_restaurant'}
+    )
+
+    body = {'items': items, 'next_token': next_token}
+    return {'body': body, 'etag': etag(body)}
@@ -1,238 +1,156 @@
-import boto3
-from boto3.dynamodb.conditions import Key, Attr
-import json
-from datetime import datetime, timedelta
+import os
 
-dynamodb = boto3.resource('dynamodb')
+from booktable import admision, asignacion, combinaciones, disponibilidad, horarios, idempotencia, metricas, notificaciones, reservas, transacciones
+from booktable.http import respuesta, leer_body, campos_vacios, error_campos_vacios, MENSAJE_JSON_INVALIDO
 
+METODOS = 'OPTIONS,POST'
+
+# Cantidad de intentos si otras reservas concurrentes toman la mesa elegida
+MAX_INTENTOS = 3
+
+# Demanda típica del horario para la estrategia 'anticipada', por ejemplo "2:6,4:3,6:1"
+DEMANDA_ESPERADA = asignacion.demanda_esperada(os.environ.get('DEMANDA_ESPERADA'))
+
+MENSAJE_SIN_MESAS = "No hay mesas disponibles para la cantidad de comensales en el horario seleccionado."
+MENSAJE_SATURADO = "Error: Hay demasiados pedidos para este restaurante en este momento. Intente nuevamente en unos segundos."
+
+
+def format_reserva_message(user_name, nombre_restaurant, localidad, fecha_hora, comensales, table_id):
+    return f"""
+¡Hola {user_name}! Tu reserva fue confirmada.
+
+Detalles de la reserva:
+Restaurante: {nombre_restaurant}
+Localidad: {localidad}
+Fecha y hora: {fecha_hora}
+Comensales: {comensales}
+Mesa: {table_id}
+"""
+
+@metricas.instrumentar
+@idempotencia.idempotente(METODOS)
 def crear_reserva(event, context):
-    try:
-        # Analizar el cuerpo de la solicitud
-        body = json.loads(event.get('body', '{}'))
-    except json.JSONDecodeError:
-        return {
-            'statusCode': 400,
-            'body': json.dumps("Error: Cuerpo de la solicitud no es un JSON válido."),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST'
-            }
-        }
-    
+    # Analizar el cuerpo de la solicitud
+    body = leer_body(event)
+    if body is None:
+        return respuesta(400, MENSAJE_JSON_INVALIDO, METODOS)
+
     # Verificar si todos los campos están presentes y no vacíos
     campos_requeridos = ['localidad', 'categoria', 'nombre_restaurant', 'datetime', 'comensales', 'user_id', 'user_name', 'email']
-    campos_vacios = [campo for campo in campos_requeridos if not body.get(campo)]
-
-    if campos_vacios:
-        return {
-            'statusCode': 400,
-            'body': json.dumps(f"Error: Todos los campos son requeridos. Los siguientes campos están vacíos o ausentes: {', '.join(campos_vacios)}"),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST'
-            }
-        }
- 
+    faltantes = campos_vacios(body, campos_requeridos)
+    if faltantes:
+        return error_campos_vacios(faltantes, METODOS)
+
     localidad = body['localidad']
     categoria = body['categoria']
     nombre_restaurant = body['nombre_restaurant']
     fecha_hora_timestamp = int(body['datetime'])
-    fecha_hora_utc = datetime.utcfromtimestamp(fecha_hora_timestamp)
-    fecha_hora_gmt3 = (fecha_hora_utc - timedelta(hours=3)).isoformat()
     comensales = int(body['comensales'])
     user_id = body['user_id']
     user_name = body['user_name']
     user_email = body['email']
-    
-
-    reservas_table = dynamodb.Table('RESERVAS')
-    mesas_table = dynamodb.Table('MESAS')
-    usuarios_table = dynamodb.Table('USUARIOS')
-    restaurantes_table = dynamodb.Table('RESTAURANTES')
-    
-    # Paso 0: Verificar si el usuario ya tiene una reserva en esa fecha y hora
-    try:
-        response_usuario = usuarios_table.get_item(
-            Key={
-                'ID_Usuario': user_id,
-                'Fecha_hora': fecha_hora_timestamp
-            }
-        )
-        
-        # Verificar si existe una reserva
-        if 'Item' in response_usuario:
-            return {
-                'statusCode': 400,
-                'body': json.dumps(f"Error: El usuario '{user_name}' ya tiene una reserva en la fecha y hora seleccionadas."),
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                    'Access-Control-Allow-Methods': 'OPTIONS,POST'
-                }
-            }
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'body': json.dumps(f"Error consultando la tabla USUARIOS: {str(e)}"),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST'
-            }
-        }
-    
-    # Paso 1: Verificar si el restaurante existe en la tabla RESTAURANTES
-    try:
-        response_restaurante = restaurantes_table.get_item(
-            Key={
-                'Localidad': localidad,            
-                'Categoria#Nombre_restaurant': f"{categoria}#{nombre_restaurant}"  
-            }
-        )
-        # Verificar si existe el restaurante
-        if 'Item' not in response_restaurante:
-            return {
-                'statusCode': 404,
-                'body': json.dumps(f"Error: El restaurante '{nombre_restaurant}' con categoria '{categoria}' no existe en la localidad '{localidad}'."),
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                    'Access-Control-Allow-Methods': 'OPTIONS,POST'
-                }
-            }
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'body': json.dumps(f"Error consultando la tabla RESTAURANTES: {str(e)}"),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST'
-            }
-
-        }
-    
-    # Paso 2: Hacer query en tabla RESERVAS para obtener mesas ocupadas
+
+    # La duración es opcional: si no viene se usa la del restaurante
+    duracion = None
+    if body.get('duracion'):
+        try:
+            duracion = disponibilidad.validar_duracion(body['duracion'])
+        except ValueError as e:
+            return respuesta(400, f"Error: {str(e)}", METODOS)
+
     clave_compuesta = f"{localidad}#{categoria}#{nombre_restaurant}"
-    
-    try:
-        # Vamos a consultar todas las reservas que coinciden con la clave primaria y tienen la misma fecha
-        response_reservas = reservas_table.query(
-            KeyConditionExpression=Key('Localidad#Categoria#Nombre_restaurant').eq(clave_compuesta) & 
-                                   Key('Fecha_hora#ID_Mesa').begins_with(f"{fecha_hora_gmt3}#")
-        )
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'body': json.dumps(f"Error consultando la tabla RESERVAS: {str(e)}"),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST'
-            }
-
-        }
-    
-    # Paso 3: Extraemos los table_ids ocupados del atributo ID_Mesa
-    reservas = response_reservas.get('Items', [])
-    table_ids_ocupados = [reserva['ID_Mesa'] for reserva in reservas]
-    
-    # Paso 4: Hacer query en tabla MESAS para buscar mesas disponibles
+    clave_restaurante = {
+        'Localidad': localidad,
+        'Categoria#Nombre_restaurant': f"{categoria}#{nombre_restaurant}"
+    }
+
+    # Paso 0: Control de admisión: si el horario ya está lleno de pedidos o agotado se responde sin leer nada
+    motivo, espera = admision.admitir(clave_compuesta, fecha_hora_timestamp, comensales, duracion)
+    if motivo == admision.AGOTADO:
+        return respuesta(400, MENSAJE_SIN_MESAS, METODOS, headers={'Retry-After': str(espera)})
+    if motivo == admision.LIMITE:
+        return respuesta(429, MENSAJE_SATURADO, METODOS, headers={'Retry-After': str(espera)})
+    duracion_pedida = duracion
+
+    # Paso 1: Leer en un solo pedido el inventario de mesas del restaurante y las mesas ocupadas durante la reserva
     try:
-        response_mesas = mesas_table.query(
-            KeyConditionExpression=Key('Localidad#Categoria#Nombre_restaurant').eq(clave_compuesta),
-            FilterExpression=Attr('Capacidad').gte(comensales)  # Filtra por capacidad como atributo
-        )
+        restaurante, fecha_hora_local, items_disponibilidad = disponibilidad.leer_restaurante(
+            clave_restaurante, clave_compuesta, fecha_hora_timestamp, duracion)
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'body': json.dumps(f"Error consultando la tabla MESAS: {str(e)}"),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST'
-            }
-        }
-    
-    # Filtrar las mesas ocupadas
-    mesas_disponibles = [mesa for mesa in response_mesas.get('Items', []) if mesa['ID_Mesa'] not in table_ids_ocupados]
-    
-    # Paso 5: Comprobamos si hay mesas disponibles
-    
-    if mesas_disponibles:
-        # Seleccionamos la primera mesa disponible
-        mesa_seleccionada = mesas_disponibles[0]
-        table_id = mesa_seleccionada['ID_Mesa']
-        
-        # Paso 6a: Crear nueva reserva en la tabla RESERVAS
-        try:
-            reservas_table.put_item(
-                Item={
-                    'Localidad#Categoria#Nombre_restaurant': clave_compuesta,
-                    'Fecha_hora#ID_Mesa': f"{fecha_hora_gmt3}#{table_id}",
-                    'Fecha_hora': fecha_hora_gmt3,
-                    'ID_Mesa': table_id,
-                    'Nombre_usuario': user_name,
-                    'Mail_usuario': user_email,
-                    'Comensales': comensales
-                }
-            )
-        except Exception as e:
-            return {
-                'statusCode': 500,
-                'body': json.dumps(f"Error creando la reserva en la tabla RESERVAS: {str(e)}"),
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                    'Access-Control-Allow-Methods': 'OPTIONS,POST'
-                }
-            }
-        
-        # Paso 6b: Asociar la reserva al usuario en la tabla USUARIOS
+        if admision.saturado(e):
+            return respuesta(429, MENSAJE_SATURADO, METODOS, headers={'Retry-After': '1'})
+        return respuesta(500, f"Error consultando la disponibilidad del restaurante: {str(e)}", METODOS)
+
+    if restaurante is None:
+        return respuesta(404, f"Error: El restaurante '{nombre_restaurant}' con categoria '{categoria}' no existe en la localidad '{localidad}'.", METODOS)
+
+    inventario = restaurante.get('Mesas', [])
+    uniones = restaurante.get('Uniones', [])
+    zona = horarios.zona_de(restaurante)
+    duracion = duracion or disponibilidad.duracion(restaurante)
+    franjas = disponibilidad.franjas(fecha_hora_local, duracion, zona)
+    indices_ocupados = disponibilidad.ocupadas_en(items_disponibilidad, franjas)
+
+    for intento in range(MAX_INTENTOS):
+        # Paso 2: Elegir la mesa entre las libres según la estrategia de asignación; si el grupo no entra
+        # en ninguna mesa libre, elegir una combinación de mesas que se puedan unir
+        mesas_libres = disponibilidad.mesas_libres(inventario, indices_ocupados, 0)
+        if any(int(mesa['Capacidad']) >= comensales for mesa in mesas_libres):
+            # Cada mesa ocupada del horario cuenta como un grupo que ya llegó, más este
+            demanda = asignacion.demanda_restante(DEMANDA_ESPERADA, len(indices_ocupados) + 1)
+            candidatas = [[mesa] for mesa in asignacion.ordenar_candidatas(mesas_libres, comensales, demanda)]
+        else:
+            candidatas = [
+                [dict(inventario[indice], Indice=indice) for indice in combinacion]
+                for combinacion in combinaciones.buscar(inventario, uniones, indices_ocupados, comensales)
+            ]
+        if not candidatas:
+            # No hay mesas disponibles: los próximos pedidos de este tamaño o más se rechazan en el paso 0
+            espera = admision.registrar_agotado(clave_compuesta, fecha_hora_timestamp, comensales, duracion_pedida)
+            return respuesta(400, MENSAJE_SIN_MESAS, METODOS, headers={'Retry-After': str(espera)} if espera else None)
+
+        mesa, *unidas = candidatas[0]
+        table_id = ', '.join(elegida['ID_Mesa'] for elegida in candidatas[0])
+        if unidas:
+            ocupacion = disponibilidad.ocupar_varias(clave_compuesta, franjas, [elegida['Indice'] for elegida in candidatas[0]])
+        else:
+            ocupacion = disponibilidad.ocupar(clave_compuesta, franjas, mesa['Indice'])
+
+        # Paso 3: Ocupar la mesa (o las mesas unidas) en cada franja de DISPONIBILIDAD y crear la reserva en
+        # RESERVAS y USUARIOS en una sola transacción
         try:
-            usuarios_table.put_item(
-                Item={
-                    'ID_Usuario': user_id,
-                    'Fecha_hora': fecha_hora_timestamp,
-                    'Localidad': localidad,
-                    'Categoria': categoria,
-                    'Nombre_restaurant': nombre_restaurant,
-                    'Nombre_usuario': user_name,
-                    'Mail_usuario': user_email,
-                    'Comensales': comensales,
-                    'ID_Mesa': table_id
-                }
-            )
+            transacciones.ejecutar([
+                *ocupacion,
+                *reservas.crear(localidad, categoria, nombre_restaurant, fecha_hora_timestamp, mesa,
+                                user_id, user_name, user_email, comensales, duracion, zona, unidas),
+                notificaciones.encolar(
+                    notificaciones.TOPICO_RESERVAS,
+                    f'Reserva confirmada - {nombre_restaurant}',
+                    format_reserva_message(user_name, nombre_restaurant, localidad, fecha_hora_local, comensales, table_id),
+                    atributos={'tipo': 'reserva_confirmada', 'email': user_email}
+                )
+            ])
+        except transacciones.TransaccionCancelada as e:
+            if e.fallo_condicion(len(franjas) + 1):
+                return respuesta(400, f"Error: El usuario '{user_name}' ya tiene una reserva en la fecha y hora seleccionadas.", METODOS)
+            if admision.saturado(e):
+                return respuesta(429, MENSAJE_SATURADO, METODOS, headers={'Retry-After': '1'})
+            # Otra reserva tomó la mesa en el medio: se vuelve a leer la disponibilidad y se elige de nuevo
+            try:
+                indices_ocupados = disponibilidad.leer_ocupadas(clave_compuesta, franjas)
+            except Exception as e:
+                if admision.saturado(e):
+                    return respuesta(429, MENSAJE_SATURADO, METODOS, headers={'Retry-After': '1'})
+                return respuesta(500, f"Error consultando la tabla DISPONIBILIDAD: {str(e)}", METODOS)
+            continue
         except Exception as e:
-            return {
-                'statusCode': 500,
-                'body': json.dumps(f"Error creando la reserva en la tabla USUARIO: {str(e)}"),
-                'headers': {
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                    'Access-Control-Allow-Methods': 'OPTIONS,POST'
-                }
-            }
-      
-        return {
-            'statusCode': 200,
-            'body': json.dumps(f"Reserva creada exitosamente en la mesa {table_id} para {user_name}."),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST'
-            }
-        }
-    else:
-        # No hay mesas disponibles
-        return {
-            'statusCode': 400,
-            'body': json.dumps("No hay mesas disponibles para la cantidad de comensales en el horario seleccionado."),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST'
-            }
-        }
+            if admision.saturado(e):
+                return respuesta(429, MENSAJE_SATURADO, METODOS, headers={'Retry-After': '1'})
+            return respuesta(500, f"Error creando la reserva: {str(e)}", METODOS)
+
+        if unidas:
+            return respuesta(200, f"Reserva creada exitosamente en las mesas unidas {table_id} para {user_name}.", METODOS)
+        return respuesta(200, f"Reserva creada exitosamente en la mesa {table_id} para {user_name}.", METODOS)
+
+    return respuesta(409, "Las mesas disponibles fueron reservadas por otros usuarios. Intente nuevamente.", METODOS)
+
@@ -0,0 +1,175 @@
+from booktable import asignacion, disponibilidad, horarios, idempotencia, metricas, notificaciones, reservas, transacciones
+from booktable.http import respuesta, leer_body, campos_vacios, error_campos_vacios, MENSAJE_JSON_INVALIDO
+
+METODOS = 'OPTIONS,POST'
+
+# Intentos si otras reservas concurrentes toman alguna de las mesas elegidas
+MAX_INTENTOS = 3
+
+# TransactWriteItems admite 100 operaciones: una por franja de DISPONIBILIDAD y tres por grupo
+MAX_OPERACIONES = 100
+
+MAX_GRUPOS = 200
+
+CAMPOS_GRUPO = ['user_id', 'user_name', 'email', 'comensales']
+
+
+def format_reserva_message(grupo, nombre_restaurant, localidad, fecha_hora, table_id):
+    return f"""
+¡Hola {grupo['user_name']}! Tu reserva fue confirmada.
+
+Detalles de la reserva:
+Restaurante: {nombre_restaurant}
+Localidad: {localidad}
+Fecha y hora: {fecha_hora}
+Comensales: {grupo['comensales']}
+Mesa: {table_id}
+"""
+
+@metricas.instrumentar
+@idempotencia.idempotente(METODOS)
+def crear_reservas_lote(event, context):
+    # Analizar el cuerpo de la solicitud
+    body = leer_body(event)
+    if body is None:
+        return respuesta(400, MENSAJE_JSON_INVALIDO, METODOS)
+
+    # Verificar si todos los campos están presentes y no vacíos
+    campos_requeridos = ['localidad', 'categoria', 'nombre_restaurant', 'datetime', 'grupos']
+    faltantes = campos_vacios(body, campos_requeridos)
+    if faltantes:
+        return error_campos_vacios(faltantes, METODOS)
+
+    if not isinstance(body['grupos'], list) or len(body['grupos']) > MAX_GRUPOS:
+        return respuesta(400, f"Error: 'grupos' debe ser una lista de hasta {MAX_GRUPOS} grupos.", METODOS)
+
+    localidad = body['localidad']
+    categoria = body['categoria']
+    nombre_restaurant = body['nombre_restaurant']
+    fecha_hora_timestamp = int(body['datetime'])
+
+    # La duración es opcional y vale para todos los grupos: si no viene se usa la del restaurante
+    duracion = None
+    if body.get('duracion'):
+        try:
+            duracion = disponibilidad.validar_duracion(body['duracion'])
+        except ValueError as e:
+            return respuesta(400, f"Error: {str(e)}", METODOS)
+
+    clave_compuesta = f"{localidad}#{categoria}#{nombre_restaurant}"
+    clave_restaurante = {
+        'Localidad': localidad,
+        'Categoria#Nombre_restaurant': f"{categoria}#{nombre_restaurant}"
+    }
+
+    # Paso 1: Validar los grupos; cada uno se identifica por su posición en el pedido
+    grupos = {}
+    no_ubicados = {}
+    usuarios = set()
+    for posicion, grupo in enumerate(body['grupos']):
+        faltantes = campos_vacios(grupo, CAMPOS_GRUPO) if isinstance(grupo, dict) else CAMPOS_GRUPO
+        if faltantes:
+            no_ubicados[posicion] = f"Faltan los campos: {', '.join(faltantes)}"
+        elif not str(grupo['comensales']).isdigit() or int(grupo['comensales']) < 1:
+            no_ubicados[posicion] = "comensales debe ser un número entero mayor a cero."
+        elif grupo['user_id'] in usuarios:
+            no_ubicados[posicion] = "El usuario ya tiene otro grupo en este pedido."
+        else:
+            usuarios.add(grupo['user_id'])
+            grupos[posicion] = dict(grupo, comensales=int(grupo['comensales']))
+
+    # Paso 2: Leer en un solo pedido el inventario de mesas y las mesas ocupadas durante las reservas
+    # (si la duración es la del restaurante todavía no se sabe, y se leen las franjas de la máxima)
+    try:
+        restaurante, fecha_hora_local, items_disponibilidad = disponibilidad.leer_restaurante(
+            clave_restaurante, clave_compuesta, fecha_hora_timestamp, duracion)
+    except Exception as e:
+        return respuesta(500, f"Error consultando la disponibilidad del restaurante: {str(e)}", METODOS)
+
+    if restaurante is None:
+        return respuesta(404, f"Error: El restaurante '{nombre_restaurant}' con categoria '{categoria}' no existe en la localidad '{localidad}'.", METODOS)
+    inventario = restaurante.get('Mesas', [])
+    zona = horarios.zona_de(restaurante)
+    duracion = duracion or disponibilidad.duracion(restaurante)
+    franjas = disponibilidad.franjas(fecha_hora_local, duracion, zona)
+    indices_ocupados = disponibilidad.ocupadas_en(items_disponibilidad, franjas)
+    grupos_por_transaccion = (MAX_OPERACIONES - len(franjas)) // 3
+
+    reservados = {}
+    for intento in range(MAX_INTENTOS):
+        if not grupos:
+            break
+
+        # Paso 3: Resolver en conjunto qué grupos se sientan y en qué mesa
+        mesas_libres = disponibilidad.mesas_libres(inventario, indices_ocupados, 0)
+        asignadas = asignacion.asignar_grupos(mesas_libres, [(posicion, grupo['comensales']) for posicion, grupo in grupos.items()])
+        for posicion in list(grupos):
+            if posicion not in asignadas:
+                no_ubicados[posicion] = "No hay mesas disponibles para la cantidad de comensales en el horario seleccionado."
+                del grupos[posicion]
+
+        # Paso 4: Confirmar de a lotes; cada transacción ocupa sus mesas y crea sus reservas
+        conflicto = False
+        posiciones = sorted(asignadas)
+        for inicio in range(0, len(posiciones), grupos_por_transaccion):
+            lote = posiciones[inicio:inicio + grupos_por_transaccion]
+            operaciones = disponibilidad.ocupar_varias(clave_compuesta, franjas, [asignadas[posicion]['Indice'] for posicion in lote])
+            for posicion in lote:
+                grupo, mesa = grupos[posicion], asignadas[posicion]
+                operaciones += reservas.crear(localidad, categoria, nombre_restaurant, fecha_hora_timestamp, mesa,
+                                              grupo['user_id'], grupo['user_name'], grupo['email'], grupo['comensales'], duracion, zona)
+                operaciones.append(notificaciones.encolar(
+                    notificaciones.TOPICO_RESERVAS,
+                    f'Reserva confirmada - {nombre_restaurant}',
+                    format_reserva_message(grupo, nombre_restaurant, localidad, fecha_hora_local, mesa['ID_Mesa']),
+                    atributos={'tipo': 'reserva_confirmada', 'email': grupo['email']}
+                ))
+
+            try:
+                transacciones.ejecutar(operaciones)
+            except transacciones.TransaccionCancelada as e:
+                # Los usuarios que ya tenían reserva quedan afuera; el resto se vuelve a resolver
+                for orden, posicion in enumerate(lote):
+                    if e.fallo_condicion(len(franjas) + 3 * orden + 1):
+                        no_ubicados[posicion] = "El usuario ya tiene una reserva en la fecha y hora seleccionadas."
+                        del grupos[posicion]
+                conflicto = True
+                break
+            except Exception as e:
+                return respuesta(500, {'error': f"Error creando las reservas: {str(e)}", **resultado(body, reservados, no_ubicados)}, METODOS)
+
+            for posicion in lote:
+                reservados[posicion] = asignadas[posicion]
+                del grupos[posicion]
+
+        if not conflicto:
+            break
+
+        # Otra reserva tomó alguna mesa en el medio: se vuelve a leer la disponibilidad
+        try:
+            indices_ocupados = disponibilidad.leer_ocupadas(clave_compuesta, franjas)
+        except Exception as e:
+            return respuesta(500, {'error': f"Error consultando la tabla DISPONIBILIDAD: {str(e)}", **resultado(body, reservados, no_ubicados)}, METODOS)
+
+    for posicion in grupos:
+        no_ubicados[posicion] = "Las mesas disponibles fueron reservadas por otros usuarios. Intente nuevamente."
+
+    return respuesta(200, resultado(body, reservados, no_ubicados), METODOS)
+
+
+def resultado(body, reservados, no_ubicados):
+    """Arma la respuesta: los grupos reservados con su mesa y los no ubicados con el motivo."""
+    def usuario(posicion):
+        grupo = body['grupos'][posicion]
+        return grupo.get('user_id') if isinstance(grupo, dict) else None
+
+    return {
+        'reservados': [
+            {'posicion': posicion, 'user_id': usuario(posicion), 'id_mesa': mesa['ID_Mesa']}
+            for posicion, mesa in sorted(reservados.items())
+        ],
+        'no_ubicados': [
+            {'posicion': posicion, 'user_id': usuario(posicion), 'motivo': motivo}
+            for posicion, motivo in sorted(no_ubicados.items())
+        ]
+    }
@@ -1,134 +1,100 @@
-import boto3
-from boto3.dynamodb.conditions import Key
-import json
-from datetime import datetime, timedelta  # Importa el módulo datetime
+from booktable import aws, disponibilidad, horarios, idempotencia, metricas, notificaciones, reservas, transacciones
+from booktable.http import respuesta, leer_body, campos_vacios, error_campos_vacios, MENSAJE_JSON_INVALIDO
 
-dynamodb = boto3.resource('dynamodb')
+METODOS = 'OPTIONS,DELETE'
 
+usuarios_table = aws.tabla('USUARIOS')
+
+
+def format_cancelacion_message(reserva, fecha_hora):
+    return f"""
+¡Hola {reserva.get('Nombre_usuario', '')}! Tu reserva fue cancelada.
+
+Detalles de la reserva:
+Restaurante: {reserva['Nombre_restaurant']}
+Localidad: {reserva['Localidad']}
+Fecha y hora: {fecha_hora}
+"""
+
+@metricas.instrumentar
+@idempotencia.idempotente(METODOS)
 def delete_reserva(event, context):
-    try:
+    body = leer_body(event)
+    if body is None:
+        return respuesta(400, MENSAJE_JSON_INVALIDO, METODOS)
 
-        body = json.loads(event.get('body', '{}'))
-    except json.JSONDecodeError:
-        return {
-            'statusCode': 400,
-            'body': json.dumps("Error: Cuerpo de la solicitud no es un JSON válido."),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,DELETE'
-            }
-        }
-    
     # Verificar si todos los campos están presentes y no vacíos
-    campos_requeridos = ['user_id', 'datetime']
-    campos_vacios = [campo for campo in campos_requeridos if not body.get(campo)]
-
-    if campos_vacios:
-        return {
-            'statusCode': 400,
-            'body': json.dumps(f"Error: Todos los campos son requeridos. Los siguientes campos estan vacios o ausentes: {', '.join(campos_vacios)}"),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,DELETE'
-            }
-        }
-        
+    faltantes = campos_vacios(body, ['user_id', 'datetime'])
+    if faltantes:
+        return error_campos_vacios(faltantes, METODOS)
+
     user_id = body['user_id']
     fecha_hora_timestamp = int(body['datetime'])
-    fecha_hora_utc = datetime.utcfromtimestamp(fecha_hora_timestamp)
-    fecha_hora_gmt3 = (fecha_hora_utc - timedelta(hours=3)).isoformat()
 
-    usuarios_table = dynamodb.Table('USUARIOS')
-    reservas_table = dynamodb.Table('RESERVAS')
-    
-    # Paso 1: Buscar la reserva en la tabla USUARIOS usando la fecha_hora
+    clave_usuario = {
+        'ID_Usuario': user_id,
+        'Fecha_hora': fecha_hora_timestamp
+    }
+
+    # Paso 1: Buscar la reserva en la tabla USUARIOS por su clave primaria
     try:
-        response_usuario = usuarios_table.query(
-            KeyConditionExpression=Key('ID_Usuario').eq(user_id) & Key('Fecha_hora').eq(fecha_hora_timestamp)  # Buscar por ID_Usuario y Fecha_hora
-        )
+        response_usuario = usuarios_table.get_item(Key=clave_usuario)
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'body': json.dumps(f"Error consultando la tabla USUARIOS: {str(e)}"),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,DELETE'
-            }
-        }
-    
-    # Extraer los detalles de la reserva
-    reservas_usuario = response_usuario.get('Items', [])
-    
-    if not reservas_usuario:
-        return {
-            'statusCode': 404,
-            'body': json.dumps("No se encontró la reserva para el usuario."),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,DELETE'
-            }
-        }
-    
+        return respuesta(500, f"Error consultando la tabla USUARIOS: {str(e)}", METODOS)
+
+    if 'Item' not in response_usuario:
+        return respuesta(404, "No se encontró la reserva para el usuario.", METODOS)
+
     # Obtener detalles de la reserva
-    reserva = reservas_usuario[0]
-    
-    # Extraer atributos de la reserva
-    localidad = reserva['Localidad']
-    categoria = reserva['Categoria']
-    nombre_restaurant = reserva['Nombre_restaurant']
-    id_mesa = reserva['ID_Mesa']
-
-    # Clave compuesta para la tabla RESERVAS
-    clave_compuesta = f"{localidad}#{categoria}#{nombre_restaurant}"
-    
-    # Paso 2: Borrar la reserva de la tabla RESERVAS
-    try:
-        reservas_table.delete_item(
-            Key={
-                'Localidad#Categoria#Nombre_restaurant': clave_compuesta, #PK
-                'Fecha_hora#ID_Mesa': f"{fecha_hora_gmt3}#{id_mesa}"  #SK
-            }
-        )
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'body': json.dumps(f"Error borrando la reserva de la tabla RESERVAS: {str(e)}"),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,DELETE'
-            }
-        }
-    
-    # Paso 3: Borrar la entrada del usuario en la tabla USUARIOS
-    try:
-        usuarios_table.delete_item(
-            Key={
-                'ID_Usuario': user_id, 
-                'Fecha_hora': fecha_hora_timestamp 
-            }
-        )
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'body': json.dumps(f"Error borrando la reserva de la tabla USUARIOS: {str(e)}"),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,DELETE'
-            }
-        }
-    
-    return {
-        'statusCode': 200,
-        'body': json.dumps("Reserva borrada exitosamente."),
-        'headers': {
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-            'Access-Control-Allow-Methods': 'OPTIONS,DELETE'
-        }
-    }
+    reserva = response_usuario['Item']
+
+    # Clave compuesta del restaurante y hora local en su zona (la reserva guarda la zona del restaurante)
+    clave_compuesta = f"{reserva['Localidad']}#{reserva['Categoria']}#{reserva['Nombre_restaurant']}"
+    zona = horarios.zona_de(reserva)
+    fecha_hora_local = horarios.local(fecha_hora_timestamp, zona)
+
+    # Paso 2: Borrar la reserva de USUARIOS y de RESERVAS y liberar la mesa en DISPONIBILIDAD en una sola transacción.
+    # El borrado en RESERVAS es condicional: si la reserva no está con la clave compacta se prueba con la anterior
+    # (reconstruir_disponibilidad ya le agregó el índice pero todavía no se migró) y si tampoco, la transacción falla
+    anterior = reservas.clave_anterior(clave_compuesta, fecha_hora_timestamp, reserva['ID_Mesa'])
+    operaciones = [
+        transacciones.delete('USUARIOS', clave_usuario, condicion='attribute_exists(ID_Usuario)')
+    ]
+    if 'Indice_mesa' in reserva:
+        # La clave en RESERVAS lleva el índice de la mesa (a las reservas viejas se lo agrega reconstruir_disponibilidad)
+        indice = int(reserva['Indice_mesa'])
+        claves_reserva = [reservas.clave(clave_compuesta, fecha_hora_timestamp, indice, zona), anterior]
+        # Las reservas anteriores a las duraciones ocupaban solo el item de su horario
+        franjas = disponibilidad.franjas(fecha_hora_local, int(reserva['Duracion']), zona) if 'Duracion' in reserva else [fecha_hora_local]
+        if 'Indices_unidos' in reserva:
+            operaciones += disponibilidad.liberar_varias(clave_compuesta, franjas, reservas.indices(reserva))
+        else:
+            operaciones += disponibilidad.liberar(clave_compuesta, franjas, indice)
+    else:
+        # Reserva anterior al índice de mesas: sigue con la clave vieja en RESERVAS y no ocupa DISPONIBILIDAD
+        claves_reserva = [anterior]
+    if reserva.get('Mail_usuario'):
+        operaciones.append(notificaciones.encolar(
+            notificaciones.TOPICO_RESERVAS,
+            f"Reserva cancelada - {reserva['Nombre_restaurant']}",
+            format_cancelacion_message(reserva, fecha_hora_local),
+            atributos={'tipo': 'reserva_cancelada', 'email': reserva['Mail_usuario']}
+        ))
+
+    for posicion, clave_reserva in enumerate(claves_reserva):
+        borrado = transacciones.delete(reservas.TABLA, clave_reserva, condicion='attribute_exists(#sk)',
+                                       nombres={'#sk': reservas.SK})
+        try:
+            transacciones.ejecutar([operaciones[0], borrado, *operaciones[1:]])
+            break
+        except transacciones.TransaccionCancelada as e:
+            if e.fallo_condicion(0):
+                # Otra solicitud la borró entre la lectura y la transacción
+                return respuesta(404, "No se encontró la reserva para el usuario.", METODOS)
+            if e.fallo_condicion(1) and posicion + 1 < len(claves_reserva):
+                continue
+            return respuesta(409, "Error: La reserva está siendo modificada. Intente nuevamente.", METODOS)
+        except Exception as e:
+            return respuesta(500, f"Error borrando la reserva: {str(e)}", METODOS)
+
+    return respuesta(200, "Reserva borrada exitosamente.", METODOS)
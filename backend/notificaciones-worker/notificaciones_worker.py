@@ -0,0 +1,76 @@
+from boto3.dynamodb.types import TypeDeserializer
+
+from booktable import aws, metricas, notificaciones
+
+# Máximo de mensajes por PublishBatch
+LOTE_SNS = 10
+
+deserializer = TypeDeserializer()
+
+
+@metricas.instrumentar
+def notificaciones_worker(event, context):
+    """Publica en SNS las notificaciones nuevas del outbox (stream de NOTIFICACIONES).
+
+    Devuelve los registros que no se pudieron publicar en ``batchItemFailures``
+    para que Lambda los reintente; los publicados se borran del outbox.
+    """
+    pendientes = {}
+    for record in event.get('Records', []):
+        if record.get('eventName') != 'INSERT':
+            continue
+        imagen = record['dynamodb']['NewImage']
+        item = {nombre: deserializer.deserialize(valor) for nombre, valor in imagen.items()}
+        pendientes.setdefault(item['Topico'], []).append((record['dynamodb']['SequenceNumber'], item))
+
+    fallidos = []
+    enviados = []
+    for topico, mensajes in pendientes.items():
+        topic_arn = notificaciones.arn_topico(topico)
+        if topic_arn is None:
+            print(f"Error sending SNS notification: topic '{topico}' not found")
+            fallidos.extend(secuencia for secuencia, _ in mensajes)
+            continue
+
+        for inicio in range(0, len(mensajes), LOTE_SNS):
+            lote = mensajes[inicio:inicio + LOTE_SNS]
+            try:
+                fallas = publicar(topic_arn, [item for _, item in lote])
+            except Exception as e:
+                print(f"Error sending SNS notification: {str(e)}")
+                fallas = set(range(len(lote)))
+            for posicion, (secuencia, item) in enumerate(lote):
+                if posicion in fallas:
+                    fallidos.append(secuencia)
+                else:
+                    enviados.append(item['ID_Notificacion'])
+
+    # Los mensajes publicados ya no hacen falta en el outbox
+    if enviados:
+        with aws.tabla(notificaciones.TABLA).batch_writer() as batch:
+            for id_notificacion in enviados:
+                batch.delete_item(Key={'ID_Notificacion': id_notificacion})
+
+    return {'batchItemFailures': [{'itemIdentifier': secuencia} for secuencia in fallidos]}
+
+
+def publicar(topic_arn, items):
+    """Publica hasta 10 mensajes en un solo PublishBatch; devuelve las posiciones que fallaron."""
+    entradas = []
+    for posicion, item in enumerate(items):
+        entrada = {
+            'Id': str(posicion),
+            'Message': item['Mensaje'],
+            'Subject': item['Asunto']
+        }
+        if item.get('Atributos'):
+            entrada['MessageAttributes'] = {
+                nombre: {'DataType': 'String', 'StringValue': valor}
+                for nombre, valor in item['Atributos'].items()
+            }
+        entradas.append(entrada)
+
+    response = aws.cliente('sns').publish_batch(TopicArn=topic_arn, PublishBatchRequestEntries=entradas)
+    for falla in response.get('Failed', []):
+        print(f"Error sending SNS notification: {falla.get('Code')} {falla.get('Message')}")
+    return {int(falla['Id']) for falla in response.get('Failed', [])}
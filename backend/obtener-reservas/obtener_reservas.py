@@ -1,71 +1,44 @@
-import boto3
 from boto3.dynamodb.conditions import Key
-import json
 from datetime import datetime
 
-dynamodb = boto3.resource('dynamodb')
+from booktable import aws, metricas
+from booktable.http import respuesta, leer_query, campos_vacios, error_campos_vacios
+from booktable.paginacion import consultar_pagina, parametros_pagina
 
+METODOS = 'GET,OPTIONS'
+
+usuarios_table = aws.tabla('USUARIOS')
+
+
+@metricas.instrumentar
 def obtener_reservas(event, context):
-    params = event.get('queryStringParameters')
-    
-    campos_requeridos = ['user_id']
-    campos_vacios = [campo for campo in campos_requeridos if not params.get(campo)]
-    if campos_vacios:
-        return {
-            'statusCode': 400,
-            'body': json.dumps(
-                f"Error: Todos los campos son requeridos. Los siguientes campos están vacíos o ausentes: {', '.join(campos_vacios)}"),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'GET,OPTIONS'
-            }
-        }
+    params = leer_query(event)
+
+    faltantes = campos_vacios(params, ['user_id'])
+    if faltantes:
+        return error_campos_vacios(faltantes, METODOS)
 
     user_id = params.get('user_id')
-    
+
+    try:
+        limit, next_token = parametros_pagina(params)
+    except ValueError as e:
+        return respuesta(400, f"Error: {str(e)}", METODOS)
+
     # Obtener la fecha y hora actual como timestamp
-    fecha_hora_actual = int(datetime.now().timestamp()) 
-    
-    usuarios_table = dynamodb.Table('USUARIOS')
-    
+    fecha_hora_actual = int(datetime.now().timestamp())
+
     # Paso 1: Hacer query en tabla USUARIOS
     try:
-        response = usuarios_table.query(
+        reservas_vigentes, next_token = consultar_pagina(
+            usuarios_table, limit, next_token,
             KeyConditionExpression=Key('ID_Usuario').eq(user_id) & Key('Fecha_hora').gte(fecha_hora_actual)
         )
     except Exception as e:
-        return {
-            'statusCode': 500,
-            'body': json.dumps(f"Error consultando la tabla USUARIOS: {str(e)}"),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST'
-            }
-        }
-    
+        return respuesta(500, f"Error consultando la tabla USUARIOS: {str(e)}", METODOS)
+
     # Paso 2: Extraer las reservas vigentes
-    reservas_vigentes = response.get('Items', [])
-    json_data = boto3.dynamodb.types.TypeSerializer().serialize(reservas_vigentes)
+    if not reservas_vigentes and not next_token:
+        return respuesta(404, "No hay reservas vigentes para el usuario.", METODOS)
 
-    if reservas_vigentes:
-        return {
-            'statusCode': 200,
-            'body': json.dumps(json_data),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST'
-            }
-        }
-    else:
-        return {
-            'statusCode': 404,
-            'body': json.dumps("No hay reservas vigentes para el usuario."),
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST'
-            }
-        }
+    return respuesta(200, {'items': reservas_vigentes, 'next_token': next_token}, METODOS, event=event)
@@ -0,0 +1,93 @@
+"""Agrega ``Expira`` a las reservas de RESERVAS y USUARIOS que no lo tienen.
+
+Las reservas creadas antes del TTL nunca vencerían. El vencimiento es el
+mismo que calculan los handlers: el fin de la reserva (``Duracion``, o la
+duración del restaurante) más ``BOOKTABLE_DIAS_RETENCION`` días. Las que ya
+pasaron ese plazo quedan con un ``Expira`` en el pasado, así que el TTL las
+borra en los días siguientes y el stream de RESERVAS las archiva.
+
+Es idempotente: solo toca los items sin ``Expira``, y no recrea los que se
+borraron mientras corría.
+
+Uso:
+    python backend/scripts/expirar_reservas.py [--dry-run]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'booktable-layer', 'python'))
+
+from botocore.exceptions import ClientError
+
+from booktable import aws, disponibilidad, horarios, reservas
+
+
+def _scan(tabla, **kwargs):
+    while True:
+        response = tabla.scan(**kwargs)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def _agregar_expira(tabla, clave, expira, dry_run):
+    if dry_run:
+        return True
+    try:
+        tabla.update_item(
+            Key=clave,
+            UpdateExpression='SET Expira = :expira',
+            # Si se borró mientras tanto, no se recrea
+            ConditionExpression='attribute_exists(#pk) AND attribute_not_exists(Expira)',
+            ExpressionAttributeNames={'#pk': next(iter(clave))},
+            ExpressionAttributeValues={':expira': expira}
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dry-run', action='store_true', help='solo mostrar lo que se haria')
+    args = parser.parse_args()
+
+    restaurantes = {
+        f"{restaurante['Localidad']}#{restaurante['Categoria#Nombre_restaurant']}": restaurante
+        for restaurante in _scan(aws.tabla('RESTAURANTES'), ProjectionExpression='Localidad, #sk, Duracion_reserva, Zona_horaria',
+                                 ExpressionAttributeNames={'#sk': 'Categoria#Nombre_restaurant'})
+    }
+    duraciones = {clave_compuesta: disponibilidad.duracion(restaurante) for clave_compuesta, restaurante in restaurantes.items()}
+
+    reservas_table = aws.tabla(reservas.TABLA)
+    actualizadas = 0
+    for reserva in _scan(reservas_table):
+        if 'Expira' in reserva:
+            continue
+        clave_compuesta = reservas.restaurante(reserva)
+        duracion = reserva.get('Duracion') or duraciones.get(clave_compuesta, disponibilidad.DURACION_POR_DEFECTO)
+        zona = horarios.zona_de(restaurantes.get(clave_compuesta, {}))
+        expira = reservas.expira(horarios.timestamp(reserva['Fecha_hora'], zona), duracion)
+        clave = {reservas.PK: reserva[reservas.PK], reservas.SK: reserva[reservas.SK]}
+        actualizadas += _agregar_expira(reservas_table, clave, expira, args.dry_run)
+    print(f"RESERVAS: {actualizadas} reservas actualizadas")
+
+    usuarios_table = aws.tabla('USUARIOS')
+    actualizadas = 0
+    for reserva in _scan(usuarios_table):
+        if 'Expira' in reserva:
+            continue
+        clave_compuesta = f"{reserva['Localidad']}#{reserva['Categoria']}#{reserva['Nombre_restaurant']}"
+        duracion = reserva.get('Duracion') or duraciones.get(clave_compuesta, disponibilidad.DURACION_POR_DEFECTO)
+        expira = reservas.expira(reserva['Fecha_hora'], duracion)
+        clave = {'ID_Usuario': reserva['ID_Usuario'], 'Fecha_hora': reserva['Fecha_hora']}
+        actualizadas += _agregar_expira(usuarios_table, clave, expira, args.dry_run)
+    print(f"USUARIOS: {actualizadas} reservas actualizadas")
+
+
+if __name__ == '__main__':
+    main()
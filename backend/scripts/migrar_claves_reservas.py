@@ -0,0 +1,122 @@
+"""Mueve las reservas de RESERVAS a las claves actuales.
+
+La clave de cada reserva se recalcula con el esquema de partition keys
+indicado (ver ``booktable.reservas``) y la sort key compacta de
+``booktable.horarios`` (minutos desde el epoch e índice de la mesa). El
+instante sale de ``Fecha_hora`` en la zona del restaurante, así que sirve
+también para las reservas con la sort key anterior
+(``2030-01-01T20:00:00#<ID_Mesa>``, en hora de Buenos Aires, que es la zona por
+defecto). Las reservas sin ``Indice_mesa`` no se pueden mover:
+``reconstruir_disponibilidad.py`` les agrega el índice y al terminar corre
+esta misma migración, así que con reservas de antes del índice de mesas hay que
+correr ese script en lugar de este.
+
+La migración es obligatoria antes de desplegar las Lambdas con la sort key
+compacta: las consultas por rango (``reservas.consultar``) solo leen las claves
+actuales. Si quedan reservas sin mover (sin índice, por ejemplo porque su mesa
+ya no está en MESAS) se informan y el script termina con error.
+
+Cada reserva que cambia de clave se reescribe con la clave nueva y se borra la
+vieja en una misma transacción, así nunca queda duplicada ni se pierde. Las
+transacciones corren en paralelo. El borrado de la clave vieja no es del TTL,
+así que el stream no la archiva.
+
+Es idempotente: las reservas que ya tienen su clave no se tocan, y las que se
+cancelaron mientras corría no se recrean. Conviene correrlo con el tráfico de
+escritura detenido y desplegar enseguida las Lambdas con el mismo esquema
+(variables ``particion_reservas`` y ``shards_reservas`` de Terraform).
+
+Uso:
+    python backend/scripts/migrar_claves_reservas.py [--esquema restaurante|dia] [--shards 4] [--dry-run]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'booktable-layer', 'python'))
+
+from booktable import aws, concurrencia, horarios, reservas, transacciones
+
+# Reservas leídas del scan que se mueven por tanda en paralelo
+TAMANIO_TANDA = 200
+
+
+def _scan(tabla, **kwargs):
+    while True:
+        response = tabla.scan(**kwargs)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def mover(reserva, clave):
+    """Mueve la reserva a ``clave``; False si se borró mientras tanto. Corre en el pool."""
+    try:
+        transacciones.ejecutar([
+            transacciones.put(reservas.TABLA, dict(reserva, **clave),
+                              condicion='attribute_not_exists(#sk)', nombres={'#sk': reservas.SK}),
+            transacciones.delete(reservas.TABLA, {reservas.PK: reserva[reservas.PK], reservas.SK: reserva[reservas.SK]},
+                                 condicion='attribute_exists(#sk)', nombres={'#sk': reservas.SK})
+        ])
+        return True
+    except transacciones.TransaccionCancelada as e:
+        if e.fallo_condicion(1):
+            return False
+        raise
+
+
+def mover_tanda(tanda, dry_run):
+    if dry_run:
+        return len(tanda)
+    return sum(concurrencia.mapear(lambda pendiente: mover(*pendiente), tanda))
+
+
+def migrar(esquema, shards, dry_run):
+    """Mueve todas las reservas a las claves de ``esquema``; devuelve cuántas no se pudieron mover (sin índice)."""
+    zonas = {
+        f"{restaurante['Localidad']}#{restaurante['Categoria#Nombre_restaurant']}": horarios.zona_de(restaurante)
+        for restaurante in _scan(aws.tabla('RESTAURANTES'), ProjectionExpression='Localidad, #sk, Zona_horaria',
+                                 ExpressionAttributeNames={'#sk': 'Categoria#Nombre_restaurant'})
+    }
+
+    revisadas, movidas, sin_indice, tanda = 0, 0, 0, []
+    for reserva in _scan(aws.tabla(reservas.TABLA)):
+        revisadas += 1
+        if 'Indice_mesa' not in reserva:
+            sin_indice += 1
+            continue
+        clave_compuesta = reservas.restaurante(reserva)
+        zona = zonas.get(clave_compuesta, horarios.ZONA_POR_DEFECTO)
+        clave = reservas.clave(clave_compuesta, horarios.timestamp(reserva['Fecha_hora'], zona), reserva['Indice_mesa'],
+                               zona, esquema=esquema, shards=shards)
+        if clave[reservas.PK] != reserva[reservas.PK] or clave[reservas.SK] != reserva[reservas.SK]:
+            tanda.append((reserva, clave))
+        if len(tanda) == TAMANIO_TANDA:
+            movidas += mover_tanda(tanda, dry_run)
+            tanda = []
+    movidas += mover_tanda(tanda, dry_run)
+    print(f"RESERVAS: {revisadas} reservas revisadas, {movidas} movidas al esquema '{esquema}'"
+          + (f" con {shards} shards" if esquema == 'dia' and shards > 1 else ''))
+    if sin_indice:
+        print(f"{sin_indice} reservas sin Indice_mesa quedaron con la clave anterior y no aparecen en las consultas: "
+              "correr reconstruir_disponibilidad.py (las que siguen sin índice tienen una mesa que ya no está en MESAS)")
+    return sin_indice
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--esquema', choices=reservas.ESQUEMAS, default=reservas.PARTICION,
+                        help='esquema de partition keys (por defecto, el de BOOKTABLE_PARTICION_RESERVAS)')
+    parser.add_argument('--shards', type=int, default=reservas.SHARDS,
+                        help='shards de escritura por día, solo con --esquema dia (por defecto, BOOKTABLE_SHARDS_RESERVAS)')
+    parser.add_argument('--dry-run', action='store_true', help='solo mostrar lo que se haria')
+    args = parser.parse_args()
+    if args.shards < 1:
+        parser.error('--shards tiene que ser al menos 1')
+    if migrar(args.esquema, args.shards, args.dry_run):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""Reconstruye el inventario de mesas y la tabla DISPONIBILIDAD a partir de los datos existentes.
+
+Para cada restaurante:
+* asigna ``Indice`` a las mesas de MESAS que no lo tengan y guarda el
+  inventario (``Mesas``) en su item de RESTAURANTES, con las uniones de mesas
+  (``Uniones``) pasadas a los índices resultantes;
+* recorre sus reservas en RESERVAS, les agrega ``Indice_mesa`` (e
+  ``Indices_unidos`` a las que ocupan mesas unidas) y ``Duracion``
+  (la del restaurante si no la tienen) y arma el number set ``Ocupadas`` de
+  cada franja que ocupan en DISPONIBILIDAD, borrando los items que ya no
+  corresponden (por ejemplo los de un horario exacto, de antes de las franjas).
+Después agrega ``Indice_mesa`` y ``Duracion`` a los items de USUARIOS, y a
+las reservas de RESERVAS que no lo tienen, el ``ID_Usuario`` de su item de
+USUARIOS (hace falta para cancelarlas o moverlas en bloque).
+
+Al final pasa las reservas a la sort key compacta con
+``migrar_claves_reservas.py``: las que acaban de recibir ``Indice_mesa``
+todavía tienen la clave anterior, y las Lambdas buscan la reserva de un item
+de USUARIOS con índice por la clave compacta. Las dos cosas tienen que ir
+juntas, en este orden.
+
+Es idempotente: se puede volver a correr sin duplicar nada. Hay que correrlo
+con el tráfico de escritura detenido. Termina con error si quedan reservas sin
+migrar.
+
+Uso:
+    python backend/scripts/reconstruir_disponibilidad.py [--dry-run]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'booktable-layer', 'python'))
+
+from boto3.dynamodb.conditions import Key
+
+from booktable import aws, disponibilidad, horarios, reservas as esquema_reservas
+from booktable.paginacion import iterar_query
+
+import migrar_claves_reservas
+
+
+def _scan(tabla, **kwargs):
+    while True:
+        response = tabla.scan(**kwargs)
+        yield from response.get('Items', [])
+        if 'LastEvaluatedKey' not in response:
+            return
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def indices_reserva(reserva, indices):
+    """Índices de la mesa de la reserva y de las que tiene unidas (las que ya no existen se ignoran)."""
+    return {indices[id_mesa] for id_mesa in [reserva['ID_Mesa'], *reserva.get('Mesas_unidas', [])] if id_mesa in indices}
+
+
+def actualizar_indices(reserva, indices, duracion_restaurante):
+    """La reserva (de RESERVAS o USUARIOS) con los índices de sus mesas y su duración."""
+    actualizada = dict(reserva, Indice_mesa=indices[reserva['ID_Mesa']],
+                       Duracion=int(reserva.get('Duracion') or duracion_restaurante))
+    if 'Mesas_unidas' in reserva:
+        actualizada['Indices_unidos'] = [indices[id_mesa] for id_mesa in reserva['Mesas_unidas'] if id_mesa in indices]
+    return actualizada
+
+
+def agregar_usuario(tabla, clave, id_usuario, dry_run):
+    """Agrega ``ID_Usuario`` a la reserva de RESERVAS si existe y no lo tiene; True si lo agregó."""
+    if dry_run:
+        return True
+    try:
+        tabla.update_item(
+            Key=clave,
+            UpdateExpression='SET ID_Usuario = :usuario',
+            ConditionExpression='attribute_exists(#pk) AND attribute_not_exists(ID_Usuario)',
+            ExpressionAttributeNames={'#pk': esquema_reservas.PK},
+            ExpressionAttributeValues={':usuario': id_usuario}
+        )
+        return True
+    except tabla.meta.client.exceptions.ConditionalCheckFailedException:
+        return False
+
+
+def reconstruir_restaurante(restaurante, reservas, dry_run):
+    """Devuelve {ID_Mesa: indice} del restaurante; ``reservas`` son sus items de RESERVAS."""
+    disponibilidad_table = aws.tabla(disponibilidad.TABLA)
+    mesas_table = aws.tabla('MESAS')
+    reservas_table = aws.tabla(esquema_reservas.TABLA)
+    clave_compuesta = f"{restaurante['Localidad']}#{restaurante['Categoria#Nombre_restaurant']}"
+
+    # Las mesas que ya tienen índice lo conservan; las demás van al final
+    mesas = list(iterar_query(mesas_table, KeyConditionExpression=Key('Localidad#Categoria#Nombre_restaurant').eq(clave_compuesta)))
+    mesas.sort(key=lambda mesa: (int(mesa['Indice']) if 'Indice' in mesa else len(mesas), mesa['ID_Mesa']))
+    indices = {mesa['ID_Mesa']: indice for indice, mesa in enumerate(mesas)}
+    inventario = [{'ID_Mesa': mesa['ID_Mesa'], 'Capacidad': mesa['Capacidad']} for mesa in mesas]
+    # Las uniones de mesas se declaran por índice: se pasan a los índices nuevos
+    anteriores = {int(mesa['Indice']): indices[mesa['ID_Mesa']] for mesa in mesas if 'Indice' in mesa}
+    uniones = [
+        [anteriores[int(i)], anteriores[int(j)]]
+        for i, j in restaurante.get('Uniones', [])
+        if int(i) in anteriores and int(j) in anteriores
+    ]
+
+    duracion_restaurante = disponibilidad.duracion(restaurante)
+    zona = horarios.zona_de(restaurante)
+    ocupadas_por_franja = {}
+    for reserva in reservas:
+        if reserva['ID_Mesa'] in indices:
+            duracion = int(reserva.get('Duracion') or duracion_restaurante)
+            for franja in disponibilidad.franjas(reserva['Fecha_hora'], duracion, zona):
+                ocupadas_por_franja.setdefault(franja, set()).update(indices_reserva(reserva, indices))
+
+    existentes = [
+        item['Fecha_hora'] for item in iterar_query(
+            disponibilidad_table,
+            KeyConditionExpression=Key('Localidad#Categoria#Nombre_restaurant').eq(clave_compuesta),
+            ProjectionExpression='Fecha_hora'
+        )
+    ]
+    sobrantes = [fecha_hora for fecha_hora in existentes if fecha_hora not in ocupadas_por_franja]
+
+    print(f"{clave_compuesta}: {len(mesas)} mesas, {len(reservas)} reservas, {len(ocupadas_por_franja)} franjas, "
+          f"{len(sobrantes)} items de disponibilidad a borrar")
+    if dry_run:
+        return indices
+
+    with mesas_table.batch_writer() as batch:
+        for mesa in mesas:
+            if mesa.get('Indice') != indices[mesa['ID_Mesa']]:
+                batch.put_item(Item=dict(mesa, Indice=indices[mesa['ID_Mesa']]))
+    aws.tabla('RESTAURANTES').update_item(
+        Key={'Localidad': restaurante['Localidad'], 'Categoria#Nombre_restaurant': restaurante['Categoria#Nombre_restaurant']},
+        UpdateExpression='SET Mesas = :mesas, Uniones = :uniones',
+        ExpressionAttributeValues={':mesas': inventario, ':uniones': uniones}
+    )
+    with reservas_table.batch_writer() as batch:
+        for reserva in reservas:
+            if reserva['ID_Mesa'] not in indices:
+                continue
+            actualizada = actualizar_indices(reserva, indices, duracion_restaurante)
+            if actualizada != reserva:
+                batch.put_item(Item=actualizada)
+    with disponibilidad_table.batch_writer() as batch:
+        for franja, ocupadas in ocupadas_por_franja.items():
+            batch.put_item(Item=dict(disponibilidad.clave(clave_compuesta, franja), Ocupadas=ocupadas))
+        for fecha_hora in sobrantes:
+            batch.delete_item(Key=disponibilidad.clave(clave_compuesta, fecha_hora))
+    return indices
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dry-run', action='store_true', help='solo mostrar lo que se haria')
+    args = parser.parse_args()
+
+    # Un solo scan de RESERVAS: con el esquema por día las reservas de un restaurante
+    # están repartidas en muchas particiones
+    reservas_por_restaurante = {}
+    for reserva in _scan(aws.tabla(esquema_reservas.TABLA)):
+        reservas_por_restaurante.setdefault(esquema_reservas.restaurante(reserva), []).append(reserva)
+
+    indices_por_restaurante = {}
+    duracion_por_restaurante = {}
+    zona_por_restaurante = {}
+    for restaurante in _scan(aws.tabla('RESTAURANTES')):
+        clave_compuesta = f"{restaurante['Localidad']}#{restaurante['Categoria#Nombre_restaurant']}"
+        indices_por_restaurante[clave_compuesta] = reconstruir_restaurante(
+            restaurante, reservas_por_restaurante.get(clave_compuesta, []), args.dry_run)
+        duracion_por_restaurante[clave_compuesta] = disponibilidad.duracion(restaurante)
+        zona_por_restaurante[clave_compuesta] = horarios.zona_de(restaurante)
+
+    usuarios_table = aws.tabla('USUARIOS')
+    actualizados = 0
+    pendientes_usuario = []
+    with usuarios_table.batch_writer() as batch:
+        for reserva in _scan(usuarios_table):
+            clave_compuesta = f"{reserva['Localidad']}#{reserva['Categoria']}#{reserva['Nombre_restaurant']}"
+            indices = indices_por_restaurante.get(clave_compuesta, {})
+            if reserva['ID_Mesa'] not in indices:
+                continue
+            actualizada = actualizar_indices(reserva, indices, duracion_por_restaurante[clave_compuesta])
+            if actualizada != reserva:
+                actualizados += 1
+                if not args.dry_run:
+                    batch.put_item(Item=actualizada)
+            pendientes_usuario.append((clave_compuesta, actualizada))
+    print(f"USUARIOS: {actualizados} reservas actualizadas")
+
+    # Las reservas de RESERVAS anteriores a que guardaran ID_Usuario lo toman de su item en USUARIOS. Se buscan
+    # por restaurante, mesa e instante y no por la clave, porque todavía pueden tener la clave anterior
+    sin_usuario = {
+        (clave_compuesta, reserva['ID_Mesa'],
+         horarios.timestamp(reserva['Fecha_hora'], zona_por_restaurante.get(clave_compuesta, horarios.ZONA_POR_DEFECTO))):
+            {esquema_reservas.PK: reserva[esquema_reservas.PK], esquema_reservas.SK: reserva[esquema_reservas.SK]}
+        for clave_compuesta, reservas_restaurante in reservas_por_restaurante.items()
+        for reserva in reservas_restaurante if 'ID_Usuario' not in reserva
+    }
+    reservas_table = aws.tabla(esquema_reservas.TABLA)
+    con_usuario = 0
+    for clave_compuesta, reserva in pendientes_usuario:
+        clave = sin_usuario.get((clave_compuesta, reserva['ID_Mesa'], int(reserva['Fecha_hora'])))
+        if clave is not None:
+            con_usuario += agregar_usuario(reservas_table, clave, reserva['ID_Usuario'], args.dry_run)
+    print(f"RESERVAS: {con_usuario} reservas con ID_Usuario agregado")
+
+    if args.dry_run:
+        print("Al terminar se migrarían las claves de RESERVAS (ver migrar_claves_reservas.py --dry-run)")
+        return
+    if migrar_claves_reservas.migrar(esquema_reservas.PARTICION, esquema_reservas.SHARDS, dry_run=False):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Reporte de reservas archivadas (ver ``booktable.archivo``).
+
+Lee solo las particiones de las fechas pedidas, sin tocar las tablas de
+DynamoDB, y resume por día y restaurante la cantidad de reservas, los
+comensales y las mesas distintas usadas. Con ``--jsonl`` imprime las reservas
+tal cual, una por línea, para procesarlas con otras herramientas.
+
+El archivo se lee del bucket (``--bucket``, o el output ``archivo_bucket_name``
+de Terraform) o de un directorio local (``--dir``).
+
+Uso:
+    python backend/scripts/reporte_historico.py --desde 2030-01-01 --hasta 2030-01-31
+        (--bucket BUCKET | --dir DIRECTORIO) [--restaurante Localidad#Categoria#Nombre] [--jsonl]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'booktable-layer', 'python'))
+
+from booktable import archivo, reservas
+from booktable.http import codificar
+
+
+def resumir(items):
+    """{(fecha, restaurante): {'reservas', 'comensales', 'mesas'}} de las reservas."""
+    resumen = {}
+    for reserva in items:
+        clave = (reserva['Fecha_hora'][:10], reservas.restaurante(reserva))
+        fila = resumen.setdefault(clave, {'reservas': 0, 'comensales': 0, 'mesas': set()})
+        fila['reservas'] += 1
+        fila['comensales'] += int(reserva.get('Comensales', 0))
+        fila['mesas'].update([reserva['ID_Mesa'], *reserva.get('Mesas_unidas', [])])
+    return resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--desde', required=True, help='primera fecha (YYYY-MM-DD)')
+    parser.add_argument('--hasta', required=True, help='ultima fecha (YYYY-MM-DD), inclusive')
+    origen = parser.add_mutually_exclusive_group(required=True)
+    origen.add_argument('--bucket', help='bucket S3 del archivo')
+    origen.add_argument('--dir', help='directorio local con la misma estructura que el bucket')
+    parser.add_argument('--restaurante', help='solo este restaurante (Localidad#Categoria#Nombre_restaurant)')
+    parser.add_argument('--jsonl', action='store_true', help='imprimir las reservas en lugar del resumen')
+    args = parser.parse_args()
+
+    almacen = archivo.AlmacenS3(args.bucket) if args.bucket else archivo.AlmacenLocal(args.dir)
+    archivadas = archivo.leer(args.desde, args.hasta, args.restaurante, origen=almacen)
+
+    if args.jsonl:
+        for reserva in archivadas:
+            print(codificar(reserva))
+        return
+
+    print(f"{'fecha':<12}{'restaurante':<48}{'reservas':>10}{'comensales':>12}{'mesas':>8}")
+    for (fecha, restaurante), fila in sorted(resumir(archivadas).items()):
+        print(f"{fecha:<12}{restaurante:<48}{fila['reservas']:>10}{fila['comensales']:>12}{len(fila['mesas']):>8}")
+    print(f"{len(archivadas)} reservas entre {args.desde} y {args.hasta}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+"""Tests del layer y de los handlers contra DynamoDB simulado con moto.
+
+Usan el esquema de las tablas de los benchmarks (``benchmarks/esquema.py``,
+que refleja infra/db.tf) y el mismo path que las Lambdas: el layer y los
+directorios de los handlers.
+
+Uso:
+    pip install -r backend/tests/requirements.txt
+    python -m pytest backend/tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from esquema import ENV_AWS_FALSO, configurar_path, crear_tablas
+
+os.environ.update(ENV_AWS_FALSO)
+os.environ.pop('AWS_ENDPOINT_URL', None)
+configurar_path()
+
+
+@pytest.fixture
+def dynamodb():
+    """Resource de DynamoDB con las tablas creadas y vacías."""
+    import boto3
+    from moto import mock_aws
+
+    with mock_aws():
+        crear_tablas(boto3.client('dynamodb'))
+        yield boto3.resource('dynamodb')
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from booktable import horarios, reservas
+
+import admin_crear_mesa
+import admin_crear_restaurant
+import admin_reservas_lote
+import crear_reserva
+
+RESTAURANTE = {'localidad': 'Palermo', 'categoria': 'Parrilla', 'nombre_restaurant': 'Don Julio'}
+CLAVE_COMPUESTA = 'Palermo#Parrilla#Don Julio'
+ZONA = horarios.ZONA_POR_DEFECTO
+
+
+def _llamar(handler, **body):
+    resultado = handler({'body': json.dumps(body), 'headers': {}}, None)
+    return resultado['statusCode'], json.loads(resultado['body'])
+
+
+@pytest.mark.parametrize('particion, shards', [('restaurante', 1), ('dia', 3)])
+def test_no_cancela_el_rango_si_quedan_reservas_sin_migrar(dynamodb, monkeypatch, particion, shards):
+    monkeypatch.setattr(reservas, 'PARTICION', particion)
+    monkeypatch.setattr(reservas, 'SHARDS', shards)
+    _llamar(admin_crear_restaurant.admin_crear_restaurant, **RESTAURANTE, id_usuario='duenio')
+    _llamar(admin_crear_mesa.admin_crear_mesa, **RESTAURANTE, id_usuario='duenio', mesas=[{'capacidad': 4, 'cantidad': 2}])
+    for usuario in ('u1', 'u2'):
+        status, _ = _llamar(crear_reserva.crear_reserva, **RESTAURANTE, user_id=usuario, user_name='N', email='n@x.com',
+                            datetime=str(horarios.timestamp('2030-01-01T21:00:00', ZONA)), comensales='2')
+        assert status == 200
+    # Una reserva de antes del índice de mesas, en el último minuto del rango, y otra del día siguiente
+    tabla = dynamodb.Table(reservas.TABLA)
+    for fecha_hora, id_mesa in [('2030-01-01T23:59:30', 'vieja'), ('2030-01-02T00:00:00', 'otra')]:
+        clave = reservas.clave_anterior(CLAVE_COMPUESTA, horarios.timestamp(fecha_hora, ZONA), id_mesa)
+        tabla.put_item(Item=dict(clave, Fecha_hora=fecha_hora, ID_Mesa=id_mesa))
+
+    cancelar = dict(RESTAURANTE, id_usuario='duenio', accion='cancelar', **{'from': '2030-01-01'})
+    status, body = _llamar(admin_reservas_lote.admin_reservas_lote, **cancelar)
+    assert status == 409
+    assert body == admin_reservas_lote.MENSAJE_CLAVES_ANTERIORES
+    assert tabla.scan()['Count'] == 4
+
+    tabla.delete_item(Key=reservas.clave_anterior(CLAVE_COMPUESTA, horarios.timestamp('2030-01-01T23:59:30', ZONA), 'vieja'))
+    status, body = _llamar(admin_reservas_lote.admin_reservas_lote, **cancelar)
+    assert status == 200
+    assert (body['procesadas'], body['fallidas'], body['completo']) == (2, [], True)
+    assert [item['ID_Mesa'] for item in tabla.scan()['Items']] == ['otra']
@@ -0,0 +1,25 @@
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from booktable import admision, aws
+from booktable.cache import CacheLRU
+
+RESTAURANTE = 'Palermo#Parrilla#Don Julio'
+INSTANTE = 1893538800
+
+
+@pytest.mark.parametrize('error', [
+    EndpointConnectionError(endpoint_url='https://dynamodb.us-east-1.amazonaws.com'),
+    ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException', 'Message': 'throttled'}}, 'UpdateItem'),
+])
+def test_admite_el_pedido_si_admision_no_responde(dynamodb, monkeypatch, error):
+    def update_item(**kwargs):
+        raise error
+
+    monkeypatch.setattr(aws.cliente('dynamodb'), 'update_item', update_item)
+    # Sin lo que el contenedor ya sabe de otros tests
+    monkeypatch.setattr(admision, '_lleno', CacheLRU(admision.MAX_ENTRADAS))
+    monkeypatch.setattr(admision, '_agotado', CacheLRU(admision.MAX_ENTRADAS))
+
+    assert admision.admitir(RESTAURANTE, INSTANTE, 2) == (None, 0)
+    assert admision.registrar_agotado(RESTAURANTE, INSTANTE, 2) == admision.AGOTADO_SEGUNDOS
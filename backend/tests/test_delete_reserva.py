@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from booktable import horarios, reservas
+
+import delete_reserva
+
+RESTAURANTE = 'Palermo#Parrilla#Don Julio'
+INICIO = 1893538800  # 2030-01-01 20:00 en Buenos Aires
+
+
+def _cancelar():
+    body = json.dumps({'user_id': 'u1', 'datetime': str(INICIO)})
+    return delete_reserva.delete_reserva({'body': body, 'headers': {}}, None)
+
+
+@pytest.mark.parametrize('clave_en_reservas', ['compacta', 'anterior', None])
+def test_borra_la_reserva_con_la_clave_que_tenga(dynamodb, clave_en_reservas):
+    dynamodb.Table('USUARIOS').put_item(Item={
+        'ID_Usuario': 'u1', 'Fecha_hora': INICIO, 'Localidad': 'Palermo', 'Categoria': 'Parrilla',
+        'Nombre_restaurant': 'Don Julio', 'ID_Mesa': 'mesa-1', 'Indice_mesa': 3, 'Duracion': 120,
+    })
+    claves = {
+        'compacta': reservas.clave(RESTAURANTE, INICIO, 3, horarios.ZONA_POR_DEFECTO),
+        # Con el índice que le agregó reconstruir_disponibilidad pero todavía sin migrar
+        'anterior': reservas.clave_anterior(RESTAURANTE, INICIO, 'mesa-1'),
+    }
+    if clave_en_reservas:
+        dynamodb.Table(reservas.TABLA).put_item(Item=dict(
+            claves[clave_en_reservas], Fecha_hora='2030-01-01T20:00:00', ID_Mesa='mesa-1', Indice_mesa=3))
+
+    resultado = _cancelar()
+
+    usuarios = dynamodb.Table('USUARIOS').scan()['Items']
+    if clave_en_reservas:
+        assert resultado['statusCode'] == 200
+        assert usuarios == []
+        assert dynamodb.Table(reservas.TABLA).scan()['Items'] == []
+    else:
+        # Sin la reserva en RESERVAS no se borra solo la de USUARIOS
+        assert resultado['statusCode'] == 409
+        assert len(usuarios) == 1
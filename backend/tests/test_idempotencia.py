@@ -0,0 +1,54 @@
+import json
+
+from botocore.exceptions import ClientError
+
+from booktable import aws, idempotencia
+from booktable.http import respuesta
+
+METODOS = 'OPTIONS,POST'
+
+
+def _evento(clave, body='{"comensales": 2}'):
+    return {'body': body, 'headers': {'Idempotency-Key': clave}}
+
+
+def test_responde_503_si_idempotencia_no_responde(dynamodb, monkeypatch):
+    def put_item(**kwargs):
+        raise ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException', 'Message': 'throttled'}},
+                          'PutItem')
+
+    monkeypatch.setattr(aws.cliente('dynamodb'), 'put_item', put_item)
+    llamadas = []
+
+    @idempotencia.idempotente(METODOS)
+    def handler(event, context):
+        llamadas.append(event)
+        return respuesta(201, 'creada', METODOS)
+
+    resultado = handler(_evento('k1'), None)
+
+    assert resultado['statusCode'] == 503
+    assert resultado['headers']['Retry-After'] == '1'
+    assert resultado['headers']['Access-Control-Allow-Origin']
+    assert llamadas == []
+
+
+def test_la_invocacion_que_perdio_la_clave_no_pisa_la_respuesta(dynamodb):
+    respuestas = iter(['primera', 'segunda'])
+
+    @idempotencia.idempotente(METODOS)
+    def handler(event, context):
+        body = next(respuestas)
+        if body == 'primera':
+            # El bloqueo vence mientras la primera sigue en curso y un reintento retoma la clave
+            dynamodb.Table(idempotencia.TABLA).update_item(
+                Key={'Clave': 'handler#k1'}, UpdateExpression='SET Bloqueo = :vencido',
+                ExpressionAttributeValues={':vencido': 0})
+            assert json.loads(handler(event, context)['body']) == 'segunda'
+        return respuesta(201, body, METODOS)
+
+    assert json.loads(handler(_evento('k1'), None)['body']) == 'primera'
+
+    repetida = handler(_evento('k1'), None)
+    assert repetida['headers']['Idempotent-Replayed'] == 'true'
+    assert json.loads(repetida['body']) == 'segunda'
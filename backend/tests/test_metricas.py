@@ -0,0 +1,31 @@
+import json
+
+from booktable import aws, metricas
+
+
+def _registros(salida):
+    return [json.loads(linea) for linea in salida.splitlines() if linea.startswith('{')]
+
+
+def test_registro_emf_incluye_la_capacidad_consumida(dynamodb, monkeypatch, capsys):
+    monkeypatch.setattr(metricas, 'ACTIVAS', True)
+    enviados = []
+    aws.observar('before-call.dynamodb', lambda params, **kwargs: enviados.append(json.loads(params['body'])))
+
+    @metricas.instrumentar
+    def handler(event, context):
+        tabla = aws.tabla('VERSIONES')
+        tabla.put_item(Item={'Clave': 'restaurantes#Palermo', 'Version': 1})
+        tabla.get_item(Key={'Clave': 'restaurantes#Palermo'})
+        aws.cliente('dynamodb').get_item(TableName='VERSIONES', Key={'Clave': 'restaurantes#Palermo'})
+        return {'statusCode': 200}
+
+    handler({}, None)
+
+    # El parámetro llega al pedido, tanto desde la tabla como desde el cliente compartido
+    assert [pedido.get('ReturnConsumedCapacity') for pedido in enviados] == ['TOTAL'] * 3
+    registro, = _registros(capsys.readouterr().out)
+    assert registro['LlamadasDynamoDB'] == 3
+    assert registro['WCU'] > 0
+    assert registro['RCU'] > 0
+    assert all(paso['rcu'] + paso['wcu'] > 0 for paso in registro['Pasos'])
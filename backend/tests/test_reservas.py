@@ -0,0 +1,33 @@
+import pytest
+
+from booktable import horarios, reservas
+
+RESTAURANTE = 'Palermo#Parrilla#Don Julio'
+ZONA = horarios.ZONA_POR_DEFECTO
+INICIO = 1893538800  # 2030-01-01 20:00 en Buenos Aires
+
+
+@pytest.mark.parametrize('particion, shards', [('restaurante', 1), ('dia', 1), ('dia', 3)])
+@pytest.mark.parametrize('limit', [1, 2, 4, 7])
+def test_consultar_pagina_recorre_todas_las_reservas(dynamodb, monkeypatch, particion, shards, limit):
+    monkeypatch.setattr(reservas, 'PARTICION', particion)
+    monkeypatch.setattr(reservas, 'SHARDS', shards)
+    tabla = dynamodb.Table(reservas.TABLA)
+    # Tres noches, varias mesas por horario y una con el último índice (la siguiente clave es del minuto siguiente)
+    mesas = [(INICIO + i // 5 * 86400 + i % 3 * 3600, i) for i in range(15)] + [(INICIO, horarios.MAX_INDICE)]
+    esperadas = []
+    for instante, indice in mesas:
+        clave = reservas.clave(RESTAURANTE, instante, indice, ZONA)
+        tabla.put_item(Item=dict(clave, Fecha_hora=horarios.local(instante, ZONA), Indice_mesa=indice))
+        esperadas.append(clave[reservas.SK])
+
+    paginadas, token = [], None
+    while True:
+        items, token = reservas.consultar_pagina(RESTAURANTE, '2030-01-01', '2030-01-05', ZONA, limit, token)
+        assert len(items) <= limit
+        paginadas += [item[reservas.SK] for item in items]
+        if not token:
+            break
+
+    # Todas, una sola vez y en orden
+    assert paginadas == sorted(esperadas)
@@ -2,11 +2,17 @@
 import React, {useEffect, useState} from 'react';
 import {useRouter} from "next/navigation";
 
+interface MesaFila {
+    capacidad: string;
+    cantidad: string;
+    etiqueta: string;
+}
+
 interface MesaData {
     categoria: string;
     localidad: string;
     nombre_restaurant: string;
-    capacidad: string;
+    mesas: MesaFila[];
     id_usuario: string;
 }
 
@@ -20,12 +26,16 @@ interface RestaurantData {
     categoria: string;
     nombre_restaurant: string;
     id_usuario: string;
+    duracion_reserva: string;
+    zona_horaria: string;
 }
 
 interface AdminReservaData {
     localidad: string;
     categoria: string;
     nombre_restaurant: string;
+    from: string;
+    to: string;
 }
 
 export default function Home() {
@@ -36,7 +46,7 @@ export default function Home() {
         categoria: '',
         localidad: '',
         nombre_restaurant: '',
-        capacidad: '',
+        mesas: [{capacidad: '', cantidad: '1', etiqueta: ''}],
         id_usuario: ''
     });
 
@@ -44,13 +54,17 @@ export default function Home() {
         localidad: '',
         categoria: '',
         nombre_restaurant: '',
-        id_usuario: ''
+        id_usuario: '',
+        duracion_reserva: '',
+        zona_horaria: ''
     });
 
     const [adminReservaData, setAdminReservaData] = useState<AdminReservaData>({
         localidad: '',
         categoria: '',
-        nombre_restaurant: ''
+        nombre_restaurant: '',
+        from: '',
+        to: ''
     });
 
     const [searchData, setSearchData] = useState<SearchData>({
@@ -138,6 +152,72 @@ export default function Home() {
         }
     };
 
+    const handleGetMyRestaurants = async () => {
+        try {
+            const queryParams = new URLSearchParams({id_usuario: userEmail});
+
+            const response = await fetch(`${backendUrl}/admin/restaurantes?${queryParams.toString()}`, {
+                headers: getAuthHeaders()
+            });
+
+            if (response.status === 401) {
+                handleLogout();
+                return;
+            }
+
+            const data = await response.json();
+            setResult(JSON.stringify(data, null, 2));
+        } catch (error) {
+            setResult('Error: ' + (error as Error).message);
+        }
+    };
+
+    const handleGetDashboard = async () => {
+        try {
+            const queryParams = new URLSearchParams({id_usuario: userEmail});
+
+            const response = await fetch(`${backendUrl}/admin/dashboard?${queryParams.toString()}`, {
+                headers: getAuthHeaders()
+            });
+
+            if (response.status === 401) {
+                handleLogout();
+                return;
+            }
+
+            const data = await response.json();
+            setResult(JSON.stringify(data, null, 2));
+        } catch (error) {
+            setResult('Error: ' + (error as Error).message);
+        }
+    };
+
+    // Restaurantes y dashboard en un solo pedido: /batch ejecuta las dos operaciones en paralelo
+    const handleGetOverview = async () => {
+        try {
+            const response = await fetch(`${backendUrl}/batch`, {
+                method: 'POST',
+                headers: getAuthHeaders(),
+                body: JSON.stringify({
+                    operaciones: [
+                        {metodo: 'GET', ruta: '/admin/restaurantes', query: {id_usuario: userEmail}},
+                        {metodo: 'GET', ruta: '/admin/dashboard', query: {id_usuario: userEmail}}
+                    ]
+                })
+            });
+
+            if (response.status === 401) {
+                handleLogout();
+                return;
+            }
+
+            const data = await response.json();
+            setResult(JSON.stringify(data, null, 2));
+        } catch (error) {
+            setResult('Error: ' + (error as Error).message);
+        }
+    };
+
     const handleSearch = async () => {
         try {
           const queryParams = new URLSearchParams();
@@ -166,6 +246,21 @@ export default function Home() {
         }
       };
 
+    const updateMesaFila = (index: number, fila: Partial<MesaFila>) => {
+        setMesaData({
+            ...mesaData,
+            mesas: mesaData.mesas.map((actual, i) => i === index ? {...actual, ...fila} : actual)
+        });
+    };
+
+    const addMesaFila = () => {
+        setMesaData({...mesaData, mesas: [...mesaData.mesas, {capacidad: '', cantidad: '1', etiqueta: ''}]});
+    };
+
+    const removeMesaFila = (index: number) => {
+        setMesaData({...mesaData, mesas: mesaData.mesas.filter((_, i) => i !== index)});
+    };
+
     const handleCreateMesa = async (e: React.FormEvent) => {
         e.preventDefault();
         try {
@@ -187,7 +282,7 @@ export default function Home() {
         }
     };
 
-    const handleGetAdminReservas = async () => {
+    const handleGetAdminReservas = async (agregar?: string) => {
         try {
             const queryParams = new URLSearchParams({
                 localidad: adminReservaData.localidad,
@@ -195,6 +290,9 @@ export default function Home() {
                 nombre_restaurant: adminReservaData.nombre_restaurant,
                 id_usuario: userEmail
             });
+            if (adminReservaData.from) queryParams.set('from', adminReservaData.from);
+            if (adminReservaData.to) queryParams.set('to', adminReservaData.to);
+            if (agregar) queryParams.set('agregar', agregar);
 
             const response = await fetch(`${backendUrl}/admin/reservas?${queryParams.toString()}`, {
                 method: 'GET',
@@ -231,6 +329,27 @@ export default function Home() {
             </div>
 
             <h2 className="text-2xl font-bold mb-4">Restaurant OWNER</h2>
+            <div className="mb-8">
+                <h2 className="text-xl font-semibold mb-2">My Restaurants</h2>
+                <button
+                    onClick={handleGetMyRestaurants}
+                    className="w-full p-2 bg-blue-500 text-white rounded hover:bg-blue-600"
+                >
+                    Get My Restaurants
+                </button>
+                <button
+                    onClick={handleGetDashboard}
+                    className="w-full mt-2 p-2 bg-blue-500 text-white rounded hover:bg-blue-600"
+                >
+                    Today&apos;s Dashboard
+                </button>
+                <button
+                    onClick={handleGetOverview}
+                    className="w-full mt-2 p-2 bg-blue-500 text-white rounded hover:bg-blue-600"
+                >
+                    Restaurants + Dashboard
+                </button>
+            </div>
             <div className="mb-8">
           <h2 className="text-xl font-semibold mb-2">Search Restaurants</h2>
           <div className="space-y-2">
@@ -288,6 +407,23 @@ export default function Home() {
                         onChange={(e) => setRestaurantData({...restaurantData, nombre_restaurant: e.target.value})}
                         className="w-full p-2 border rounded text-black"
                     />
+                    <input
+                        type="number"
+                        min="15"
+                        max="360"
+                        step="15"
+                        placeholder="Duración de la reserva en minutos (opcional, 120 por defecto)"
+                        value={restaurantData.duracion_reserva}
+                        onChange={(e) => setRestaurantData({...restaurantData, duracion_reserva: e.target.value})}
+                        className="w-full p-2 border rounded text-black"
+                    />
+                    <input
+                        type="text"
+                        placeholder="Zona horaria (opcional, America/Argentina/Buenos_Aires por defecto)"
+                        value={restaurantData.zona_horaria}
+                        onChange={(e) => setRestaurantData({...restaurantData, zona_horaria: e.target.value})}
+                        className="w-full p-2 border rounded text-black"
+                    />
                     <button type="submit" className="w-full p-2 bg-purple-500 text-white rounded">
                         Create Restaurant
                     </button>
@@ -325,15 +461,41 @@ export default function Home() {
                         onChange={(e) => setMesaData({...mesaData, nombre_restaurant: e.target.value})}
                         className="w-full p-2 border rounded text-black"
                     />
-                    <input
-                        type="number"
-                        placeholder="Capacidad"
-                        value={mesaData.capacidad}
-                        onChange={(e) => setMesaData({...mesaData, capacidad: e.target.value})}
-                        className="w-full p-2 border rounded text-black"
-                    />
+                    {mesaData.mesas.map((fila, index) => (
+                        <div key={index} className="flex space-x-2">
+                            <input
+                                type="number"
+                                placeholder="Capacidad"
+                                value={fila.capacidad}
+                                onChange={(e) => updateMesaFila(index, {capacidad: e.target.value})}
+                                className="w-full p-2 border rounded text-black"
+                            />
+                            <input
+                                type="number"
+                                placeholder="Cantidad"
+                                value={fila.cantidad}
+                                onChange={(e) => updateMesaFila(index, {cantidad: e.target.value})}
+                                className="w-full p-2 border rounded text-black"
+                            />
+                            <input
+                                type="text"
+                                placeholder="Etiqueta (opcional)"
+                                value={fila.etiqueta}
+                                onChange={(e) => updateMesaFila(index, {etiqueta: e.target.value})}
+                                className="w-full p-2 border rounded text-black"
+                            />
+                            {mesaData.mesas.length > 1 && (
+                                <button type="button" onClick={() => removeMesaFila(index)} className="p-2 bg-gray-500 text-white rounded">
+                                    X
+                                </button>
+                            )}
+                        </div>
+                    ))}
+                    <button type="button" onClick={addMesaFila} className="w-full p-2 bg-gray-500 text-white rounded">
+                        Add Row
+                    </button>
                     <button type="submit" className="w-full p-2 bg-yellow-500 text-white rounded">
-                        Create Mesa
+                        Create Mesas
                     </button>
                 </form>
             </div>
@@ -345,7 +507,7 @@ export default function Home() {
             </div>
 
             <div className="mb-8">
-                <h2 className="text-xl font-semibold mb-2">Get Admin Reservas para hoy</h2>
+                <h2 className="text-xl font-semibold mb-2">Get Admin Reservas</h2>
                 <input
                     type="text"
                     placeholder="Localidad"
@@ -367,12 +529,32 @@ export default function Home() {
                     onChange={(e) => setAdminReservaData({...adminReservaData, nombre_restaurant: e.target.value})}
                     className="w-full p-2 border rounded text-black mb-2"
                 />
+                <input
+                    type="date"
+                    placeholder="Desde (hoy si se deja vacío)"
+                    value={adminReservaData.from}
+                    onChange={(e) => setAdminReservaData({...adminReservaData, from: e.target.value})}
+                    className="w-full p-2 border rounded text-black mb-2"
+                />
+                <input
+                    type="date"
+                    placeholder="Hasta"
+                    value={adminReservaData.to}
+                    onChange={(e) => setAdminReservaData({...adminReservaData, to: e.target.value})}
+                    className="w-full p-2 border rounded text-black mb-2"
+                />
                 <button
-                    onClick={handleGetAdminReservas}
-                    className="w-full p-2 bg-indigo-500 text-white rounded"
+                    onClick={() => handleGetAdminReservas()}
+                    className="w-full p-2 bg-indigo-500 text-white rounded mb-2"
                 >
                     Get Admin Reservas
                 </button>
+                <button
+                    onClick={() => handleGetAdminReservas('hora')}
+                    className="w-full p-2 bg-indigo-500 text-white rounded"
+                >
+                    Resumen por hora
+                </button>
             </div>
             <div className="mt-8 mb-8">
                 <h2 className="text-xl font-semibold mb-2">Result</h2>
@@ -112,6 +112,25 @@ export default function Home() {
     };
   };
 
+  // Reintenta los errores de red y de servidor con la misma Idempotency-Key:
+  // el backend devuelve la respuesta del primer intento en lugar de repetir la operación
+  const fetchIdempotente = async (url: string, init: RequestInit, intentos = 3) => {
+    const headers = {...getAuthHeaders(), 'Idempotency-Key': crypto.randomUUID()};
+    for (let intento = 1; ; intento++) {
+      try {
+        const response = await fetch(url, {...init, headers});
+        if ((response.status < 500 && response.status !== 409) || intento >= intentos) {
+          return response;
+        }
+      } catch (error) {
+        if (intento >= intentos) {
+          throw error;
+        }
+      }
+      await new Promise(resolve => setTimeout(resolve, 500 * intento));
+    }
+  };
+
   const handleLogout = () => {
     sessionStorage.clear();
     router.push("/login");
@@ -134,9 +153,8 @@ export default function Home() {
         datetime: timestamp.toString()
       };
 
-      const response = await fetch(`${backendUrl}/reservas`, {
+      const response = await fetchIdempotente(`${backendUrl}/reservas`, {
         method: 'POST',
-        headers: getAuthHeaders(),
         body: JSON.stringify(reservaPayload)
       });
 
@@ -185,9 +203,8 @@ export default function Home() {
         datetime: timestamp.toString()
       };
 
-      const response = await fetch(`${backendUrl}/reservas`, {
+      const response = await fetchIdempotente(`${backendUrl}/reservas`, {
         method: 'DELETE',
-        headers: getAuthHeaders(),
         body: JSON.stringify(body)
       });
 
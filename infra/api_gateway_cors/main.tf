@@ -57,6 +57,8 @@ resource "aws_api_gateway_integration" "options_integration_lambda" {
   resource_id = var.resource_id
   http_method = aws_api_gateway_method.options_lambda.http_method
   type        = "MOCK"
+  # Con binary_media_types = ["*/*"] el preflight llega como binario y el template no se aplicaría
+  content_handling = "CONVERT_TO_TEXT"
   request_templates = {
     "application/json" = "{\"statusCode\": 200}"
   }
@@ -87,7 +89,7 @@ resource "aws_api_gateway_integration_response" "options_integration_response" {
   http_method  = aws_api_gateway_method.options_lambda.http_method
   status_code  = aws_api_gateway_method_response.options_method_response.status_code
   response_parameters = {
-    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'",
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,If-None-Match,Idempotency-Key'",
     "method.response.header.Access-Control-Allow-Methods" = "'${local.allowed_methods}'",
     "method.response.header.Access-Control-Allow-Origin"  = "'*'"
   }
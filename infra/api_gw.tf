@@ -5,6 +5,10 @@
 resource "aws_api_gateway_rest_api" "my_api" {
   name        = "MiAPI"
   description = "API Gateway para mi aplicación"
+
+  # Las lambdas devuelven los bodies grandes comprimidos con gzip (en base64);
+  # API Gateway solo los decodifica a binario si el tipo está declarado acá
+  binary_media_types = ["*/*"]
 }
 
 
@@ -15,6 +19,13 @@ resource "aws_api_gateway_resource" "reservas" {
   path_part   = "reservas"
 }
 
+# Recurso API Gateway para "/reservas/lote"
+resource "aws_api_gateway_resource" "reservas_lote" {
+  rest_api_id = aws_api_gateway_rest_api.my_api.id
+  parent_id   = aws_api_gateway_resource.reservas.id
+  path_part   = "lote"
+}
+
 # Recurso API Gateway para "/restaurantes"
 resource "aws_api_gateway_resource" "restaurantes" {
   rest_api_id = aws_api_gateway_rest_api.my_api.id
@@ -22,6 +33,21 @@ resource "aws_api_gateway_resource" "restaurantes" {
   path_part   = "restaurantes"
 }
 
+# Recurso API Gateway para "/disponibilidad"
+resource "aws_api_gateway_resource" "disponibilidad" {
+  rest_api_id = aws_api_gateway_rest_api.my_api.id
+  parent_id   = aws_api_gateway_rest_api.my_api.root_resource_id
+  path_part   = "disponibilidad"
+}
+
+
+# Recurso API Gateway para "/batch"
+resource "aws_api_gateway_resource" "batch" {
+  rest_api_id = aws_api_gateway_rest_api.my_api.id
+  parent_id   = aws_api_gateway_rest_api.my_api.root_resource_id
+  path_part   = "batch"
+}
+
 
 # Recurso API Gateway para "/admin"
 resource "aws_api_gateway_resource" "admin" {
@@ -51,6 +77,27 @@ resource "aws_api_gateway_resource" "admin_reservas" {
   path_part   = "reservas"
 }
 
+# Recurso API Gateway para "/admin/restaurantes"
+resource "aws_api_gateway_resource" "admin_restaurantes" {
+  rest_api_id = aws_api_gateway_rest_api.my_api.id
+  parent_id   = aws_api_gateway_resource.admin.id
+  path_part   = "restaurantes"
+}
+
+# Recurso API Gateway para "/admin/dashboard"
+resource "aws_api_gateway_resource" "admin_dashboard" {
+  rest_api_id = aws_api_gateway_rest_api.my_api.id
+  parent_id   = aws_api_gateway_resource.admin.id
+  path_part   = "dashboard"
+}
+
+# Recurso API Gateway para "/admin/reservas/lote"
+resource "aws_api_gateway_resource" "admin_reservas_lote" {
+  rest_api_id = aws_api_gateway_rest_api.my_api.id
+  parent_id   = aws_api_gateway_resource.admin_reservas.id
+  path_part   = "lote"
+}
+
 module "reserva" {
   source = "./api_gateway_cors"
 
@@ -74,6 +121,27 @@ module "reserva" {
   ]
 }
 
+module "reservas_lote" {
+  source = "./api_gateway_cors"
+
+  rest_api = {
+    id            = "${aws_api_gateway_rest_api.my_api.id}"
+    execution_arn = "${aws_api_gateway_rest_api.my_api.execution_arn}"
+  }
+  resource_id    = aws_api_gateway_resource.reservas_lote.id
+  methods   = {
+    POST = module.my_lambdas.lambda_functions["crear_reservas_lote"]
+  }
+  path        = "reservas/lote"
+  stage       = "prod"
+  lambdaName  = "CrearReservasLote"
+  depends_on = [ 
+   aws_api_gateway_resource.reservas_lote,
+   aws_api_gateway_rest_api.my_api,
+   module.my_lambdas.lambda_functions
+  ]
+}
+
 module "restaurantes" {
   source = "./api_gateway_cors"
 
@@ -95,6 +163,48 @@ module "restaurantes" {
   ]
 }
 
+module "disponibilidad" {
+  source = "./api_gateway_cors"
+
+  rest_api = {
+    id            = "${aws_api_gateway_rest_api.my_api.id}"
+    execution_arn = "${aws_api_gateway_rest_api.my_api.execution_arn}"
+  }
+  resource_id    = aws_api_gateway_resource.disponibilidad.id
+  methods   = {
+    GET = module.my_lambdas.lambda_functions["buscar_disponibilidad"]
+  }
+  path        = "disponibilidad"
+  stage       = "prod"
+  lambdaName  = "BuscarDisponibilidad"
+  depends_on = [ 
+   aws_api_gateway_resource.disponibilidad,
+   aws_api_gateway_rest_api.my_api,
+   module.my_lambdas.lambda_functions
+  ]
+}
+
+module "batch" {
+  source = "./api_gateway_cors"
+
+  rest_api = {
+    id            = "${aws_api_gateway_rest_api.my_api.id}"
+    execution_arn = "${aws_api_gateway_rest_api.my_api.execution_arn}"
+  }
+  resource_id    = aws_api_gateway_resource.batch.id
+  methods   = {
+    POST = module.my_lambdas.lambda_functions["batch"]
+  }
+  path        = "batch"
+  stage       = "prod"
+  lambdaName  = "Batch"
+  depends_on = [ 
+   aws_api_gateway_resource.batch,
+   aws_api_gateway_rest_api.my_api,
+   module.my_lambdas.lambda_functions
+  ]
+}
+
 module "admin_restaurant" {
   source = "./api_gateway_cors"
 
@@ -161,6 +271,72 @@ module "admin_reservas"{
   ]
 }
 
+module "admin_reservas_lote" {
+  source = "./api_gateway_cors"
+
+  rest_api = {
+    id            = "${aws_api_gateway_rest_api.my_api.id}"
+    execution_arn = "${aws_api_gateway_rest_api.my_api.execution_arn}"
+  }
+
+  resource_id    = aws_api_gateway_resource.admin_reservas_lote.id
+  methods = {
+    POST = module.my_lambdas.lambda_functions["admin_reservas_lote"]
+  }
+  path        = "admin/reservas/lote"
+  stage       = "prod"
+  lambdaName  = "AdminReservasLote"
+  depends_on = [ 
+   aws_api_gateway_resource.admin_reservas_lote,
+   aws_api_gateway_rest_api.my_api,
+   module.my_lambdas.lambda_functions
+  ]
+}
+
+module "admin_restaurantes" {
+  source = "./api_gateway_cors"
+
+  rest_api = {
+    id            = "${aws_api_gateway_rest_api.my_api.id}"
+    execution_arn = "${aws_api_gateway_rest_api.my_api.execution_arn}"
+  }
+
+  resource_id    = aws_api_gateway_resource.admin_restaurantes.id
+  methods = {
+    GET = module.my_lambdas.lambda_functions["admin_obtener_restaurantes"]
+  }
+  path        = "admin/restaurantes"
+  stage       = "prod"
+  lambdaName  = "AdminObtenerRestaurantes"
+  depends_on = [ 
+   aws_api_gateway_resource.admin_restaurantes,
+   aws_api_gateway_rest_api.my_api,
+   module.my_lambdas.lambda_functions
+  ]
+}
+
+module "admin_dashboard" {
+  source = "./api_gateway_cors"
+
+  rest_api = {
+    id            = "${aws_api_gateway_rest_api.my_api.id}"
+    execution_arn = "${aws_api_gateway_rest_api.my_api.execution_arn}"
+  }
+
+  resource_id    = aws_api_gateway_resource.admin_dashboard.id
+  methods = {
+    GET = module.my_lambdas.lambda_functions["admin_obtener_dashboard"]
+  }
+  path        = "admin/dashboard"
+  stage       = "prod"
+  lambdaName  = "AdminObtenerDashboard"
+  depends_on = [ 
+   aws_api_gateway_resource.admin_dashboard,
+   aws_api_gateway_rest_api.my_api,
+   module.my_lambdas.lambda_functions
+  ]
+}
+
 
 # Se asegura que el deployment de las lambda dependa primero de las integraciones con el Api Gateway
 resource "aws_api_gateway_deployment" "my_api_deployment" {
@@ -168,8 +344,14 @@ resource "aws_api_gateway_deployment" "my_api_deployment" {
     module.reserva, 
     module.admin_mesas,
     module.admin_reservas,
+    module.admin_reservas_lote,
     module.admin_restaurant,
-    module.restaurantes
+    module.restaurantes,
+    module.disponibilidad,
+    module.reservas_lote,
+    module.admin_restaurantes,
+    module.admin_dashboard,
+    module.batch
   ]
   rest_api_id = aws_api_gateway_rest_api.my_api.id
   stage_name  = "prod"
@@ -179,8 +361,16 @@ resource "aws_api_gateway_deployment" "my_api_deployment" {
       module.reserva, 
       module.admin_mesas,
       module.admin_reservas,
+      module.admin_reservas_lote,
+    module.admin_reservas_lote,
       module.admin_restaurant,
-      module.restaurantes
+      module.restaurantes,
+      module.disponibilidad,
+      module.reservas_lote,
+      module.admin_restaurantes,
+      module.admin_dashboard,
+      module.batch,
+      aws_api_gateway_rest_api.my_api.binary_media_types
     ]))
   }
 
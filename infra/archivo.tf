@@ -0,0 +1,41 @@
+#############################
+# Archivo historico de reservas
+#############################
+
+# JSONL comprimido particionado por fecha (reservas/fecha=YYYY-MM-DD/), escrito por ArchivadorReservasLambda
+resource "aws_s3_bucket" "archivo" {
+  bucket = local.archivo_bucket_name
+
+  tags = {
+    Name        = "Archivo Reservas"
+    Environment = "Dev"
+  }
+}
+
+resource "aws_s3_bucket_public_access_block" "archivo" {
+  bucket = aws_s3_bucket.archivo.id
+
+  block_public_acls       = true
+  block_public_policy     = true
+  ignore_public_acls      = true
+  restrict_public_buckets = true
+}
+
+# El historico casi no se lee: pasa a una clase de almacenamiento mas barata
+resource "aws_s3_bucket_lifecycle_configuration" "archivo" {
+  bucket = aws_s3_bucket.archivo.id
+
+  rule {
+    id     = "reservas-antiguas"
+    status = "Enabled"
+
+    filter {
+      prefix = "reservas/"
+    }
+
+    transition {
+      days          = 90
+      storage_class = "STANDARD_IA"
+    }
+  }
+}
@@ -3,6 +3,14 @@
 # Lambdas
 #############################
 
+# Layer con el runtime compartido (clientes de AWS, respuestas HTTP y validacion)
+resource "aws_lambda_layer_version" "booktable" {
+  layer_name          = "booktable-runtime"
+  filename            = data.archive_file.booktable_layer_zip.output_path
+  source_code_hash    = data.archive_file.booktable_layer_zip.output_base64sha256
+  compatible_runtimes = ["python3.12"]
+}
+
 # Creacion de las lambdas con modulo
 
 module "my_lambdas" {
@@ -24,6 +32,12 @@ module "my_lambdas" {
       code = data.archive_file.crear_reserva_zip.output_path
       source_code_hash = data.archive_file.crear_reserva_zip.output_base64sha256
     }
+    crear_reservas_lote = {
+      name = "CrearReservasLoteLambda"
+      code = data.archive_file.crear_reservas_lote_zip.output_path
+      source_code_hash = data.archive_file.crear_reservas_lote_zip.output_base64sha256
+      timeout = 30
+    }
     admin_crear_restaurant = {
       name = "CrearRestaurantLambda"
       code = data.archive_file.admin_crear_restaurant_zip.output_path
@@ -39,15 +53,116 @@ module "my_lambdas" {
       code = data.archive_file.admin_obtener_reservas_zip.output_path
       source_code_hash = data.archive_file.admin_obtener_reservas_zip.output_base64sha256
     }
+    admin_reservas_lote = {
+      name = "AdminReservasLoteLambda"
+      code = data.archive_file.admin_reservas_lote_zip.output_path
+      source_code_hash = data.archive_file.admin_reservas_lote_zip.output_base64sha256
+      timeout = 30
+    }
+    admin_obtener_restaurantes = {
+      name = "AdminObtenerRestaurantesLambda"
+      code = data.archive_file.admin_obtener_restaurantes_zip.output_path
+      source_code_hash = data.archive_file.admin_obtener_restaurantes_zip.output_base64sha256
+    }
+    admin_obtener_dashboard = {
+      name = "AdminObtenerDashboardLambda"
+      code = data.archive_file.admin_obtener_dashboard_zip.output_path
+      source_code_hash = data.archive_file.admin_obtener_dashboard_zip.output_base64sha256
+      timeout = 15
+    }
     buscar_restaurant = {
       name = "BuscarRestaurantLambda"
       code = data.archive_file.buscar_restaurant_zip.output_path
       source_code_hash = data.archive_file.buscar_restaurant_zip.output_base64sha256
     }
+    buscar_disponibilidad = {
+      name = "BuscarDisponibilidadLambda"
+      code = data.archive_file.buscar_disponibilidad_zip.output_path
+      source_code_hash = data.archive_file.buscar_disponibilidad_zip.output_base64sha256
+    }
+    notificaciones_worker = {
+      name = "NotificacionesWorkerLambda"
+      code = data.archive_file.notificaciones_worker_zip.output_path
+      source_code_hash = data.archive_file.notificaciones_worker_zip.output_base64sha256
+      timeout = 30
+      # Los ARN se inyectan para no tener que listar los topicos de la cuenta
+      environment = {
+        TOPICOS_SNS = jsonencode({
+          (aws_sns_topic.restaurant_notifications.name)  = aws_sns_topic.restaurant_notifications.arn
+          (aws_sns_topic.reservation_notifications.name) = aws_sns_topic.reservation_notifications.arn
+        })
+      }
+    }
+    batch = {
+      name = "BatchLambda"
+      code = data.archive_file.batch_zip.output_path
+      source_code_hash = data.archive_file.batch_zip.output_base64sha256
+      timeout = 30
+    }
+    archivador_reservas = {
+      name = "ArchivadorReservasLambda"
+      code = data.archive_file.archivador_reservas_zip.output_path
+      source_code_hash = data.archive_file.archivador_reservas_zip.output_base64sha256
+      timeout = 60
+      environment = {
+        BOOKTABLE_ARCHIVO_BUCKET = aws_s3_bucket.archivo.bucket
+      }
+    }
   }
 
   lambda_role_arn  = data.aws_iam_role.labrole.arn
   vpc_subnets      = module.vpc.private_subnets
   security_groups  = [aws_security_group.lambda_sg.id]
   functions_runtime = "python3.12"
-}
\ No newline at end of file
+  layers            = [aws_lambda_layer_version.booktable.arn]
+  common_environment = merge(
+    var.metricas ? { BOOKTABLE_METRICAS = "1" } : {},
+    {
+      BOOKTABLE_DIAS_RETENCION     = tostring(var.dias_retencion)
+      BOOKTABLE_PARTICION_RESERVAS = var.particion_reservas
+      BOOKTABLE_SHARDS_RESERVAS    = tostring(var.shards_reservas)
+      BOOKTABLE_ADMISION_TASA      = tostring(var.admision_tasa)
+      BOOKTABLE_ADMISION_RAFAGA    = tostring(var.admision_rafaga)
+    }
+  )
+}
+
+# El stream del outbox dispara el worker de notificaciones en lotes
+resource "aws_lambda_event_source_mapping" "notificaciones" {
+  event_source_arn                   = module.dynamodb_tables.stream_arns["NOTIFICACIONES"]
+  function_name                      = module.my_lambdas.lambda_functions["notificaciones_worker"].arn
+  starting_position                  = "LATEST"
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 5
+  bisect_batch_on_function_error     = true
+  maximum_retry_attempts             = 10
+  function_response_types            = ["ReportBatchItemFailures"]
+
+  filter_criteria {
+    filter {
+      pattern = jsonencode({ eventName = ["INSERT"] })
+    }
+  }
+}
+
+# Las reservas que borra el TTL de RESERVAS se archivan en S3
+resource "aws_lambda_event_source_mapping" "archivo_reservas" {
+  event_source_arn                   = module.dynamodb_tables.stream_arns["RESERVAS"]
+  function_name                      = module.my_lambdas.lambda_functions["archivador_reservas"].arn
+  starting_position                  = "LATEST"
+  batch_size                         = 1000
+  maximum_batching_window_in_seconds = 60
+  bisect_batch_on_function_error     = true
+  maximum_retry_attempts             = 10
+  function_response_types            = ["ReportBatchItemFailures"]
+
+  # Solo los borrados del TTL, no las cancelaciones
+  filter_criteria {
+    filter {
+      pattern = jsonencode({
+        eventName    = ["REMOVE"]
+        userIdentity = { type = ["Service"], principalId = ["dynamodb.amazonaws.com"] }
+      })
+    }
+  }
+}
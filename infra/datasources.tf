@@ -1,6 +1,13 @@
 #############################
 # Empaquetar el Código de Lambda
 #############################
+data "archive_file" "booktable_layer_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../backend/booktable-layer"
+  output_path = "${path.module}/../backend/booktable-layer/booktable_layer.zip"
+  excludes    = ["booktable_layer.zip"]
+}
+
 data "archive_file" "admin_crear_mesa_zip" {
   type        = "zip"
   source_dir  = "${path.module}/../backend/admin-crear-mesa"
@@ -13,6 +20,12 @@ data "archive_file" "crear_reserva_zip" {
   output_path = "${path.module}/../backend/crear-reserva/crear_reserva.zip"
 }
 
+data "archive_file" "crear_reservas_lote_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../backend/crear-reservas-lote"
+  output_path = "${path.module}/../backend/crear-reservas-lote/crear_reservas_lote.zip"
+}
+
 data "archive_file" "admin_crear_restaurant_zip" {
   type        = "zip"
   source_dir  = "${path.module}/../backend/admin-crear-restaurant"
@@ -37,12 +50,83 @@ data "archive_file" "admin_obtener_reservas_zip" {
   output_path = "${path.module}/../backend/admin-obtener-reservas/admin_obtener_reservas.zip"
 }
 
+data "archive_file" "admin_reservas_lote_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../backend/admin-reservas-lote"
+  output_path = "${path.module}/../backend/admin-reservas-lote/admin_reservas_lote.zip"
+}
+
+data "archive_file" "admin_obtener_restaurantes_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../backend/admin-obtener-restaurantes"
+  output_path = "${path.module}/../backend/admin-obtener-restaurantes/admin_obtener_restaurantes.zip"
+}
+
+data "archive_file" "admin_obtener_dashboard_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../backend/admin-obtener-dashboard"
+  output_path = "${path.module}/../backend/admin-obtener-dashboard/admin_obtener_dashboard.zip"
+}
+
 data "archive_file" "buscar_restaurant_zip" {
   type        = "zip"
   source_dir  = "${path.module}/../backend/buscar-restaurant"
   output_path = "${path.module}/../backend/buscar-restaurant/buscar_restaurant.zip"
 }
 
+data "archive_file" "buscar_disponibilidad_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../backend/buscar-disponibilidad"
+  output_path = "${path.module}/../backend/buscar-disponibilidad/buscar_disponibilidad.zip"
+}
+
+data "archive_file" "notificaciones_worker_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../backend/notificaciones-worker"
+  output_path = "${path.module}/../backend/notificaciones-worker/notificaciones_worker.zip"
+}
+
+data "archive_file" "archivador_reservas_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/../backend/archivador-reservas"
+  output_path = "${path.module}/../backend/archivador-reservas/archivador_reservas.zip"
+}
+
+# /batch ejecuta los handlers en el mismo proceso: su paquete lleva también el módulo de cada uno
+locals {
+  handlers_batch = {
+    "crear-reserva"              = "crear_reserva"
+    "obtener-reservas"           = "obtener_reservas"
+    "delete-reserva"             = "delete_reserva"
+    "crear-reservas-lote"        = "crear_reservas_lote"
+    "buscar-restaurant"          = "buscar_restaurant"
+    "buscar-disponibilidad"      = "buscar_disponibilidad"
+    "admin-crear-restaurant"     = "admin_crear_restaurant"
+    "admin-crear-mesa"           = "admin_crear_mesa"
+    "admin-obtener-reservas"     = "admin_obtener_reservas"
+    "admin-obtener-restaurantes" = "admin_obtener_restaurantes"
+    "admin-obtener-dashboard"    = "admin_obtener_dashboard"
+  }
+}
+
+data "archive_file" "batch_zip" {
+  type        = "zip"
+  output_path = "${path.module}/../backend/batch/batch.zip"
+
+  source {
+    content  = file("${path.module}/../backend/batch/batch.py")
+    filename = "batch.py"
+  }
+
+  dynamic "source" {
+    for_each = local.handlers_batch
+    content {
+      content  = file("${path.module}/../backend/${source.key}/${source.value}.py")
+      filename = "${source.value}.py"
+    }
+  }
+}
+
 data "archive_file" "frontend" {
   type        = "zip"
   source_dir  = "${path.module}/../frontend"
@@ -17,18 +17,59 @@ module "dynamodb_tables" {
       pk_data_type  = "S"    
       sk            = "Categoria#Nombre_restaurant"
       sk_data_type  = "S"     
+      # Restaurantes de cada dueño (listado y verificacion de propiedad sin Scan)
+      gsi = [{
+        name         = "ID_Usuario-index"
+        pk           = "ID_Usuario"
+        pk_data_type = "S"
+      }]
     }
+    # Las reservas vencen por TTL; las de RESERVAS pasan por el stream al archivo historico
     "USUARIOS" = {
       pk            = "ID_Usuario"
       pk_data_type  = "S"    
       sk            = "Fecha_hora"
       sk_data_type  = "N"  
+      ttl_attribute = "Expira"
     }
     "RESERVAS" = {
+      pk               = "Localidad#Categoria#Nombre_restaurant"
+      pk_data_type     = "S"    
+      sk               = "Fecha_hora#ID_Mesa"
+      sk_data_type     = "S"      
+      stream_view_type = "OLD_IMAGE"
+      ttl_attribute    = "Expira"
+    }
+    # Mesas ocupadas por restaurante y horario (number set de indices de mesa)
+    "DISPONIBILIDAD" = {
       pk            = "Localidad#Categoria#Nombre_restaurant"
-      pk_data_type  = "S"    
-      sk            = "Fecha_hora#ID_Mesa"
-      sk_data_type  = "S"      
+      pk_data_type  = "S"
+      sk            = "Fecha_hora"
+      sk_data_type  = "S"
+    }
+    # Outbox de notificaciones: su stream dispara la Lambda que publica en SNS
+    "NOTIFICACIONES" = {
+      pk               = "ID_Notificacion"
+      pk_data_type     = "S"
+      stream_view_type = "NEW_IMAGE"
+      ttl_attribute    = "Expira"
+    }
+    # Contadores de version para invalidar los caches de las Lambdas (ej. busquedas por localidad)
+    "VERSIONES" = {
+      pk           = "Clave"
+      pk_data_type = "S"
+    }
+    # Respuestas de los pedidos con Idempotency-Key (crear y borrar reservas), vencen por TTL
+    "IDEMPOTENCIA" = {
+      pk            = "Clave"
+      pk_data_type  = "S"
+      ttl_attribute = "Expira"
+    }
+    # Token bucket y marca de agotado por restaurante y horario para admitir pedidos de reserva, vencen por TTL
+    "ADMISION" = {
+      pk            = "Clave"
+      pk_data_type  = "S"
+      ttl_attribute = "Expira"
     }
   }
 }
\ No newline at end of file
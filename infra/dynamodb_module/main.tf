@@ -10,13 +10,47 @@ resource "aws_dynamodb_table" "tables" {
     type = each.value.pk_data_type
   }
 
-  # Definimos la sort key
-  attribute {
-    name = each.value.sk
-    type = each.value.sk_data_type
+  # Definimos la sort key (opcional)
+  dynamic "attribute" {
+    for_each = each.value.sk == null ? [] : [each.value.sk]
+    content {
+      name = each.value.sk
+      type = each.value.sk_data_type
+    }
+  }
+
+  # Atributos de las claves de los indices secundarios globales
+  dynamic "attribute" {
+    for_each = { for gsi in each.value.gsi : gsi.pk => gsi.pk_data_type if !contains([each.value.pk, each.value.sk], gsi.pk) }
+    content {
+      name = attribute.key
+      type = attribute.value
+    }
   }
 
   # Establecemos los anteriores como hash (pk) y range (sk) keys
   hash_key  = each.value.pk
   range_key = each.value.sk
+
+  dynamic "global_secondary_index" {
+    for_each = each.value.gsi
+    content {
+      name            = global_secondary_index.value.name
+      hash_key        = global_secondary_index.value.pk
+      projection_type = global_secondary_index.value.projection_type
+    }
+  }
+
+  # Stream de cambios, para las tablas que disparan Lambdas
+  stream_enabled   = each.value.stream_view_type != null
+  stream_view_type = each.value.stream_view_type
+
+  # Borrado automatico de items vencidos
+  dynamic "ttl" {
+    for_each = each.value.ttl_attribute == null ? [] : [each.value.ttl_attribute]
+    content {
+      attribute_name = ttl.value
+      enabled        = true
+    }
+  }
 }
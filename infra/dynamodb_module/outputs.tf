@@ -0,0 +1,6 @@
+output "stream_arns" {
+  description = "ARN del stream de cada tabla que lo tiene habilitado"
+  value = {
+    for k, v in aws_dynamodb_table.tables : k => v.stream_arn if v.stream_enabled
+  }
+}
@@ -1,9 +1,17 @@
 variable "tables" {
   description = "Mapa de las tablas de DyanmoDB a crear"
   type = map(object({
-    pk           = string 
-    pk_data_type = string  
-    sk           = string 
-    sk_data_type = string 
+    pk               = string 
+    pk_data_type     = string  
+    sk               = optional(string)
+    sk_data_type     = optional(string)
+    stream_view_type = optional(string)
+    ttl_attribute    = optional(string)
+    gsi = optional(list(object({
+      name            = string
+      pk              = string
+      pk_data_type    = string
+      projection_type = optional(string, "KEYS_ONLY")
+    })), [])
   }))
 }
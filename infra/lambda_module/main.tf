@@ -6,6 +6,15 @@ resource "aws_lambda_function" "this" {
   runtime       = var.functions_runtime
   filename      = each.value.code
   source_code_hash = each.value.source_code_hash
+  layers           = var.layers
+  timeout          = each.value.timeout
+
+  dynamic "environment" {
+    for_each = length(merge(var.common_environment, each.value.environment)) > 0 ? [merge(var.common_environment, each.value.environment)] : []
+    content {
+      variables = environment.value
+    }
+  }
 
   role = var.lambda_role_arn
 
@@ -4,6 +4,8 @@ variable "lambda_functions" {
     name = string
     code = string
     source_code_hash = string
+    environment = optional(map(string), {})
+    timeout = optional(number)
   }))
 }
 
@@ -24,4 +26,16 @@ variable "security_groups" {
 variable "functions_runtime" {
   description = "Runtime"
   type = string
-}
\ No newline at end of file
+}
+
+variable "common_environment" {
+  description = "Variables de entorno comunes a todas las funciones (las de cada funcion tienen prioridad)"
+  type        = map(string)
+  default     = {}
+}
+
+variable "layers" {
+  description = "ARNs de los Lambda layers compartidos por todas las funciones"
+  type        = list(string)
+  default     = []
+}
@@ -1,3 +1,4 @@
 locals {
-  bucket_name = "frontend-cloudbooktable-${random_id.bucket_suffix.hex}"
+  bucket_name         = "frontend-cloudbooktable-${random_id.bucket_suffix.hex}"
+  archivo_bucket_name = "archivo-cloudbooktable-${random_id.bucket_suffix.hex}"
 }
\ No newline at end of file
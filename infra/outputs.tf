@@ -12,10 +12,19 @@ output "s3_bucket_name" {
   value       = aws_s3_bucket.frontend_bucket.bucket
 }
 
+output "archivo_bucket_name" {
+  description = "Bucket S3 con el archivo historico de reservas"
+  value       = aws_s3_bucket.archivo.bucket
+}
+
 output "website_url" {
   value = "http://${aws_s3_bucket.frontend_bucket.bucket}.s3-website-${data.aws_region.current.name}.amazonaws.com"
 }
 
 output "restaurant_topic_arn" {
   value = aws_sns_topic.restaurant_notifications.arn
+}
+
+output "reservation_topic_arn" {
+  value = aws_sns_topic.reservation_notifications.arn
 }
\ No newline at end of file
@@ -28,6 +28,33 @@ resource "aws_sns_topic_policy" "restaurant_notifications" {
   })
 }
 
+# Confirmaciones y cancelaciones de reservas. Cada mensaje lleva los atributos
+# "tipo" y "email" para que las suscripciones filtren lo que les corresponde.
+resource "aws_sns_topic" "reservation_notifications" {
+  name = "reservation-notifications"
+}
+
+resource "aws_sns_topic_policy" "reservation_notifications" {
+  arn = aws_sns_topic.reservation_notifications.arn
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Effect = "Allow"
+        Principal = {
+          AWS = data.aws_iam_role.labrole.arn
+        }
+        Action = [
+          "SNS:Publish",
+          "SNS:Subscribe"
+        ]
+        Resource = aws_sns_topic.reservation_notifications.arn
+      }
+    ]
+  })
+}
+
 resource "aws_sns_topic_subscription" "admin_email" {
   topic_arn = aws_sns_topic.restaurant_notifications.arn
   protocol  = "email"
@@ -1,4 +1,60 @@
 variable "region" {
   description = "La región de AWS donde se desplegarán los recursos"
   type = string
-}
\ No newline at end of file
+}
+
+variable "metricas" {
+  description = "Emitir metricas por invocacion (EMF) con la latencia y la capacidad consumida de cada llamada a AWS"
+  type        = bool
+  default     = false
+}
+
+variable "dias_retencion" {
+  description = "Dias que una reserva sigue en RESERVAS y USUARIOS despues de terminar; despues vence por TTL y se archiva"
+  type        = number
+  default     = 30
+}
+
+variable "particion_reservas" {
+  description = "Partition key de RESERVAS: 'restaurante' (una particion por restaurante) o 'dia' (una por restaurante y fecha)"
+  type        = string
+  default     = "restaurante"
+
+  validation {
+    condition     = contains(["restaurante", "dia"], var.particion_reservas)
+    error_message = "particion_reservas tiene que ser 'restaurante' o 'dia'."
+  }
+}
+
+variable "shards_reservas" {
+  description = "Shards de escritura por restaurante y fecha con particion_reservas = 'dia'"
+  type        = number
+  default     = 1
+
+  validation {
+    condition     = var.shards_reservas >= 1 && floor(var.shards_reservas) == var.shards_reservas
+    error_message = "shards_reservas tiene que ser un entero mayor o igual a 1."
+  }
+}
+
+variable "admision_tasa" {
+  description = "Pedidos de reserva por segundo que se admiten por restaurante y horario (0 desactiva el control de admision)"
+  type        = number
+  default     = 5
+
+  validation {
+    condition     = var.admision_tasa >= 0
+    error_message = "admision_tasa no puede ser negativa."
+  }
+}
+
+variable "admision_rafaga" {
+  description = "Pedidos de reserva que se admiten de golpe por restaurante y horario antes de limitarlos a admision_tasa"
+  type        = number
+  default     = 20
+
+  validation {
+    condition     = var.admision_rafaga >= 1 && floor(var.admision_rafaga) == var.admision_rafaga
+    error_message = "admision_rafaga tiene que ser un entero mayor o igual a 1."
+  }
+}
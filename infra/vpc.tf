@@ -56,6 +56,19 @@ resource "aws_vpc_endpoint" "dynamodb" {
   }
 }
 
+# Las Lambdas no tienen salida a internet: el archivador llega a S3 por un endpoint
+resource "aws_vpc_endpoint" "s3" {
+  vpc_id            = module.vpc.vpc_id
+  service_name      = "com.amazonaws.${data.aws_region.current.name}.s3"
+  vpc_endpoint_type = "Gateway"
+
+  route_table_ids = module.vpc.private_route_table_ids
+
+  tags = {
+    Name = "S3 VPC Endpoint"
+  }
+}
+
  # VPC Endpoint for SNS
 resource "aws_vpc_endpoint" "sns" {
   vpc_id             = module.vpc.vpc_id